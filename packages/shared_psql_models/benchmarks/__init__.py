@@ -0,0 +1 @@
+"""Offline benchmarks for shared_psql_models (run from packages/shared_psql_models)."""
@@ -0,0 +1,142 @@
+"""Messages per second of `EventConsumer` at different prefetch and concurrency settings.
+
+Runs against the in-memory broker, where every frame takes `--latency-ms` one way and
+every handler call awaits `--handler-ms` (an I/O-bound handler). The last rows feed the
+same messages to a batch handler that pays the handler latency once per batch.
+
+Usage (from packages/shared_psql_models):
+
+    python -m benchmarks.consumer_throughput --messages 5000 --latency-ms 0.5 --handler-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from shared_psql_models.messaging import Delivery, EventConsumer, MemoryBroker
+
+ROUTING_KEY = "knowledge_base.entry.created"
+
+
+def _body(i: int) -> bytes:
+    return json.dumps(
+        {
+            "routing_key": ROUTING_KEY,
+            "table": "knowledge_base_entries",
+            "op": "INSERT",
+            "schema_version": 1,
+            "seq": i,
+            "data": {"id": i, "knowledge_base_id": 1, "content": "x" * 256, "status": "queued"},
+        }
+    ).encode()
+
+
+async def run(
+    messages: int,
+    *,
+    prefetch: int,
+    concurrency: int,
+    latency: float,
+    handler_latency: float,
+    batch_size: int = 0,
+) -> tuple[float, EventConsumer, int]:
+    broker = MemoryBroker()
+    channel = broker.channel(latency=latency)
+    consumer = EventConsumer(channel, "bench.entries", prefetch=prefetch, concurrency=concurrency)  # type: ignore[arg-type]
+    handled = 0
+    done = asyncio.Event()
+
+    def count(n: int) -> None:
+        nonlocal handled
+        handled += n
+        if handled >= messages:
+            done.set()
+
+    if batch_size:
+
+        @consumer.batch_handler("knowledge_base.entry.*", size=batch_size, linger=0.005)
+        async def ingest_batch(deliveries: list[Delivery]) -> None:
+            await asyncio.sleep(handler_latency)
+            count(len(deliveries))
+
+    else:
+
+        @consumer.handler("knowledge_base.entry.*")
+        async def ingest(delivery: Delivery) -> None:
+            await asyncio.sleep(handler_latency)
+            count(1)
+
+    await consumer.start()
+    started = time.perf_counter()
+    for i in range(messages):
+        broker.publish("events.topic", ROUTING_KEY, _body(i))
+    await done.wait()
+    await consumer.drain()
+    elapsed = time.perf_counter() - started
+    await consumer.stop()
+    assert not channel.errors, channel.errors
+    assert broker.depth("bench.entries") == 0 and consumer.stats().acked == messages
+    return elapsed, consumer, channel.ack_frames
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--handler-ms", type=float, default=2.0)
+    parser.add_argument("--prefetch", default="1,16,128,512")
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    latency, handler_latency = args.latency_ms / 1000, args.handler_ms / 1000
+    prefetches = [int(value) for value in args.prefetch.split(",")]
+    concurrencies = [int(value) for value in args.concurrency.split(",")]
+    print(
+        f"{'handler':>8} {'prefetch':>8} {'conc':>5} {'msgs/s':>10} {'ack frames':>10} {'p99 ms':>8}"
+    )
+    for prefetch in prefetches:
+        for concurrency in concurrencies:
+            if concurrency > prefetch:
+                continue  # never more than `prefetch` deliveries to run
+            await _report("single", args.messages, prefetch, concurrency, latency, handler_latency)
+    for prefetch in prefetches:
+        if prefetch >= args.batch_size:
+            await _report(
+                "batch",
+                args.messages,
+                prefetch,
+                4,
+                latency,
+                handler_latency,
+                batch_size=args.batch_size,
+            )
+
+
+async def _report(
+    label: str,
+    messages: int,
+    prefetch: int,
+    concurrency: int,
+    latency: float,
+    handler_latency: float,
+    batch_size: int = 0,
+) -> None:
+    elapsed, consumer, frames = await run(
+        messages,
+        prefetch=prefetch,
+        concurrency=concurrency,
+        latency=latency,
+        handler_latency=handler_latency,
+        batch_size=batch_size,
+    )
+    [handler] = consumer.stats().handlers
+    print(
+        f"{label:>8} {prefetch:>8} {concurrency:>5} {messages / elapsed:>10.0f} "
+        f"{frames:>10} {handler.latency_p99_ms or 0:>8.2f}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
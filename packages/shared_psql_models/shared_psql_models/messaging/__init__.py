@@ -0,0 +1,23 @@
+"""Async consumer runtime for `event_broker` queues (needs the `messaging` extra)."""
+
+from .consumer import (
+    ConsumerStats,
+    DedupeWindow,
+    Delivery,
+    EventConsumer,
+    HandlerStats,
+    decode_body,
+    default_dedupe_key,
+)
+from .memory import MemoryBroker
+
+__all__ = [
+    "ConsumerStats",
+    "DedupeWindow",
+    "Delivery",
+    "EventConsumer",
+    "HandlerStats",
+    "MemoryBroker",
+    "decode_body",
+    "default_dedupe_key",
+]
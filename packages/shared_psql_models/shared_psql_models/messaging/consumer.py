@@ -0,0 +1,547 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage, AbstractQueue
+
+try:  # optional codecs; only needed when event_broker runs with msgpack or zstd
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the image
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the image
+    zstandard = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+ZSTD_ENCODING = "zstd"
+LATENCY_SAMPLES = 2048
+
+
+@dataclass(slots=True)
+class Delivery:
+    """A decoded message. Handlers must not ack or reject `message` themselves."""
+
+    routing_key: str
+    envelope: Any
+    message: AbstractIncomingMessage
+
+    @property
+    def redelivered(self) -> bool:
+        return bool(self.message.redelivered)
+
+
+Handler = Callable[[Delivery], Awaitable[None]]
+BatchHandler = Callable[[list[Delivery]], Awaitable[None]]
+Observer = Callable[[str, float, bool], None]
+
+
+@dataclass(slots=True)
+class HandlerStats:
+    name: str
+    pattern: str
+    batch: bool
+    calls: int
+    messages: int
+    failures: int
+    requeued: int
+    dead_lettered: int
+    latency_p50_ms: float | None
+    latency_p99_ms: float | None
+    latency_max_ms: float | None
+
+
+@dataclass(slots=True)
+class ConsumerStats:
+    queue: str
+    prefetch: int
+    concurrency: int
+    delivered: int
+    in_flight: int
+    acked: int
+    ack_frames: int
+    duplicates: int
+    unrouted: int
+    undecodable: int
+    handlers: list[HandlerStats]
+
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+    """AMQP topic matching: `*` is exactly one word, `#` is zero or more words."""
+    return _match(pattern.split("."), routing_key.split("."))
+
+
+def _match(pattern: list[str], words: list[str]) -> bool:
+    if not pattern:
+        return not words
+    head, rest = pattern[0], pattern[1:]
+    if head == "#":
+        return any(_match(rest, words[index:]) for index in range(len(words) + 1))
+    if not words:
+        return False
+    return (head == "*" or head == words[0]) and _match(rest, words[1:])
+
+
+def decode_body(
+    body: bytes, content_type: str | None = None, content_encoding: str | None = None
+) -> Any:
+    """Decodes an `event_broker` body (JSON or msgpack, optionally zstd-compressed)."""
+    if content_encoding == ZSTD_ENCODING:
+        if zstandard is None:
+            raise RuntimeError("zstd-encoded event received but zstandard is not installed")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    if content_type == MSGPACK_CONTENT_TYPE:
+        if msgpack is None:
+            raise RuntimeError("msgpack event received but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+def default_dedupe_key(delivery: Delivery) -> str | None:
+    """`seq` (plus `batch_index` for fanned-out statement batches), else `event_id`, else
+    the AMQP `message_id`; None disables deduplication for the message."""
+    envelope = delivery.envelope
+    if isinstance(envelope, dict):
+        seq = envelope.get("seq")
+        if seq is not None:
+            index = envelope.get("batch_index")
+            return f"seq:{seq}" if index is None else f"seq:{seq}:{index}"
+        if envelope.get("event_id") is not None:
+            return f"event:{envelope['event_id']}"
+    message_id = delivery.message.message_id
+    return f"id:{message_id}" if message_id else None
+
+
+class DedupeWindow:
+    """The most recent `size` idempotency keys, each remembered for at most `ttl` seconds."""
+
+    def __init__(self, size: int = 10_000, ttl: float | None = 600.0):
+        self._size = size
+        self._ttl = ttl
+        self._keys: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str) -> bool:
+        """Remembers `key`; False if it was already in the window."""
+        now = time.monotonic()
+        if self._ttl is not None:
+            while self._keys:
+                oldest, seen = next(iter(self._keys.items()))
+                if now - seen < self._ttl:
+                    break
+                del self._keys[oldest]
+        if key in self._keys:
+            return False
+        self._keys[key] = now
+        if len(self._keys) > self._size:
+            self._keys.popitem(last=False)
+        return True
+
+    def discard(self, key: str) -> None:
+        self._keys.pop(key, None)
+
+
+class _AckWindow:
+    """Acknowledges settled deliveries with as few frames as possible.
+
+    An ack with `multiple=True` covers every unacked tag up to and including its own on the
+    channel, so the window only ever acks up to the highest tag below which every delivery
+    has settled (handled, skipped as a duplicate, requeued or dead-lettered). A frame goes
+    out once `every` deliveries are covered or `interval` seconds after the first one was.
+    Frames are sent one at a time so they reach the broker in tag order.
+    """
+
+    def __init__(self, every: int, interval: float):
+        self._every = every
+        self._interval = interval
+        self._order: deque[AbstractIncomingMessage] = deque()
+        self._state: dict[int, bool | None] = {}  # id -> None while pending, else "ack it"
+        self._last_tag = 0
+        self._ackable: AbstractIncomingMessage | None = None
+        self._covered = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.acked = 0
+        self.frames = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def track(self, message: AbstractIncomingMessage) -> None:
+        tag = message.delivery_tag or 0
+        if tag <= self._last_tag:
+            # The channel was reopened and tags restarted; the broker requeued everything
+            # the old channel still held, so the old window is dropped, not acked.
+            self._order.clear()
+            self._state.clear()
+            self._ackable, self._covered = None, 0
+        self._last_tag = tag
+        self._order.append(message)
+        self._state[id(message)] = None
+        self.idle.clear()
+
+    async def done(self, message: AbstractIncomingMessage, *, ack: bool = True) -> None:
+        """Marks a delivery settled; `ack=False` if it was already rejected individually."""
+        if id(message) not in self._state:
+            return  # tracked by a channel that has since been reopened
+        self._state[id(message)] = ack
+        while self._order and self._state[id(self._order[0])] is not None:
+            head = self._order.popleft()
+            if self._state.pop(id(head)):
+                self._ackable = head
+                self._covered += 1
+        if not self._order:
+            self.idle.set()
+        if self._covered >= self._every:
+            await self.flush()
+        elif self._covered and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._interval, self._flush_later)
+
+    def _flush_later(self) -> None:
+        self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            message, covered = self._ackable, self._covered
+            self._ackable, self._covered = None, 0
+            if message is None:
+                return
+            try:
+                await message.ack(multiple=True)
+            except Exception as exc:  # noqa: BLE001 - a closed channel redelivers these anyway
+                print(f"[consumer] multi-ack up to {message.delivery_tag} failed: {exc!r}")
+                return
+            self.acked += covered
+            self.frames += 1
+
+
+@dataclass(slots=True, eq=False)
+class _Route:
+    name: str
+    pattern: str
+    handler: Callable[[Any], Awaitable[None]]
+    batch_size: int = 0
+    linger: float = 0.0
+    buffer: list[tuple[Delivery, str | None]] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+    calls: int = 0
+    messages: int = 0
+    failures: int = 0
+    requeued: int = 0
+    dead_lettered: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def stats(self) -> HandlerStats:
+        samples = sorted(self.latencies)
+        return HandlerStats(
+            name=self.name,
+            pattern=self.pattern,
+            batch=bool(self.batch_size),
+            calls=self.calls,
+            messages=self.messages,
+            failures=self.failures,
+            requeued=self.requeued,
+            dead_lettered=self.dead_lettered,
+            latency_p50_ms=_percentile(samples, 0.50),
+            latency_p99_ms=_percentile(samples, 0.99),
+            latency_max_ms=samples[-1] * 1000 if samples else None,
+        )
+
+
+def _percentile(samples: list[float], quantile: float) -> float | None:
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(quantile * len(samples)))] * 1000
+
+
+class EventConsumer:
+    """Consumes one queue bound to `events.topic` and dispatches messages to handlers.
+
+    - `prefetch` is the channel QoS: how many unacked deliveries the broker pushes ahead
+      of the handlers. `concurrency` bounds the handler calls running at once; a batch
+      call takes one slot.
+    - Handlers are matched by AMQP topic pattern in registration order, the first match
+      wins. `batch_handler` ones receive up to `size` deliveries, or what arrived within
+      `linger` seconds. Unmatched messages are acked and counted as `unrouted`.
+    - Successful deliveries are acked with `multiple=True` frames (see `ack_every` and
+      `ack_interval`), so the consumer must own its channel.
+    - Messages whose dedupe key (see `default_dedupe_key`) was seen within the dedupe
+      window are acked without calling a handler.
+    - A failing handler's messages are requeued once; on redelivery, or with
+      `requeue_failed=False`, they are rejected into `dead_letter_exchange`, which is
+      bound to a `<queue>.dead_letter` queue. Without a dead-letter exchange they are dropped.
+    - Per-handler call counts and latency percentiles are in `stats()`; `observer`, if
+      given, is called with `(handler name, seconds, ok)` after every call, e.g. to feed
+      a Prometheus histogram.
+    """
+
+    def __init__(
+        self,
+        channel: AbstractChannel,
+        queue: str,
+        *,
+        bindings: Sequence[str] = (),
+        exchange: str = "events.topic",
+        prefetch: int = 256,
+        concurrency: int = 32,
+        ack_every: int = 64,
+        ack_interval: float = 0.05,
+        dedupe_window: int = 10_000,
+        dedupe_ttl: float | None = 600.0,
+        dedupe_key: Callable[[Delivery], str | None] = default_dedupe_key,
+        dead_letter_exchange: str | None = "events.dead_letter",
+        requeue_failed: bool = True,
+        durable: bool = True,
+        observer: Observer | None = None,
+    ):
+        if prefetch < 1 or concurrency < 1:
+            raise ValueError("prefetch and concurrency must be at least 1")
+        self._channel = channel
+        self._queue_name = queue
+        self._bindings = tuple(bindings)
+        self._exchange_name = exchange
+        self._prefetch = prefetch
+        self._concurrency = concurrency
+        # A window larger than half the prefetch would stall deliveries until the timer fires.
+        self._acks = _AckWindow(min(ack_every, max(1, prefetch // 2)), ack_interval)
+        self._dedupe = DedupeWindow(dedupe_window, dedupe_ttl) if dedupe_window else None
+        self._dedupe_key = dedupe_key
+        self._dead_letter_exchange = dead_letter_exchange
+        self._requeue_failed = requeue_failed
+        self._durable = durable
+        self._observer = observer
+        self._slots = asyncio.Semaphore(concurrency)
+        self._routes: list[_Route] = []
+        self._route_cache: dict[str, _Route | None] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._queue: AbstractQueue | None = None
+        self._consumer_tag: str | None = None
+        self.delivered = 0
+        self.duplicates = 0
+        self.unrouted = 0
+        self.undecodable = 0
+
+    def handler(self, pattern: str, *, name: str | None = None) -> Callable[[Handler], Handler]:
+        def register(func: Handler) -> Handler:
+            self._add_route(_Route(name or func.__name__, pattern, func))
+            return func
+
+        return register
+
+    def batch_handler(
+        self, pattern: str, *, size: int = 100, linger: float = 0.05, name: str | None = None
+    ) -> Callable[[BatchHandler], BatchHandler]:
+        if size < 1:
+            raise ValueError("batch size must be at least 1")
+
+        def register(func: BatchHandler) -> BatchHandler:
+            self._add_route(
+                _Route(name or func.__name__, pattern, func, batch_size=size, linger=linger)
+            )
+            return func
+
+        return register
+
+    def _add_route(self, route: _Route) -> None:
+        if self._queue is not None:
+            raise RuntimeError("register handlers before start()")
+        self._routes.append(route)
+        self._route_cache.clear()
+
+    async def start(self) -> None:
+        """Sets QoS, declares the queue (and its dead-letter queue), binds it and starts consuming.
+
+        Bindings default to the handler patterns.
+        """
+        await self._channel.set_qos(prefetch_count=self._prefetch)
+        arguments: dict[str, Any] = {}
+        if self._dead_letter_exchange:
+            dead_letters = await self._channel.declare_exchange(
+                self._dead_letter_exchange, aio_pika.ExchangeType.TOPIC, durable=True
+            )
+            parked = await self._channel.declare_queue(
+                f"{self._queue_name}.dead_letter", durable=True
+            )
+            await parked.bind(dead_letters, routing_key="#")
+            arguments["x-dead-letter-exchange"] = self._dead_letter_exchange
+        exchange = await self._channel.declare_exchange(
+            self._exchange_name, aio_pika.ExchangeType.TOPIC
+        )
+        queue = await self._channel.declare_queue(
+            self._queue_name, durable=self._durable, arguments=arguments or None
+        )
+        for pattern in self._bindings or tuple(
+            dict.fromkeys(route.pattern for route in self._routes)
+        ):
+            await queue.bind(exchange, routing_key=pattern)
+        self._queue = queue
+        self._consumer_tag = await queue.consume(self._on_message)
+        print(
+            f"[consumer] consuming {self._queue_name} "
+            f"(prefetch={self._prefetch}, concurrency={self._concurrency})"
+        )
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stops new deliveries, then waits up to `timeout` seconds for in-flight handlers."""
+        if self._queue is not None and self._consumer_tag is not None:
+            await self._queue.cancel(self._consumer_tag)
+            self._consumer_tag = None
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except TimeoutError:
+            print(
+                f"[consumer] {len(self._acks)} deliveries on {self._queue_name} unsettled at shutdown"
+            )
+
+    async def drain(self) -> None:
+        """Flushes partial batches and returns once every delivery so far is settled and acked."""
+        for route in self._routes:
+            self._flush_batch(route)
+        await self._acks.idle.wait()
+        await self._acks.flush()
+
+    def stats(self) -> ConsumerStats:
+        return ConsumerStats(
+            queue=self._queue_name,
+            prefetch=self._prefetch,
+            concurrency=self._concurrency,
+            delivered=self.delivered,
+            in_flight=len(self._acks),
+            acked=self._acks.acked,
+            ack_frames=self._acks.frames,
+            duplicates=self.duplicates,
+            unrouted=self.unrouted,
+            undecodable=self.undecodable,
+            handlers=[route.stats() for route in self._routes],
+        )
+
+    def _route(self, routing_key: str) -> _Route | None:
+        if routing_key not in self._route_cache:
+            self._route_cache[routing_key] = next(
+                (route for route in self._routes if topic_matches(route.pattern, routing_key)), None
+            )
+        return self._route_cache[routing_key]
+
+    async def _on_message(self, message: AbstractIncomingMessage) -> None:
+        # aio_pika runs this as one task per delivery, started in delivery order.
+        self._acks.track(message)
+        self.delivered += 1
+        try:
+            envelope = decode_body(message.body, message.content_type, message.content_encoding)
+        except Exception as exc:  # noqa: BLE001 - a poison message must not stall the queue
+            print(
+                f"[consumer] undecodable message {message.delivery_tag} on {self._queue_name}: {exc!r}"
+            )
+            self.undecodable += 1
+            await self._reject(message, requeue=False)
+            return
+        delivery = Delivery(message.routing_key or "", envelope, message)
+        key = self._dedupe_key(delivery) if self._dedupe is not None else None
+        if key is not None and not self._dedupe.add(key):  # type: ignore[union-attr]
+            self.duplicates += 1
+            await self._acks.done(message)
+            return
+        route = self._route(delivery.routing_key)
+        if route is None:
+            self.unrouted += 1
+            await self._acks.done(message)
+            return
+        if route.batch_size:
+            route.buffer.append((delivery, key))
+            if len(route.buffer) >= route.batch_size:
+                self._flush_batch(route)
+            elif route.timer is None:
+                route.timer = asyncio.get_running_loop().call_later(
+                    route.linger, self._flush_batch, route
+                )
+            return
+        async with self._slots:
+            await self._run(route, [(delivery, key)])
+
+    def _flush_batch(self, route: _Route) -> None:
+        if route.timer is not None:
+            route.timer.cancel()
+            route.timer = None
+        pending, route.buffer = route.buffer, []
+        if pending:
+            task = asyncio.create_task(self._run_batch(route, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, route: _Route, pending: list[tuple[Delivery, str | None]]) -> None:
+        async with self._slots:
+            await self._run(route, pending)
+
+    async def _run(self, route: _Route, pending: list[tuple[Delivery, str | None]]) -> None:
+        deliveries = [delivery for delivery, _ in pending]
+        started = time.perf_counter()
+        try:
+            await route.handler(deliveries if route.batch_size else deliveries[0])
+        except Exception as exc:  # noqa: BLE001 - handler errors are settled per message below
+            error: Exception | None = exc
+        else:
+            error = None
+        elapsed = time.perf_counter() - started
+        route.calls += 1
+        route.messages += len(deliveries)
+        route.latencies.append(elapsed)
+        if self._observer is not None:
+            self._observer(route.name, elapsed, error is None)
+        if error is None:
+            for delivery in deliveries:
+                await self._acks.done(delivery.message)
+            return
+
+        route.failures += 1
+        print(
+            f"[consumer] {route.name} failed on {len(deliveries)} message(s) from {self._queue_name}: {error!r}"
+        )
+        for delivery, key in pending:
+            if key is not None and self._dedupe is not None:
+                self._dedupe.discard(key)
+            requeue = self._requeue_failed and not delivery.redelivered
+            if requeue:
+                route.requeued += 1
+            else:
+                route.dead_lettered += 1
+            await self._reject(delivery.message, requeue=requeue)
+
+    async def _reject(self, message: AbstractIncomingMessage, *, requeue: bool) -> None:
+        try:
+            await message.reject(requeue=requeue)
+        except Exception as exc:  # noqa: BLE001 - a closed channel redelivers the message anyway
+            print(f"[consumer] reject of {message.delivery_tag} failed: {exc!r}")
+        await self._acks.done(message, ack=False)
+
+
+__all__ = [
+    "BatchHandler",
+    "ConsumerStats",
+    "DedupeWindow",
+    "Delivery",
+    "EventConsumer",
+    "Handler",
+    "HandlerStats",
+    "Observer",
+    "decode_body",
+    "default_dedupe_key",
+    "topic_matches",
+]
@@ -0,0 +1,266 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .consumer import topic_matches
+
+
+@dataclass(slots=True)
+class _Stored:
+    routing_key: str
+    body: bytes
+    content_type: str | None = "application/json"
+    content_encoding: str | None = None
+    headers: dict[str, Any] = field(default_factory=dict)
+    message_id: str | None = None
+    redelivered: bool = False
+
+
+class MemoryMessage:
+    """The parts of `aio_pika.abc.AbstractIncomingMessage` that `EventConsumer` uses."""
+
+    def __init__(self, channel: "MemoryChannel", delivery_tag: int, stored: _Stored):
+        self.channel = channel
+        self.delivery_tag = delivery_tag
+        self.routing_key = stored.routing_key
+        self.body = stored.body
+        self.content_type = stored.content_type
+        self.content_encoding = stored.content_encoding
+        self.headers = stored.headers
+        self.message_id = stored.message_id
+        self.redelivered = stored.redelivered
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.channel._send(self.delivery_tag, multiple=multiple, requeue=None)
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self.channel._send(self.delivery_tag, multiple=multiple, requeue=requeue)
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.channel._send(self.delivery_tag, multiple=False, requeue=requeue)
+
+
+class MemoryExchange:
+    def __init__(self, broker: "MemoryBroker", name: str):
+        self._broker = broker
+        self.name = name
+
+    async def publish(self, message: Any, routing_key: str, **_: Any) -> None:
+        self._broker.publish(
+            self.name,
+            routing_key,
+            message.body,
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            headers=dict(message.headers or {}),
+            message_id=message.message_id,
+        )
+
+
+class _QueueState:
+    def __init__(self, name: str, arguments: dict[str, Any]):
+        self.name = name
+        self.arguments = arguments
+        self.messages: deque[_Stored] = deque()
+        self.channel: MemoryChannel | None = None
+
+
+class MemoryQueue:
+    def __init__(self, channel: "MemoryChannel", state: _QueueState):
+        self._channel = channel
+        self._state = state
+        self.name = state.name
+
+    async def bind(self, exchange: MemoryExchange | str, routing_key: str = "#", **_: Any) -> None:
+        name = exchange if isinstance(exchange, str) else exchange.name
+        self._channel.broker._bindings.setdefault(name, []).append((routing_key, self._state))
+
+    async def consume(
+        self, callback: Callable[[MemoryMessage], Awaitable[None]], no_ack: bool = False, **_: Any
+    ) -> str:
+        if no_ack:
+            raise NotImplementedError("the in-memory broker only supports manual acks")
+        return self._channel._consume(self._state, callback)
+
+    async def cancel(self, consumer_tag: str, **_: Any) -> None:
+        self._channel._cancel(self._state)
+
+
+class MemoryChannel:
+    """One consumer channel; frames in both directions take `latency` seconds and stay in order.
+
+    The broker pushes deliveries while fewer than `prefetch` are unacked, like RabbitMQ's
+    `basic.qos`. Acks for unknown or already settled tags are recorded in `errors`, where
+    RabbitMQ would close the channel.
+    """
+
+    def __init__(self, broker: "MemoryBroker", latency: float = 0.0):
+        self.broker = broker
+        self.latency = latency
+        self.prefetch = 0
+        self.is_closed = False
+        self.ack_frames = 0
+        self.reject_frames = 0
+        self.errors: list[str] = []
+        self._next_tag = 0
+        self._unacked: dict[int, tuple[_QueueState, _Stored]] = {}
+        self._consumers: dict[
+            str, tuple[_QueueState, Callable[[MemoryMessage], Awaitable[None]]]
+        ] = {}
+        self._wire: deque[tuple[float, Callable[[], None]]] = deque()
+        self._wire_timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def set_qos(self, prefetch_count: int = 0, **_: Any) -> None:
+        self.prefetch = prefetch_count
+
+    async def declare_exchange(self, name: str, *_: Any, **__: Any) -> MemoryExchange:
+        return MemoryExchange(self.broker, name)
+
+    async def declare_queue(
+        self, name: str, *, arguments: dict[str, Any] | None = None, **_: Any
+    ) -> MemoryQueue:
+        state = self.broker.queues.setdefault(name, _QueueState(name, dict(arguments or {})))
+        return MemoryQueue(self, state)
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+    def _consume(
+        self, state: _QueueState, callback: Callable[[MemoryMessage], Awaitable[None]]
+    ) -> str:
+        tag = f"ctag.{len(self._consumers) + 1}"
+        self._consumers[state.name] = (state, callback)
+        state.channel = self
+        self._pump()
+        return tag
+
+    def _cancel(self, state: _QueueState) -> None:
+        self._consumers.pop(state.name, None)
+        state.channel = None
+
+    def _pump(self) -> None:
+        for state, callback in list(self._consumers.values()):
+            while state.messages and (not self.prefetch or len(self._unacked) < self.prefetch):
+                stored = state.messages.popleft()
+                self._next_tag += 1
+                self._unacked[self._next_tag] = (state, stored)
+                message = MemoryMessage(self, self._next_tag, stored)
+                self._transmit(
+                    lambda message=message, callback=callback: self._deliver(callback, message)
+                )
+
+    def _deliver(
+        self, callback: Callable[[MemoryMessage], Awaitable[None]], message: MemoryMessage
+    ) -> None:
+        task = asyncio.create_task(callback(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _send(self, delivery_tag: int, *, multiple: bool, requeue: bool | None) -> None:
+        if requeue is None:
+            self.ack_frames += 1
+        else:
+            self.reject_frames += 1
+        self._transmit(lambda: self._settle(delivery_tag, multiple, requeue))
+
+    def _settle(self, delivery_tag: int, multiple: bool, requeue: bool | None) -> None:
+        if delivery_tag not in self._unacked:
+            self.errors.append(f"PRECONDITION_FAILED - unknown delivery tag {delivery_tag}")
+            return
+        tags = [tag for tag in self._unacked if tag <= delivery_tag] if multiple else [delivery_tag]
+        for tag in tags:
+            state, stored = self._unacked.pop(tag)
+            if requeue:
+                stored.redelivered = True
+                state.messages.appendleft(stored)
+            elif requeue is False:
+                self.broker._dead_letter(state, stored)
+        self._pump()
+
+    def _transmit(self, frame: Callable[[], None]) -> None:
+        loop = asyncio.get_running_loop()
+        if self.latency <= 0:
+            loop.call_soon(frame)
+            return
+        self._wire.append((loop.time() + self.latency, frame))
+        if self._wire_timer is None:
+            self._wire_timer = loop.call_at(self._wire[0][0], self._arrive)
+
+    def _arrive(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wire_timer = None
+        while self._wire and self._wire[0][0] <= loop.time():
+            self._wire.popleft()[1]()
+        if self._wire:
+            self._wire_timer = loop.call_at(self._wire[0][0], self._arrive)
+
+
+class MemoryBroker:
+    """In-memory stand-in for RabbitMQ topic exchanges, for tests and benchmarks of consumers.
+
+    Supports topic bindings, prefetch, single and multiple acks, requeue and the
+    `x-dead-letter-exchange` queue argument. Nothing is persisted and every queue has
+    at most one consumer.
+    """
+
+    def __init__(self) -> None:
+        self.queues: dict[str, _QueueState] = {}
+        self._bindings: dict[str, list[tuple[str, _QueueState]]] = {}
+
+    def channel(self, *, latency: float = 0.0) -> MemoryChannel:
+        return MemoryChannel(self, latency)
+
+    def publish(
+        self,
+        exchange: str,
+        routing_key: str,
+        body: bytes,
+        *,
+        content_type: str | None = "application/json",
+        content_encoding: str | None = None,
+        headers: dict[str, Any] | None = None,
+        message_id: str | None = None,
+    ) -> int:
+        """Routes a message to every bound queue; returns how many received it."""
+        queues = {
+            id(state): state
+            for pattern, state in self._bindings.get(exchange, [])
+            if topic_matches(pattern, routing_key)
+        }
+        for state in queues.values():
+            state.messages.append(
+                _Stored(
+                    routing_key,
+                    body,
+                    content_type,
+                    content_encoding,
+                    dict(headers or {}),
+                    message_id,
+                )
+            )
+            if state.channel is not None:
+                state.channel._pump()
+        return len(queues)
+
+    def depth(self, queue: str) -> int:
+        state = self.queues.get(queue)
+        return len(state.messages) if state else 0
+
+    def _dead_letter(self, state: _QueueState, stored: _Stored) -> None:
+        exchange = state.arguments.get("x-dead-letter-exchange")
+        if exchange:
+            self.publish(
+                exchange,
+                stored.routing_key,
+                stored.body,
+                content_type=stored.content_type,
+                content_encoding=stored.content_encoding,
+                headers={**stored.headers, "x-first-death-queue": state.name},
+                message_id=stored.message_id,
+            )
+
+
+__all__ = ["MemoryBroker", "MemoryChannel", "MemoryExchange", "MemoryMessage", "MemoryQueue"]
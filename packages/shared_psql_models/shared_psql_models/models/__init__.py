@@ -1,4 +1,5 @@
 from .agent import Agent
+from .event import DomainEvent, DomainEventArchive, DomainEventLog
 from .instance import (
     Instance,
     InstanceStatus,
@@ -11,6 +12,9 @@ from .instance import (
 
 __all__ = [
     "Agent",
+    "DomainEvent",
+    "DomainEventArchive",
+    "DomainEventLog",
     "Instance",
     "InstanceStatus",
     "KnowledgeBase",
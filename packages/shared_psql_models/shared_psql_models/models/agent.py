@@ -1,10 +1,10 @@
 from sqlalchemy import Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
-from shared_psql_models.base import Base, JSONBCompat
+from shared_psql_models.base import Base, JSONBCompat, TimestampMixin
 
 
-class Agent(Base):
+class Agent(TimestampMixin, Base):
     """Authoritative definition for agents stored in shared_psql."""
 
     __tablename__ = "agents"
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from shared_psql_models.base import Base, JSONBCompat
+
+_EventId = BigInteger().with_variant(Integer, "sqlite")
+
+
+class DomainEvent(Base):
+    """Append-only outbox row written by the domain event triggers in outbox mode."""
+
+    __tablename__ = "domain_events"
+
+    id: Mapped[int] = mapped_column(_EventId, primary_key=True, autoincrement=True)
+    routing_key: Mapped[str] = mapped_column(String(120), nullable=False)
+    table_name: Mapped[str] = mapped_column(String(63), nullable=False)
+    op: Mapped[str] = mapped_column(String(16), nullable=False)
+    schema_version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    payload: Mapped[dict] = mapped_column(JSONBCompat, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False, server_default=func.now())
+
+
+class DomainEventArchive(Base):
+    """Published outbox rows moved here in bulk when archiving is enabled."""
+
+    __tablename__ = "domain_events_archive"
+
+    id: Mapped[int] = mapped_column(_EventId, primary_key=True, autoincrement=False)
+    routing_key: Mapped[str] = mapped_column(String(120), nullable=False)
+    table_name: Mapped[str] = mapped_column(String(63), nullable=False)
+    op: Mapped[str] = mapped_column(String(16), nullable=False)
+    schema_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONBCompat, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    published_at: Mapped[datetime] = mapped_column(nullable=False, server_default=func.now())
+
+
+class DomainEventLog(Base):
+    """Short-retention journal of NOTIFY envelopes, keyed by the `domain_event_seq` stamp.
+
+    Multi-row statements log one row per batch of up to `botberi.event_batch_rows` rows,
+    with the changed rows under `payload["rows"]`.
+    """
+
+    __tablename__ = "domain_event_log"
+
+    seq: Mapped[int] = mapped_column(_EventId, primary_key=True, autoincrement=False)
+    payload: Mapped[dict] = mapped_column(JSONBCompat, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False, server_default=func.now(), index=True)
+
+
+__all__ = ["DomainEvent", "DomainEventArchive", "DomainEventLog"]
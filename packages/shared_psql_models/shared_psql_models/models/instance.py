@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import enum
 
-from sqlalchemy import Enum, ForeignKey, Integer, String
+from sqlalchemy import Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from shared_psql_models.base import Base, JSONBCompat, TimestampMixin
@@ -39,6 +39,7 @@ class Instance(TimestampMixin, Base):
     """Canonical definition of user-created bot instances."""
 
     __tablename__ = "instances"
+    __table_args__ = (Index("ix_instances_user_id_id", "user_id", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     bot_id: Mapped[int] = mapped_column(ForeignKey("agents.id", ondelete="RESTRICT"), nullable=False)
@@ -82,6 +83,9 @@ class KnowledgeBaseEntry(TimestampMixin, Base):
     """Individual knowledge base entries tied to an instance."""
 
     __tablename__ = "knowledge_base_entries"
+    __table_args__ = (
+        Index("ix_knowledge_base_entries_knowledge_base_id_updated_at", "knowledge_base_id", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     knowledge_base_id: Mapped[int] = mapped_column(
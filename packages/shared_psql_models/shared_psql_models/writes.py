@@ -0,0 +1,83 @@
+"""Write helpers that return the written row from the same statement.
+
+`flush()` + `commit()` + `refresh()` costs a round trip each; these issue one
+`INSERT`/`UPDATE ... RETURNING` instead, and create an instance together with its
+knowledge base in one data-modifying CTE on Postgres.
+"""
+
+from typing import Any, TypeVar
+
+from sqlalchemy import ColumnElement, Select, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared_psql_models.models.instance import Instance, KnowledgeBase
+from shared_psql_models.schemas.instance import InstanceSchema
+
+ModelT = TypeVar("ModelT")
+
+
+async def insert_returning(session: AsyncSession, model: type[ModelT], **values: Any) -> ModelT:
+    """Inserts one row and returns it as a persistent ORM object, server defaults included."""
+    result = await session.scalars(insert(model).values(**values).returning(model))
+    return result.one()
+
+
+async def update_returning(
+    session: AsyncSession,
+    model: type[ModelT],
+    *criteria: ColumnElement[bool],
+    **values: Any,
+) -> ModelT | None:
+    """Updates the row matching `criteria` and returns it, or None when nothing matched.
+
+    An instance of the row already in the session is refreshed in place. `criteria` must
+    select at most one row (normally the primary key).
+    """
+    stmt = (
+        update(model)
+        .where(*criteria)
+        .values(**values)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
+    result = await session.scalars(stmt)
+    return result.one_or_none()
+
+
+async def create_instance_with_knowledge_base(
+    session: AsyncSession, **values: Any
+) -> InstanceSchema:
+    """Inserts an instance and its empty knowledge base and returns both as the schema.
+
+    On Postgres this is a single statement; other dialects (SQLite in tests) have no
+    data-modifying CTEs and take one `INSERT ... RETURNING` per table.
+    """
+    instances, knowledge_bases = Instance.__table__, KnowledgeBase.__table__
+    if session.get_bind().dialect.name == "postgresql":
+        result = await session.execute(_instance_with_knowledge_base(values))
+        row = dict(result.mappings().one())
+        knowledge_base_id = row.pop("knowledge_base_id")
+    else:
+        result = await session.execute(insert(instances).values(**values).returning(*instances.c))
+        row = dict(result.mappings().one())
+        knowledge_base_id = await session.scalar(
+            insert(knowledge_bases).values(instance_id=row["id"]).returning(knowledge_bases.c.id)
+        )
+    knowledge_base = {"id": knowledge_base_id, "instance_id": row["id"], "entries": []}
+    return InstanceSchema.model_validate({**row, "knowledge_base": knowledge_base})
+
+
+def _instance_with_knowledge_base(values: dict[str, Any]) -> Select[Any]:
+    """The Postgres statement: the instance's columns plus `knowledge_base_id`."""
+    instances, knowledge_bases = Instance.__table__, KnowledgeBase.__table__
+    new_instance = insert(instances).values(**values).returning(*instances.c).cte("new_instance")
+    new_knowledge_base = (
+        insert(knowledge_bases)
+        .from_select(["instance_id"], select(new_instance.c.id))
+        .returning(knowledge_bases.c.id.label("knowledge_base_id"))
+        .cte("new_knowledge_base")
+    )
+    return select(new_instance, new_knowledge_base)
+
+
+__all__ = ["create_instance_with_knowledge_base", "insert_returning", "update_returning"]
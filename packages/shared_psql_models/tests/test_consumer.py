@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import pytest
+
+from shared_psql_models.messaging import DedupeWindow, Delivery, EventConsumer, MemoryBroker
+from shared_psql_models.messaging import consumer as consumer_module
+from shared_psql_models.messaging.consumer import _AckWindow
+
+ROUTING_KEY = "knowledge_base.entry.created"
+
+
+def _body(seq: int) -> bytes:
+    return json.dumps({"routing_key": ROUTING_KEY, "seq": seq, "data": {"id": seq}}).encode()
+
+
+async def _eventually(condition, timeout: float = 1.0) -> None:
+    for _ in range(int(timeout / 0.005)):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not reached")
+
+
+async def _received(broker: MemoryBroker, channel, queue: str, count: int) -> list:
+    """Publishes `count` messages to `queue` and returns them as delivered on `channel`."""
+    received = []
+
+    async def collect(message) -> None:
+        received.append(message)
+
+    declared = await channel.declare_queue(queue)
+    await declared.bind("events.topic", routing_key="#")
+    tag = await declared.consume(collect)
+    for seq in range(count):
+        broker.publish("events.topic", ROUTING_KEY, _body(seq))
+    await _eventually(lambda: len(received) == count)
+    await declared.cancel(tag)
+    return received
+
+
+@pytest.mark.asyncio
+async def test_ack_window_acks_only_the_settled_prefix_in_one_frame() -> None:
+    broker = MemoryBroker()
+    channel = broker.channel()
+    first, second, third = await _received(broker, channel, "q", 3)
+    window = _AckWindow(every=3, interval=60)
+    for message in (first, second, third):
+        window.track(message)
+
+    await window.done(third)
+    await window.done(second, ack=False)  # rejected individually elsewhere
+    assert window.frames == 0 and len(window) == 3
+
+    await window.done(first)
+    await window.flush()
+    await _eventually(lambda: not channel._unacked)
+    assert (window.frames, window.acked, channel.ack_frames) == (1, 2, 1)
+    assert window.idle.is_set() and not channel.errors
+
+
+@pytest.mark.asyncio
+async def test_ack_window_drops_the_old_window_when_tags_restart() -> None:
+    broker = MemoryBroker()
+    old_channel, new_channel = broker.channel(), broker.channel()
+    stale = await _received(broker, old_channel, "old", 2)
+    (fresh,) = await _received(broker, new_channel, "new", 1)
+    window = _AckWindow(every=1, interval=60)
+    for message in stale:
+        window.track(message)
+
+    window.track(fresh)  # tag 1 again: the channel was reopened
+    for message in stale:
+        await window.done(message)
+    assert window.frames == 0 and old_channel.ack_frames == 0
+
+    await window.done(fresh)
+    await _eventually(lambda: not new_channel._unacked)
+    assert (window.frames, window.acked) == (1, 1)
+    assert not new_channel.errors
+
+
+def test_dedupe_window_expires_keys_after_the_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 100.0
+    monkeypatch.setattr(consumer_module.time, "monotonic", lambda: now)
+    window = DedupeWindow(size=10, ttl=5)
+
+    assert window.add("a") and not window.add("a")
+    now = 104.0
+    assert window.add("b") and not window.add("a")
+    now = 105.0
+    assert window.add("a")  # "a" is 5s old and expired; "b" is still remembered
+    assert not window.add("b") and len(window) == 2
+
+
+def test_dedupe_window_evicts_the_oldest_key_beyond_its_size() -> None:
+    window = DedupeWindow(size=2, ttl=None)
+    for key in ("a", "b", "c"):
+        assert window.add(key)
+    assert len(window) == 2
+    assert not window.add("c") and not window.add("b")
+    assert window.add("a")
+
+    window.discard("a")
+    assert window.add("a")
+
+
+@pytest.mark.asyncio
+async def test_a_failing_handler_is_requeued_once_then_dead_lettered() -> None:
+    broker = MemoryBroker()
+    channel = broker.channel()
+    consumer = EventConsumer(channel, "entries", prefetch=8)  # type: ignore[arg-type]
+    seen: list[bool] = []
+
+    @consumer.handler("knowledge_base.entry.*")
+    async def ingest(delivery: Delivery) -> None:
+        seen.append(delivery.redelivered)
+        raise RuntimeError("boom")
+
+    await consumer.start()
+    broker.publish("events.topic", ROUTING_KEY, _body(1))
+    await _eventually(lambda: broker.depth("entries.dead_letter") == 1)
+    await consumer.stop()
+
+    assert seen == [False, True]  # the redelivery is not skipped as a duplicate
+    (handler,) = consumer.stats().handlers
+    assert (handler.failures, handler.requeued, handler.dead_lettered) == (2, 1, 1)
+    assert broker.depth("entries") == 0 and not channel.errors
+
+
+@pytest.mark.asyncio
+async def test_a_partial_batch_is_flushed_after_the_linger() -> None:
+    broker = MemoryBroker()
+    channel = broker.channel()
+    consumer = EventConsumer(channel, "entries", ack_interval=0.01)  # type: ignore[arg-type]
+    batches: list[list[int]] = []
+
+    @consumer.batch_handler("knowledge_base.entry.*", size=10, linger=0.02)
+    async def ingest(deliveries: list[Delivery]) -> None:
+        batches.append([delivery.envelope["seq"] for delivery in deliveries])
+
+    await consumer.start()
+    for seq in range(3):
+        broker.publish("events.topic", ROUTING_KEY, _body(seq))
+    await asyncio.sleep(0.005)
+    assert batches == []  # below `size`, still lingering
+
+    await _eventually(lambda: consumer.stats().acked == 3)
+    await consumer.stop()
+    assert batches == [[0, 1, 2]]
+    assert channel.ack_frames == 1 and not channel.errors
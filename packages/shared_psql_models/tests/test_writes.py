@@ -0,0 +1,21 @@
+from sqlalchemy.dialects import postgresql
+
+from shared_psql_models.writes import _instance_with_knowledge_base
+
+
+def _postgres_sql(statement) -> str:
+    return " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
+
+
+def test_instance_and_knowledge_base_are_created_by_one_cte_statement() -> None:
+    sql = _postgres_sql(_instance_with_knowledge_base({"user_id": 7, "bot_id": 3, "title": "Bot"}))
+
+    assert sql.startswith("WITH new_instance AS (INSERT INTO instances (")
+    assert "RETURNING instances.id," in sql
+    assert (
+        "new_knowledge_base AS (INSERT INTO knowledge_bases (instance_id) "
+        "SELECT new_instance.id AS id FROM new_instance "
+        "RETURNING knowledge_bases.id AS knowledge_base_id)"
+    ) in sql
+    assert sql.endswith("new_knowledge_base.knowledge_base_id FROM new_instance, new_knowledge_base")
+    assert sql.count("INSERT INTO") == 2
@@ -0,0 +1,121 @@
+"""domain events outbox
+
+Revision ID: 20261018_01_outbox
+Revises: 20251205_02_instances
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "20261018_01_outbox"
+down_revision: str | None = "20251205_02_instances"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+LISTEN_CHANNEL = "instances_notify"
+OUTBOX_CHANNEL = "domain_events_outbox"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "domain_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("routing_key", sa.String(length=120), nullable=False),
+        sa.Column("table_name", sa.String(length=63), nullable=False),
+        sa.Column("op", sa.String(length=16), nullable=False),
+        sa.Column("schema_version", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("payload", sa.dialects.postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        "domain_events_archive",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("routing_key", sa.String(length=120), nullable=False),
+        sa.Column("table_name", sa.String(length=63), nullable=False),
+        sa.Column("op", sa.String(length=16), nullable=False),
+        sa.Column("schema_version", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.dialects.postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("published_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    # `botberi.event_transport` is a database-level setting:
+    #   ALTER DATABASE <db> SET botberi.event_transport = 'outbox';
+    # Unset (or 'notify') keeps the original pg_notify behaviour.
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            payload jsonb;
+        BEGIN
+            IF (TG_OP = 'DELETE') THEN
+                row_data := row_to_json(OLD)::jsonb;
+            ELSE
+                row_data := row_to_json(NEW)::jsonb;
+            END IF;
+
+            IF COALESCE(NULLIF(current_setting('botberi.event_transport', true), ''), 'notify') = 'outbox' THEN
+                INSERT INTO domain_events (routing_key, table_name, op, schema_version, payload)
+                VALUES (TG_ARGV[0], TG_TABLE_NAME, TG_OP, 1, row_data);
+                -- Wake-up hint only; identical notifications are folded per transaction.
+                PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+            ELSE
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1,
+                    'data', row_data
+                );
+
+                PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+            END IF;
+
+            IF (TG_OP = 'DELETE') THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            payload jsonb;
+        BEGIN
+            IF (TG_OP = 'DELETE') THEN
+                row_data := row_to_json(OLD)::jsonb;
+            ELSE
+                row_data := row_to_json(NEW)::jsonb;
+            END IF;
+
+            payload := jsonb_build_object(
+                'routing_key', TG_ARGV[0],
+                'table', TG_TABLE_NAME,
+                'op', TG_OP,
+                'schema_version', 1,
+                'data', row_data
+            );
+
+            PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+
+            IF (TG_OP = 'DELETE') THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.drop_table("domain_events_archive")
+    op.drop_table("domain_events")
@@ -0,0 +1,89 @@
+"""logical replication publication for domain events
+
+Revision ID: 20261018_02_replication
+Revises: 20261018_01_outbox
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "20261018_02_replication"
+down_revision: str | None = "20261018_01_outbox"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+LISTEN_CHANNEL = "instances_notify"
+OUTBOX_CHANNEL = "domain_events_outbox"
+PUBLICATION = "botberi_domain_events"
+TABLES = ("instances", "knowledge_bases", "knowledge_base_entries")
+
+
+def _notify_function(replication_branch: bool) -> str:
+    # With botberi.event_transport = 'replication' the trigger returns before building
+    # the row JSON, so the only remaining per-row cost is the plpgsql call itself.
+    early_return = (
+        """
+            IF transport = 'replication' THEN
+                IF (TG_OP = 'DELETE') THEN
+                    RETURN OLD;
+                END IF;
+                RETURN NEW;
+            END IF;
+        """
+        if replication_branch
+        else ""
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            payload jsonb;
+            transport text := COALESCE(NULLIF(current_setting('botberi.event_transport', true), ''), 'notify');
+        BEGIN
+            {early_return}
+            IF (TG_OP = 'DELETE') THEN
+                row_data := row_to_json(OLD)::jsonb;
+            ELSE
+                row_data := row_to_json(NEW)::jsonb;
+            END IF;
+
+            IF transport = 'outbox' THEN
+                INSERT INTO domain_events (routing_key, table_name, op, schema_version, payload)
+                VALUES (TG_ARGV[0], TG_TABLE_NAME, TG_OP, 1, row_data);
+                PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+            ELSE
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1,
+                    'data', row_data
+                );
+
+                PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+            END IF;
+
+            IF (TG_OP = 'DELETE') THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def upgrade() -> None:
+    # Full old rows in WAL so delete events keep the same payload as the trigger envelope.
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} REPLICA IDENTITY FULL;")
+    op.execute(f"CREATE PUBLICATION {PUBLICATION} FOR TABLE {', '.join(TABLES)};")
+    op.execute(_notify_function(replication_branch=True))
+
+
+def downgrade() -> None:
+    op.execute(_notify_function(replication_branch=False))
+    op.execute(f"DROP PUBLICATION IF EXISTS {PUBLICATION};")
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} REPLICA IDENTITY DEFAULT;")
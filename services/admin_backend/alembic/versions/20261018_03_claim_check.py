@@ -0,0 +1,106 @@
+"""claim-check NOTIFY payloads for domain events
+
+Revision ID: 20261018_03_claim_check
+Revises: 20261018_02_replication
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "20261018_03_claim_check"
+down_revision: str | None = "20261018_02_replication"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+LISTEN_CHANNEL = "instances_notify"
+OUTBOX_CHANNEL = "domain_events_outbox"
+# Large JSONB columns left out of delete tombstones; the key and timestamps are enough.
+TOMBSTONE_EXCLUDED = ("content", "user_config", "pipeline_config")
+
+
+def _notify_function(claim_check_branch: bool) -> str:
+    # With botberi.event_transport = 'claim_check' the NOTIFY only carries table/op/id and
+    # the bridge loads the rows in bulk, keeping payloads far below the 8000-byte limit.
+    tombstone = " - ".join(["to_jsonb(OLD)", *(f"'{column}'" for column in TOMBSTONE_EXCLUDED)])
+    claim_check = (
+        f"""
+            IF transport = 'claim_check' THEN
+                IF (TG_OP = 'DELETE') THEN
+                    payload := jsonb_build_object(
+                        'routing_key', TG_ARGV[0],
+                        'table', TG_TABLE_NAME,
+                        'op', TG_OP,
+                        'schema_version', 1,
+                        'id', OLD.id,
+                        'tombstone', {tombstone}
+                    );
+                    PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+                    RETURN OLD;
+                END IF;
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1,
+                    'id', NEW.id
+                );
+                PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+                RETURN NEW;
+            END IF;
+        """
+        if claim_check_branch
+        else ""
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            payload jsonb;
+            transport text := COALESCE(NULLIF(current_setting('botberi.event_transport', true), ''), 'notify');
+        BEGIN
+            IF transport = 'replication' THEN
+                IF (TG_OP = 'DELETE') THEN
+                    RETURN OLD;
+                END IF;
+                RETURN NEW;
+            END IF;
+            {claim_check}
+            IF (TG_OP = 'DELETE') THEN
+                row_data := row_to_json(OLD)::jsonb;
+            ELSE
+                row_data := row_to_json(NEW)::jsonb;
+            END IF;
+
+            IF transport = 'outbox' THEN
+                INSERT INTO domain_events (routing_key, table_name, op, schema_version, payload)
+                VALUES (TG_ARGV[0], TG_TABLE_NAME, TG_OP, 1, row_data);
+                PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+            ELSE
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1,
+                    'data', row_data
+                );
+
+                PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+            END IF;
+
+            IF (TG_OP = 'DELETE') THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def upgrade() -> None:
+    op.execute(_notify_function(claim_check_branch=True))
+
+
+def downgrade() -> None:
+    op.execute(_notify_function(claim_check_branch=False))
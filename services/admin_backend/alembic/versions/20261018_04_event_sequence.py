@@ -0,0 +1,115 @@
+"""sequence-stamped NOTIFY events with a catch-up journal
+
+Revision ID: 20261018_04_event_sequence
+Revises: 20261018_03_claim_check
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "20261018_04_event_sequence"
+down_revision: str | None = "20261018_03_claim_check"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+LISTEN_CHANNEL = "instances_notify"
+OUTBOX_CHANNEL = "domain_events_outbox"
+SEQUENCE = "domain_event_seq"
+TOMBSTONE = "to_jsonb(OLD) - 'content' - 'user_config' - 'pipeline_config'"
+
+
+def _notify_function(journal: bool) -> str:
+    # NOTIFY-based transports stamp every envelope with `seq` (a shared sequence) and
+    # `emitted_at`, and keep a copy in `domain_event_log` so a reconnecting bridge can
+    # replay what it missed. The row is written in the same transaction as the change.
+    publish = (
+        f"""
+            payload := payload || jsonb_build_object(
+                'seq', nextval('{SEQUENCE}'),
+                'emitted_at', clock_timestamp()
+            );
+            INSERT INTO domain_event_log (seq, payload) VALUES ((payload->>'seq')::bigint, payload);
+            PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+        """
+        if journal
+        else f"PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);"
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event() RETURNS trigger AS $$
+        DECLARE
+            row_data jsonb;
+            payload jsonb;
+            transport text := COALESCE(NULLIF(current_setting('botberi.event_transport', true), ''), 'notify');
+        BEGIN
+            IF transport = 'replication' THEN
+                IF (TG_OP = 'DELETE') THEN
+                    RETURN OLD;
+                END IF;
+                RETURN NEW;
+            END IF;
+
+            IF transport = 'claim_check' THEN
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1
+                );
+                IF (TG_OP = 'DELETE') THEN
+                    payload := payload || jsonb_build_object('id', OLD.id, 'tombstone', {TOMBSTONE});
+                ELSE
+                    payload := payload || jsonb_build_object('id', NEW.id);
+                END IF;
+                {publish}
+            ELSE
+                IF (TG_OP = 'DELETE') THEN
+                    row_data := row_to_json(OLD)::jsonb;
+                ELSE
+                    row_data := row_to_json(NEW)::jsonb;
+                END IF;
+
+                IF transport = 'outbox' THEN
+                    INSERT INTO domain_events (routing_key, table_name, op, schema_version, payload)
+                    VALUES (TG_ARGV[0], TG_TABLE_NAME, TG_OP, 1, row_data);
+                    PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+                ELSE
+                    payload := jsonb_build_object(
+                        'routing_key', TG_ARGV[0],
+                        'table', TG_TABLE_NAME,
+                        'op', TG_OP,
+                        'schema_version', 1,
+                        'data', row_data
+                    );
+                    {publish}
+                END IF;
+            END IF;
+
+            IF (TG_OP = 'DELETE') THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def upgrade() -> None:
+    op.execute(f"CREATE SEQUENCE {SEQUENCE} AS bigint;")
+    op.create_table(
+        "domain_event_log",
+        sa.Column("seq", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("payload", sa.dialects.postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_domain_event_log_created_at", "domain_event_log", ["created_at"])
+    op.execute(_notify_function(journal=True))
+
+
+def downgrade() -> None:
+    op.execute(_notify_function(journal=False))
+    op.drop_index("ix_domain_event_log_created_at", table_name="domain_event_log")
+    op.drop_table("domain_event_log")
+    op.execute(f"DROP SEQUENCE IF EXISTS {SEQUENCE};")
@@ -0,0 +1,162 @@
+"""statement-level domain event triggers with transition tables
+
+Revision ID: 20261018_05_statement_triggers
+Revises: 20261018_04_event_sequence
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "20261018_05_statement_triggers"
+down_revision: str | None = "20261018_04_event_sequence"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+LISTEN_CHANNEL = "instances_notify"
+OUTBOX_CHANNEL = "domain_events_outbox"
+SEQUENCE = "domain_event_seq"
+TOMBSTONE_EXCLUDED = ("content", "user_config", "pipeline_config")
+# Rows per batch event; a session can override it with `SET botberi.event_batch_rows`.
+DEFAULT_BATCH_ROWS = 1000
+# Batches whose text fits under the 8000-byte NOTIFY limit carry their rows inline;
+# larger ones only carry `seq` and the bridge reads the rows from `domain_event_log`.
+INLINE_PAYLOAD_BYTES = 7900
+
+TRIGGERS = (
+    ("trg_instances_insert", "instances", "INSERT", "instance.created"),
+    ("trg_instances_update", "instances", "UPDATE", "instance.updated"),
+    ("trg_instances_delete", "instances", "DELETE", "instance.deleted"),
+    ("trg_kb_insert", "knowledge_bases", "INSERT", "knowledge_base.created"),
+    ("trg_kb_delete", "knowledge_bases", "DELETE", "knowledge_base.deleted"),
+    ("trg_kb_entry_insert", "knowledge_base_entries", "INSERT", "knowledge_base.entry.created"),
+    ("trg_kb_entry_update", "knowledge_base_entries", "UPDATE", "knowledge_base.entry.updated"),
+    ("trg_kb_entry_delete", "knowledge_base_entries", "DELETE", "knowledge_base.entry.deleted"),
+)
+
+
+def _batch_function() -> str:
+    # One invocation per statement and table. A cascade that deletes 10k entries becomes
+    # ceil(10k / batch rows) journal rows and NOTIFYs instead of 10k of each. Single-row
+    # statements still emit the per-row envelope of `notify_domain_event()`.
+    tombstone = " - ".join(["value", *(f"'{column}'" for column in TOMBSTONE_EXCLUDED)])
+    return f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event_batch() RETURNS trigger AS $$
+        DECLARE
+            transport text := COALESCE(NULLIF(current_setting('botberi.event_transport', true), ''), 'notify');
+            rows_per_batch int := COALESCE(
+                NULLIF(current_setting('botberi.event_batch_rows', true), '')::int, {DEFAULT_BATCH_ROWS}
+            );
+            changed jsonb;
+            chunk record;
+            payload jsonb;
+            full_payload jsonb;
+        BEGIN
+            IF transport = 'replication' THEN
+                RETURN NULL;
+            END IF;
+
+            IF (TG_OP = 'DELETE') THEN
+                SELECT jsonb_agg(to_jsonb(t)) INTO changed FROM old_rows t;
+            ELSE
+                SELECT jsonb_agg(to_jsonb(t)) INTO changed FROM new_rows t;
+            END IF;
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            IF transport = 'outbox' THEN
+                INSERT INTO domain_events (routing_key, table_name, op, schema_version, payload)
+                SELECT TG_ARGV[0], TG_TABLE_NAME, TG_OP, 1, value FROM jsonb_array_elements(changed);
+                PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+                RETURN NULL;
+            END IF;
+
+            IF transport = 'claim_check' THEN
+                IF (TG_OP = 'DELETE') THEN
+                    SELECT jsonb_agg({tombstone}) INTO changed FROM jsonb_array_elements(changed);
+                ELSE
+                    SELECT jsonb_agg(jsonb_build_object('id', value->'id')) INTO changed
+                    FROM jsonb_array_elements(changed);
+                END IF;
+            END IF;
+
+            IF jsonb_array_length(changed) = 1 THEN
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1,
+                    'seq', nextval('{SEQUENCE}'),
+                    'emitted_at', clock_timestamp()
+                );
+                IF transport = 'claim_check' THEN
+                    payload := payload || jsonb_build_object('id', changed->0->'id');
+                    IF (TG_OP = 'DELETE') THEN
+                        payload := payload || jsonb_build_object('tombstone', changed->0);
+                    END IF;
+                ELSE
+                    payload := payload || jsonb_build_object('data', changed->0);
+                END IF;
+                INSERT INTO domain_event_log (seq, payload) VALUES ((payload->>'seq')::bigint, payload);
+                PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+                RETURN NULL;
+            END IF;
+
+            FOR chunk IN
+                SELECT jsonb_agg(value ORDER BY ord) AS rows_json, count(*) AS size
+                FROM jsonb_array_elements(changed) WITH ORDINALITY AS e(value, ord)
+                GROUP BY (ord - 1) / rows_per_batch
+                ORDER BY min(ord)
+            LOOP
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', 1,
+                    'seq', nextval('{SEQUENCE}'),
+                    'emitted_at', clock_timestamp(),
+                    'batch', chunk.size,
+                    'claim_check', transport = 'claim_check'
+                );
+                full_payload := payload || jsonb_build_object('rows', chunk.rows_json);
+                INSERT INTO domain_event_log (seq, payload) VALUES ((payload->>'seq')::bigint, full_payload);
+                IF octet_length(full_payload::text) <= {INLINE_PAYLOAD_BYTES} THEN
+                    PERFORM pg_notify('{LISTEN_CHANNEL}', full_payload::text);
+                ELSE
+                    PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+                END IF;
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def upgrade() -> None:
+    op.execute(_batch_function())
+    for name, table, event, routing_key in TRIGGERS:
+        transition = "OLD TABLE AS old_rows" if event == "DELETE" else "NEW TABLE AS new_rows"
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table};")
+        op.execute(
+            f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON {table}
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_domain_event_batch('{routing_key}');
+            """
+        )
+
+
+def downgrade() -> None:
+    for name, table, event, routing_key in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table};")
+        op.execute(
+            f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_domain_event('{routing_key}');
+            """
+        )
+    op.execute("DROP FUNCTION IF EXISTS notify_domain_event_batch;")
@@ -0,0 +1,170 @@
+"""column-diff payloads for update events
+
+Revision ID: 20261018_06_update_diffs
+Revises: 20261018_05_statement_triggers
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "20261018_06_update_diffs"
+down_revision: str | None = "20261018_05_statement_triggers"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+LISTEN_CHANNEL = "instances_notify"
+OUTBOX_CHANNEL = "domain_events_outbox"
+SEQUENCE = "domain_event_seq"
+TOMBSTONE_EXCLUDED = ("content", "user_config", "pipeline_config")
+DEFAULT_BATCH_ROWS = 1000
+INLINE_PAYLOAD_BYTES = 7900
+# Kept in every diff besides the changed columns; see `app.messaging.diffs` in event_broker.
+DIFF_KEPT = ("id", "updated_at")
+DIFF_SCHEMA_VERSION = 2
+
+# `botberi.update_payload` is a database-level setting like `botberi.event_transport`:
+#   ALTER DATABASE <db> SET botberi.update_payload = 'full';
+# switches every update event back to full rows (e.g. while a consumer still needs them).
+UPDATE_TRIGGERS = (
+    ("trg_instances_update", "instances", "instance.updated"),
+    ("trg_kb_entry_update", "knowledge_base_entries", "knowledge_base.entry.updated"),
+)
+
+
+def _batch_function(diffs: bool) -> str:
+    # Same as `20261018_05_statement_triggers`, plus (with `diffs`) UPDATE rows reduced to
+    # the columns that changed, `id` and `updated_at`, tagged `schema_version` 2. Claim-check
+    # updates only carry `id` anyway, and `botberi.update_payload = 'full'` restores full rows.
+    tombstone = " - ".join(["value", *(f"'{column}'" for column in TOMBSTONE_EXCLUDED)])
+    update_rows = (
+        f"""
+            ELSIF TG_OP = 'UPDATE' AND update_payload = 'diff' AND transport <> 'claim_check' THEN
+                SELECT jsonb_agg((
+                    SELECT jsonb_object_agg(col.key, col.value)
+                    FROM jsonb_each(to_jsonb(n)) AS col
+                    WHERE col.key IN ({", ".join(f"'{column}'" for column in DIFF_KEPT)})
+                       OR col.value IS DISTINCT FROM to_jsonb(o) -> col.key
+                )) INTO changed
+                FROM new_rows n JOIN old_rows o ON o.id = n.id;
+                payload_version := {DIFF_SCHEMA_VERSION};"""
+        if diffs
+        else ""
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION notify_domain_event_batch() RETURNS trigger AS $$
+        DECLARE
+            transport text := COALESCE(NULLIF(current_setting('botberi.event_transport', true), ''), 'notify');
+            rows_per_batch int := COALESCE(
+                NULLIF(current_setting('botberi.event_batch_rows', true), '')::int, {DEFAULT_BATCH_ROWS}
+            );
+            update_payload text := COALESCE(NULLIF(current_setting('botberi.update_payload', true), ''), 'diff');
+            payload_version int := 1;
+            changed jsonb;
+            chunk record;
+            payload jsonb;
+            full_payload jsonb;
+        BEGIN
+            IF transport = 'replication' THEN
+                RETURN NULL;
+            END IF;
+
+            IF (TG_OP = 'DELETE') THEN
+                SELECT jsonb_agg(to_jsonb(t)) INTO changed FROM old_rows t;{update_rows}
+            ELSE
+                SELECT jsonb_agg(to_jsonb(t)) INTO changed FROM new_rows t;
+            END IF;
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            IF transport = 'outbox' THEN
+                INSERT INTO domain_events (routing_key, table_name, op, schema_version, payload)
+                SELECT TG_ARGV[0], TG_TABLE_NAME, TG_OP, payload_version, value FROM jsonb_array_elements(changed);
+                PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+                RETURN NULL;
+            END IF;
+
+            IF transport = 'claim_check' THEN
+                IF (TG_OP = 'DELETE') THEN
+                    SELECT jsonb_agg({tombstone}) INTO changed FROM jsonb_array_elements(changed);
+                ELSE
+                    SELECT jsonb_agg(jsonb_build_object('id', value->'id')) INTO changed
+                    FROM jsonb_array_elements(changed);
+                END IF;
+            END IF;
+
+            IF jsonb_array_length(changed) = 1 THEN
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', payload_version,
+                    'seq', nextval('{SEQUENCE}'),
+                    'emitted_at', clock_timestamp()
+                );
+                IF transport = 'claim_check' THEN
+                    payload := payload || jsonb_build_object('id', changed->0->'id');
+                    IF (TG_OP = 'DELETE') THEN
+                        payload := payload || jsonb_build_object('tombstone', changed->0);
+                    END IF;
+                ELSE
+                    payload := payload || jsonb_build_object('data', changed->0);
+                END IF;
+                INSERT INTO domain_event_log (seq, payload) VALUES ((payload->>'seq')::bigint, payload);
+                PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+                RETURN NULL;
+            END IF;
+
+            FOR chunk IN
+                SELECT jsonb_agg(value ORDER BY ord) AS rows_json, count(*) AS size
+                FROM jsonb_array_elements(changed) WITH ORDINALITY AS e(value, ord)
+                GROUP BY (ord - 1) / rows_per_batch
+                ORDER BY min(ord)
+            LOOP
+                payload := jsonb_build_object(
+                    'routing_key', TG_ARGV[0],
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'schema_version', payload_version,
+                    'seq', nextval('{SEQUENCE}'),
+                    'emitted_at', clock_timestamp(),
+                    'batch', chunk.size,
+                    'claim_check', transport = 'claim_check'
+                );
+                full_payload := payload || jsonb_build_object('rows', chunk.rows_json);
+                INSERT INTO domain_event_log (seq, payload) VALUES ((payload->>'seq')::bigint, full_payload);
+                IF octet_length(full_payload::text) <= {INLINE_PAYLOAD_BYTES} THEN
+                    PERFORM pg_notify('{LISTEN_CHANNEL}', full_payload::text);
+                ELSE
+                    PERFORM pg_notify('{LISTEN_CHANNEL}', payload::text);
+                END IF;
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def _update_triggers(transition: str) -> None:
+    for name, table, routing_key in UPDATE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table};")
+        op.execute(
+            f"""
+            CREATE TRIGGER {name}
+            AFTER UPDATE ON {table}
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_domain_event_batch('{routing_key}');
+            """
+        )
+
+
+def upgrade() -> None:
+    op.execute(_batch_function(diffs=True))
+    _update_triggers("OLD TABLE AS old_rows NEW TABLE AS new_rows")
+
+
+def downgrade() -> None:
+    op.execute(_batch_function(diffs=False))
+    _update_triggers("NEW TABLE AS new_rows")
@@ -0,0 +1,26 @@
+"""index for keyset pagination of a user's instances
+
+Revision ID: 20261018_07_instance_keyset_index
+Revises: 20261018_06_update_diffs
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "20261018_07_instance_keyset_index"
+down_revision: str | None = "20261018_06_update_diffs"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+INDEX = "ix_instances_user_id_id"
+
+
+def upgrade() -> None:
+    # `GET /instances` filters on `user_id` and pages on `id > cursor ORDER BY id`.
+    op.create_index(INDEX, "instances", ["user_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name="instances")
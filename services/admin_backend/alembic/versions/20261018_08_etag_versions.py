@@ -0,0 +1,34 @@
+"""timestamps on agents and an index for entry versions
+
+Revision ID: 20261018_08_etag_versions
+Revises: 20261018_07_instance_keyset_index
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "20261018_08_etag_versions"
+down_revision: str | None = "20261018_07_instance_keyset_index"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+ENTRY_INDEX = "ix_knowledge_base_entries_knowledge_base_id_updated_at"
+
+
+def upgrade() -> None:
+    # ETags are `count(*)`, `max(updated_at)` aggregates; agents had no `updated_at` yet.
+    for column in ("created_at", "updated_at"):
+        op.add_column(
+            "agents",
+            sa.Column(column, sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+    op.create_index(ENTRY_INDEX, "knowledge_base_entries", ["knowledge_base_id", "updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index(ENTRY_INDEX, table_name="knowledge_base_entries")
+    op.drop_column("agents", "updated_at")
+    op.drop_column("agents", "created_at")
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
 from app.crud import agents as agents_crud
 from app.schemas import AgentCreate, AgentOut, AgentUpdate
+from shared_psql_models.etags import not_modified, versioned
+from shared_psql_models.models import Agent
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
 
 @router.get("", response_model=list[AgentOut])
-async def list_agents(db: AsyncSession = Depends(get_db)) -> list[AgentOut]:
+async def list_agents(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+) -> list[AgentOut] | Response:
+    unchanged = await not_modified(request, response, db, versioned(Agent))
+    if unchanged is not None:
+        return unchanged
     agents = await agents_crud.list_agents(db)
     return [AgentOut.model_validate(agent) for agent in agents]
 
@@ -27,7 +36,15 @@ async def create_agent(payload: AgentCreate, db: AsyncSession = Depends(get_db))
 
 
 @router.get("/{agent_id}", response_model=AgentOut)
-async def get_agent(agent_id: int, db: AsyncSession = Depends(get_db)) -> AgentOut:
+async def get_agent(
+    agent_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+) -> AgentOut | Response:
+    unchanged = await not_modified(request, response, db, versioned(Agent, Agent.id == agent_id))
+    if unchanged is not None:
+        return unchanged
     agent = await agents_crud.get_agent(db, agent_id)
     if not agent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
@@ -36,17 +53,16 @@ async def get_agent(agent_id: int, db: AsyncSession = Depends(get_db)) -> AgentO
 
 @router.patch("/{agent_id}", response_model=AgentOut)
 async def update_agent(agent_id: int, payload: AgentUpdate, db: AsyncSession = Depends(get_db)) -> AgentOut:
-    agent = await agents_crud.get_agent(db, agent_id)
-    if not agent:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
     updated = await agents_crud.update_agent(
         db,
-        agent,
+        agent_id,
         title=payload.title,
         content=payload.content,
         activation_code=payload.activation_code,
         rate=payload.rate,
     )
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
     return AgentOut.model_validate(updated)
 
 
@@ -2,6 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared_psql_models.models import Agent
+from shared_psql_models.writes import insert_returning, update_returning
 
 
 async def list_agents(db: AsyncSession) -> list[Agent]:
@@ -22,38 +23,35 @@ async def create_agent(
     activation_code: str,
     rate: int,
 ) -> Agent:
-    agent = Agent(
+    agent = await insert_returning(
+        db,
+        Agent,
         title=title,
         content=content,
         activation_code=activation_code,
         rate=rate,
     )
-    db.add(agent)
     await db.commit()
-    await db.refresh(agent)
     return agent
 
 
 async def update_agent(
     db: AsyncSession,
-    agent: Agent,
+    agent_id: int,
     *,
     title: str | None = None,
     content: dict | None = None,
     activation_code: str | None = None,
     rate: int | None = None,
-) -> Agent:
-    if title is not None:
-        agent.title = title
-    if content is not None:
-        agent.content = content
-    if activation_code is not None:
-        agent.activation_code = activation_code
-    if rate is not None:
-        agent.rate = rate
-
+) -> Agent | None:
+    """Applies the given fields with one `UPDATE ... RETURNING`; None if the agent is missing."""
+    fields = {"title": title, "content": content, "activation_code": activation_code, "rate": rate}
+    values = {name: value for name, value in fields.items() if value is not None}
+    if not values:
+        return await get_agent(db, agent_id)
+
+    agent = await update_returning(db, Agent, Agent.id == agent_id, **values)
     await db.commit()
-    await db.refresh(agent)
     return agent
 
 
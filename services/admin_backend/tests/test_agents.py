@@ -2,7 +2,7 @@ import pytest
 
 
 @pytest.mark.asyncio
-async def test_agent_crud_flow(client):
+async def test_agent_crud_flow(client, statements):
     create_payload = {
         "title": "My Agent",
         "content": {"description": "demo"},
@@ -11,6 +11,7 @@ async def test_agent_crud_flow(client):
     }
     create_resp = await client.post("/api/v1/agents", json=create_payload)
     assert create_resp.status_code == 201
+    assert statements == ["INSERT"]
     agent = create_resp.json()
     agent_id = agent["id"]
     assert agent["title"] == create_payload["title"]
@@ -18,16 +19,24 @@ async def test_agent_crud_flow(client):
     list_resp = await client.get("/api/v1/agents")
     assert list_resp.status_code == 200
     assert len(list_resp.json()) == 1
+    list_etag = list_resp.headers["ETag"]
 
     detail_resp = await client.get(f"/api/v1/agents/{agent_id}")
     assert detail_resp.status_code == 200
     assert detail_resp.json()["activation_code"] == "ACT123"
+    etag = detail_resp.headers["ETag"]
+    statements.clear()
+    cached_resp = await client.get(f"/api/v1/agents/{agent_id}", headers={"If-None-Match": etag})
+    assert cached_resp.status_code == 304
+    assert statements == ["SELECT"]
 
+    statements.clear()
     update_resp = await client.patch(
         f"/api/v1/agents/{agent_id}",
         json={"title": "Updated", "rate": 9},
     )
     assert update_resp.status_code == 200
+    assert statements == ["UPDATE"]
     assert update_resp.json()["title"] == "Updated"
     assert update_resp.json()["rate"] == 9
 
@@ -36,5 +45,7 @@ async def test_agent_crud_flow(client):
 
     missing_resp = await client.get(f"/api/v1/agents/{agent_id}")
     assert missing_resp.status_code == 404
+    relisted = await client.get("/api/v1/agents", headers={"If-None-Match": list_etag})
+    assert relisted.status_code == 200 and relisted.headers["ETag"] != list_etag
 
 
@@ -0,0 +1,10 @@
+from fastapi import Request
+
+from app.messaging.bridge import EventBridge
+
+
+def get_bridge(request: Request) -> EventBridge:
+    return request.app.state.bridge
+
+
+__all__ = ["get_bridge"]
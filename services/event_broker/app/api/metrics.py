@@ -0,0 +1,39 @@
+from wsgiref.simple_server import WSGIServer
+
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, start_http_server
+
+from app.api.deps import get_bridge
+from app.messaging.bridge import EventBridge
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(bridge: EventBridge = Depends(get_bridge)) -> Response:
+    """Prometheus exposition of the bridge metrics of whichever worker answers.
+
+    Only meaningful with a single worker; with more, scrape the per-worker ports
+    (`serve_worker_metrics`).
+    """
+    return Response(generate_latest(bridge.metrics.registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def serve_worker_metrics(
+    registry: CollectorRegistry, first_port: int, span: int
+) -> tuple[WSGIServer, int]:
+    """Serves `registry` on the first free port of `[first_port, first_port + span)`.
+
+    uvicorn workers share the API port, so a scrape of `/metrics` reaches a random
+    worker. A port per worker gives Prometheus one stable target per bridge instead.
+    """
+    for port in range(first_port, first_port + span):
+        try:
+            server, _ = start_http_server(port, registry=registry)
+        except OSError:
+            continue
+        return server, port
+    raise RuntimeError(f"no free metrics port in {first_port}-{first_port + span - 1}")
+
+
+__all__ = ["router", "serve_worker_metrics"]
@@ -1,5 +1,3 @@
-from . import health
-
-__all__ = ["health"]
-
+from . import bridge, health
 
+__all__ = ["health", "bridge"]
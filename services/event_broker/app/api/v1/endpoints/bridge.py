@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_bridge
+from app.messaging.bridge import EventBridge
+from app.schemas.bridge import (
+    BatchStatsOut,
+    BridgeStats,
+    CoalescerStatsOut,
+    PartitionStatsOut,
+    SequenceStatsOut,
+    SnapshotStatsOut,
+    SpoolStatsOut,
+    WorkQueueStatsOut,
+)
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=BridgeStats, summary="Work queue, coalescing, partition, sequence-lag, spool, batch and snapshot stats")
+async def bridge_stats(bridge: EventBridge = Depends(get_bridge)) -> BridgeStats:
+    partitions = bridge.partition_stats()
+    spool = bridge.spool_stats()
+    batches = bridge.batch_stats()
+    snapshot = bridge.snapshot_stats()
+    return BridgeStats(
+        work_queue=WorkQueueStatsOut.model_validate(bridge.stats()),
+        coalescer=CoalescerStatsOut.model_validate(bridge.coalescer_stats()),
+        partitions=PartitionStatsOut.model_validate(partitions) if partitions else None,
+        sequence=SequenceStatsOut.model_validate(bridge.sequence_stats()),
+        spool=SpoolStatsOut.model_validate(spool) if spool else None,
+        batches=BatchStatsOut.model_validate(batches) if batches else None,
+        snapshot=SnapshotStatsOut.model_validate(snapshot) if snapshot else None,
+    )
+
+
+__all__ = ["router"]
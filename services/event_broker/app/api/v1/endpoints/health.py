@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response, status
 
-from app.schemas.health import HealthResponse
+from app.api.deps import get_bridge
+from app.messaging.bridge import EventBridge
+from app.schemas.health import DeepHealthResponse, HealthResponse
 
 
 router = APIRouter()
@@ -11,3 +13,13 @@ async def healthcheck() -> HealthResponse:
     return HealthResponse(status="ok", detail="event_broker alive")
 
 
+@router.get(
+    "/deep",
+    response_model=DeepHealthResponse,
+    summary="Connection state, NOTIFY queue usage and lag; 503 when degraded",
+)
+async def deep_healthcheck(response: Response, bridge: EventBridge = Depends(get_bridge)) -> DeepHealthResponse:
+    health = bridge.health()
+    if not health.healthy:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return DeepHealthResponse.model_validate(health)
@@ -0,0 +1,30 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_bridge
+from app.messaging.bridge import EventBridge
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="Stream the compacted latest-state snapshot as NDJSON, ending with a handoff line",
+    response_class=StreamingResponse,
+)
+async def bootstrap_snapshot(
+    prefix: str = Query("", description="Aggregate key prefix, e.g. `instances:`"),
+    include_tombstones: bool = Query(False, description="Also stream deleted aggregates"),
+    bridge: EventBridge = Depends(get_bridge),
+) -> StreamingResponse:
+    store = bridge.snapshot
+    if store is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot store is disabled")
+    await asyncio.to_thread(store.flush)
+    lines = store.bootstrap(prefix=prefix, include_tombstones=include_tombstones)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+__all__ = ["router"]
@@ -1,10 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import health
+from app.api.v1.endpoints import bridge, health, snapshot
 
 api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
+api_router.include_router(bridge.router, prefix="/bridge", tags=["bridge"])
+api_router.include_router(snapshot.router, prefix="/snapshot", tags=["snapshot"])
 
 __all__ = ["api_router"]
-
-
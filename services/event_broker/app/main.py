@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.api import metrics
 from app.api.v1.routes import api_router
 from app.core.config import get_settings
 from app.messaging.bridge import EventBridge
@@ -14,7 +15,16 @@ bridge = EventBridge(settings=settings)
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await bridge.connect()
+    metrics_server = None
+    if settings.metrics_port:
+        metrics_server, port = metrics.serve_worker_metrics(
+            bridge.metrics.registry, settings.metrics_port, settings.metrics_port_span
+        )
+        print(f"[event_broker] serving metrics on :{port}")
     yield
+    if metrics_server is not None:
+        metrics_server.shutdown()
+        metrics_server.server_close()
     await bridge.disconnect()
 
 
@@ -25,6 +35,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.state.bridge = bridge
 app.include_router(api_router, prefix=settings.api_v1_prefix)
+app.include_router(metrics.router)
 
 
@@ -0,0 +1,118 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import asyncpg
+
+from app.messaging.hydrator import fetch_rows
+
+# Batches too large for an inline NOTIFY leave their rows in the journal
+# (migration `20261018_05_statement_triggers`).
+BATCH_ROWS_SQL = "SELECT (payload->'rows')::text FROM domain_event_log WHERE seq = $1"
+
+BATCH_MODES = ("fanout", "forward")
+BATCH_ROUTING_SUFFIX = ".batch"
+_HEAD_FIELDS = ("routing_key", "table", "op", "schema_version", "seq", "emitted_at")
+
+
+@dataclass(slots=True)
+class BatchStats:
+    mode: str
+    batches: int
+    rows: int
+    loaded: int
+    missing: int
+
+
+def is_batch(envelope: dict[str, Any]) -> bool:
+    return "batch" in envelope and "data" not in envelope
+
+
+def fan_out(envelope: dict[str, Any], rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Per-row envelopes for a statement batch, shaped like the row trigger's.
+
+    Rows share the batch `seq`; `batch_index` tells them apart, so consumers that
+    deduplicate should key on `(seq, batch_index)`.
+    """
+    head = {key: envelope[key] for key in _HEAD_FIELDS if key in envelope}
+    head["batch_size"] = len(rows)
+    events = []
+    for index, row in enumerate(rows):
+        event = {**head, "batch_index": index}
+        if envelope.get("claim_check"):
+            event["id"] = row["id"]
+            if envelope["op"] == "DELETE":
+                event["tombstone"] = row
+        else:
+            event["data"] = row
+        events.append(event)
+    return events
+
+
+class BatchExpander:
+    """Resolves the rows of statement-level batch events.
+
+    Small batches carry `rows` inline; larger ones are read back from `domain_event_log`
+    by `seq`. `forward_body` builds the single `<routing_key>.batch` message used by
+    `STATEMENT_BATCH_MODE=forward`, hydrating claim-check rows in one query.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, *, mode: str = "fanout"):
+        if mode not in BATCH_MODES:
+            raise ValueError(f"unknown statement batch mode {mode!r}; expected one of {BATCH_MODES}")
+        self._pool = pool
+        self.mode = mode
+        self.batches = 0
+        self.rows_seen = 0
+        self.loaded = 0
+        self.missing = 0
+
+    @property
+    def forward(self) -> bool:
+        return self.mode == "forward"
+
+    async def rows(self, envelope: dict[str, Any]) -> list[dict[str, Any]] | None:
+        self.batches += 1
+        rows = envelope.get("rows")
+        if rows is None:
+            async with self._pool.acquire() as conn:
+                text = await conn.fetchval(BATCH_ROWS_SQL, envelope.get("seq"))
+            if text is None:
+                # Pruned or never committed; catch-up cannot help either.
+                print(f"[event_broker] batch seq={envelope.get('seq')} not found in domain_event_log")
+                self.missing += 1
+                return None
+            rows = json.loads(text)
+            self.loaded += 1
+        self.rows_seen += len(rows)
+        return rows
+
+    async def forward_body(self, envelope: dict[str, Any], rows: list[dict[str, Any]]) -> dict[str, Any]:
+        body = {key: envelope[key] for key in _HEAD_FIELDS if key in envelope}
+        body["routing_key"] = envelope["routing_key"] + BATCH_ROUTING_SUFFIX
+        body["batch_size"] = len(rows)
+        if envelope.get("claim_check") and envelope["op"] != "DELETE":
+            async with self._pool.acquire() as conn:
+                loaded = await fetch_rows(conn, envelope["table"], [row["id"] for row in rows])
+            rows = [json.loads(loaded[row["id"]]) for row in rows if row["id"] in loaded]
+        body["rows"] = rows
+        return body
+
+    def stats(self) -> BatchStats:
+        return BatchStats(
+            mode=self.mode,
+            batches=self.batches,
+            rows=self.rows_seen,
+            loaded=self.loaded,
+            missing=self.missing,
+        )
+
+
+__all__ = [
+    "BATCH_MODES",
+    "BATCH_ROUTING_SUFFIX",
+    "BatchExpander",
+    "BatchStats",
+    "fan_out",
+    "is_batch",
+]
@@ -1,12 +1,62 @@
 import asyncio
 import json
+import time
 from typing import Any
 
 import aio_pika
 import asyncpg
-from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+from redis.asyncio import Redis
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from app.core.config import Settings
+from app.messaging.batches import BatchExpander, BatchStats, fan_out, is_batch
+from app.messaging.codecs import Encoded, EventCodec, scan_routing_key, scan_seq
+from app.messaging.coalescer import Coalescer, CoalescerStats
+from app.messaging.diffs import FullRowRoutes, full_row_claim
+from app.messaging.hydrator import Hydrator, is_claim_check
+from app.messaging.journal import EventJournal, SequenceStats, SequenceTracker
+from app.messaging.lanes import LaneRouter
+from app.messaging.metrics import (
+    NOTIFY_QUEUE_USAGE_SQL,
+    BridgeCollector,
+    BridgeHealth,
+    BridgeMetrics,
+)
+from app.messaging.outbox import OutboxDrainer
+from app.messaging.partitions import PartitionCoordinator, PartitionStats
+from app.messaging.publisher import BatchPublisher, BatchResult, PublishOutcome
+from app.messaging.replication import ReplicationSource, SlotChangeFeed
+from app.messaging.snapshot import SnapshotStats, SnapshotStore, maintain_periodically
+from app.messaging.spool import (
+    DiskSpool,
+    SpoolFull,
+    SpoolStats,
+    open_worker_spool,
+    sync_periodically,
+)
+from app.messaging.transports import (
+    RABBITMQ,
+    REDIS_STREAMS,
+    RabbitMqTransport,
+    RedisStreamsTransport,
+    Transport,
+    TransportRouter,
+)
+from app.messaging.work_queue import OverflowPolicy, WorkQueue, WorkQueueStats
+
+
+class _Rejected(Exception):
+    """A transport rejected an unbatched publish for good (nack, Redis error reply)."""
+
+
+# Final answers from a broker: resending would be rejected again, so they are never spooled.
+_REJECTIONS = (*RabbitMqTransport.rejections, *RedisStreamsTransport.rejections, _Rejected)
 
 
 class EventBridge:
@@ -18,73 +68,828 @@ class EventBridge:
         self._rmq_conn: aio_pika.RobustConnection | None = None
         self._channel: aio_pika.Channel | None = None
         self._listen_task: asyncio.Task[Any] | None = None
+        self._outbox: OutboxDrainer | None = None
+        self._replication: ReplicationSource | None = None
+        self._pg_pool: asyncpg.Pool | None = None
+        self._hydrator: Hydrator | None = None
+        self._batches: BatchExpander | None = None
+        self._lock_conn: asyncpg.Connection | None = None
+        self._partitions: PartitionCoordinator | None = None
+        self._partition_task: asyncio.Task[Any] | None = None
+        self._owned_partitions: frozenset[int] = frozenset()
+        self._handover_pending: set[int] = set()
+        self._handover_tasks: set[asyncio.Task[Any]] = set()
+        self._supervisor_task: asyncio.Task[Any] | None = None
+        self._feed: SlotChangeFeed | None = None
+        self._pg_dsn = ""
+        self._pg_lost = asyncio.Event()
+        self._journal: EventJournal | None = None
+        self._journal_warned = False
+        self._sequence = SequenceTracker(gap_ttl=self._settings.sequence_gap_ttl_seconds)
+        self._spool: DiskSpool | None = None
+        self._spool_tasks: list[asyncio.Task[Any]] = []
+        self._spool_ready = asyncio.Event()
+        self._broker_back = asyncio.Event()
+        self._broker_down = False
+        self._snapshot: SnapshotStore | None = None
+        self._snapshot_task: asyncio.Task[Any] | None = None
+        self._notify_usage_warned = False
+        self._metrics = BridgeMetrics()
+        self._metrics.registry.register(BridgeCollector(self, self._metrics))
+        self._codec = EventCodec(
+            settings.event_codec,
+            compression=settings.event_compression,
+            compress_min_bytes=settings.event_compress_min_bytes,
+            compress_level=settings.event_compress_level,
+        )
+        self._publisher: BatchPublisher | None = None
+        self._routes = TransportRouter(settings.transport_routes)
+        self._full_rows = FullRowRoutes(settings.full_row_routes)
+        self._streams: RedisStreamsTransport | None = None
+        # Publishers for every transport besides RabbitMQ; they batch in both publish modes.
+        self._transport_publishers: dict[str, BatchPublisher] = {}
+        self._lanes = LaneRouter.from_settings(
+            settings.priority_lanes,
+            settings.priority_lane_weights,
+            settings.priority_lane_message_priority,
+            settings.priority_lane_exchanges,
+        )
+        self._coalescer = Coalescer(
+            self._emit,
+            {key: ms / 1000 for key, ms in settings.coalesce_windows_ms.items()},
+        )
+        overflow = OverflowPolicy(settings.work_queue_overflow)
+        self._work_queue = WorkQueue(
+            self._dispatch,
+            maxsize=settings.work_queue_size,
+            workers=settings.work_queue_workers,
+            overflow=overflow,
+            spill_path=settings.work_queue_spill_path if overflow is OverflowPolicy.SPILL else None,
+            spill_max_bytes=settings.spool_max_bytes,
+            spill_fsync_interval=settings.spool_fsync_interval_ms / 1000,
+            router=self._lanes,
+        )
 
     async def connect(self) -> None:
         """Establish DB + broker connections."""
-        pg_dsn = self._settings.database_url.replace("postgresql+asyncpg", "postgresql", 1)
-        self._pg_conn = await asyncpg.connect(pg_dsn)
+        self._pg_dsn = self._settings.database_url.replace("postgresql+asyncpg", "postgresql", 1)
+        self._pg_conn = await self._open_pg()
+        if self._settings.partition_count > 0:
+            # Locks live on their own session so a busy LISTEN/drain connection never
+            # delays a rebalance, and losing it drops only ownership.
+            self._lock_conn = await asyncpg.connect(self._pg_dsn)
+            self._partitions = PartitionCoordinator(
+                self._lock_conn,
+                partitions=self._settings.partition_count,
+                namespace=self._settings.partition_lock_namespace,
+                rebalance_interval=self._settings.partition_rebalance_interval_ms / 1000,
+                on_change=self._on_partitions_changed,
+            )
+            await self._partitions.join()
+            self._partition_task = asyncio.create_task(self._partitions.run(), name="bridge-partitions")
         self._rmq_conn = await aio_pika.connect_robust(self._settings.rabbitmq_url)
         self._channel = await self._rmq_conn.channel()
-        await self._pg_conn.add_listener(self._settings.listen_channel, self._handle_notification)
-        self._listen_task = asyncio.create_task(self._idle_ping(), name="bridge-ping")
+        if self._settings.publish_mode == "batched":
+            self._publisher = self._batch_publisher(
+                RabbitMqTransport(
+                    self._channel,
+                    self._settings.outgoing_exchange,
+                    extra_exchanges={
+                        lane.exchange: aio_pika.ExchangeType.DIRECT
+                        for lane in self._lanes.lanes
+                        if lane.exchange
+                    },
+                    max_in_flight=self._settings.publish_max_in_flight,
+                )
+            )
+            await self._publisher.start()
+        if REDIS_STREAMS in self._routes.names:
+            self._streams = RedisStreamsTransport(
+                Redis.from_url(self._settings.redis_url),
+                stream_key=self._settings.redis_stream_key,
+                maxlen=self._settings.redis_stream_maxlen or None,
+                groups=self._settings.redis_stream_groups,
+            )
+            self._transport_publishers[REDIS_STREAMS] = self._batch_publisher(self._streams)
+            await self._transport_publishers[REDIS_STREAMS].start()
+        if self._settings.spool_enabled:
+            self._open_spool()
+        if self._settings.snapshot_enabled:
+            self._snapshot = SnapshotStore(
+                self._settings.snapshot_path,
+                tombstone_ttl=self._settings.snapshot_tombstone_ttl_minutes * 60,
+                flush_batch=self._settings.snapshot_flush_batch,
+                page_size=self._settings.snapshot_page_size,
+            )
+            self._snapshot_task = asyncio.create_task(
+                maintain_periodically(self._snapshot, self._settings.snapshot_flush_interval_ms / 1000),
+                name="bridge-snapshot",
+            )
+        await self._work_queue.start()
+        self._pg_pool = await asyncpg.create_pool(
+            self._pg_dsn, min_size=1, max_size=self._settings.hydrate_pool_size
+        )
+        self._hydrator = Hydrator(
+            self._pg_pool,
+            self._submit_notify,
+            window=self._settings.hydrate_window_ms / 1000,
+            max_batch=self._settings.hydrate_batch_size,
+        )
+        self._journal = EventJournal(
+            self._pg_pool, retention_minutes=self._settings.journal_retention_minutes
+        )
+        self._start_handover()
+        self._batches = BatchExpander(self._pg_pool, mode=self._settings.statement_batch_mode)
+        if self._settings.source_mode == "outbox":
+            self._outbox = OutboxDrainer(
+                self._pg_conn,
+                self._submit,
+                batch_size=self._settings.outbox_batch_size,
+                poll_interval=self._settings.outbox_poll_interval_ms / 1000,
+                archive=self._settings.outbox_archive,
+                partition_count=self._settings.partition_count,
+                partitions=(lambda: self._partitions.owned) if self._partitions else None,
+                # Clear of the partition keys (namespace, namespace + 1).
+                lock_namespace=self._settings.partition_lock_namespace + 2,
+            )
+            self._listen_task = asyncio.create_task(self._outbox.run(), name="bridge-outbox")
+        elif self._settings.source_mode == "replication":
+            self._feed = SlotChangeFeed(
+                self._pg_conn,
+                self._settings.replication_slot,
+                self._settings.replication_plugin,
+                self._settings.replication_publication,
+            )
+            await self._feed.ensure_slot()
+            self._replication = ReplicationSource(
+                self._feed,
+                self._submit,
+                plugin=self._settings.replication_plugin,
+                batch_size=self._settings.replication_batch_size,
+                poll_interval=self._settings.replication_poll_interval_ms / 1000,
+                active=(lambda: 0 in self._partitions.owned) if self._partitions else None,
+            )
+            self._listen_task = asyncio.create_task(self._replication.run(), name="bridge-replication")
+        else:
+            await self._sample_journal()
+            self._sequence.start_at(self._sequence.head)
+        await self._attach(self._pg_conn)
+        self._sequence.connected = True
+        self._supervisor_task = asyncio.create_task(self._supervise(), name="bridge-supervisor")
 
     async def disconnect(self) -> None:
+        if self._supervisor_task:
+            self._supervisor_task.cancel()
         if self._listen_task:
             self._listen_task.cancel()
+        if self._partition_task:
+            self._partition_task.cancel()
+        if self._partitions:
+            await self._partitions.close()
+        for task in self._handover_tasks:
+            task.cancel()
+        if self._lock_conn:
+            await self._lock_conn.close()
         if self._pg_conn:
             await self._pg_conn.close()
+        await self._work_queue.stop()
+        for task in self._spool_tasks:
+            task.cancel()
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+        await self._coalescer.close()
+        if self._hydrator:
+            await self._hydrator.close()
+        if self._pg_pool:
+            await self._pg_pool.close()
+        if self._publisher:
+            await self._publisher.close()
+        for publisher in self._transport_publishers.values():
+            await publisher.close()
+        if self._streams:
+            await self._streams.close()
+        if self._spool:
+            await asyncio.to_thread(self._spool.close)
+        if self._snapshot:
+            await asyncio.to_thread(self._snapshot.close)
         if self._channel:
             await self._channel.close()
         if self._rmq_conn:
             await self._rmq_conn.close()
 
-    async def _idle_ping(self) -> None:
-        """Keeps the event loop alive while waiting for NOTIFY callbacks."""
-        while True:
-            await asyncio.sleep(3600)
+    def stats(self) -> WorkQueueStats:
+        return self._work_queue.stats()
 
-    async def _handle_notification(self, *_: Any, payload: str) -> None:  # pragma: no cover - io heavy
-        if not self._channel:
-            return
-        await self._publish(payload)
+    def coalescer_stats(self) -> CoalescerStats:
+        return self._coalescer.stats()
 
-    async def _publish(self, payload: str) -> None:
-        assert self._channel is not None
+    def partition_stats(self) -> PartitionStats | None:
+        return self._partitions.stats() if self._partitions else None
+
+    def sequence_stats(self) -> SequenceStats:
+        return self._sequence.stats()
+
+    def spool_stats(self) -> SpoolStats | None:
+        return self._spool.stats() if self._spool else None
 
-        routing_key, message_body = self._prepare_message(payload)
-        if routing_key is None or message_body is None:
+    def batch_stats(self) -> BatchStats | None:
+        return self._batches.stats() if self._batches else None
+
+    def snapshot_stats(self) -> SnapshotStats | None:
+        return self._snapshot.stats() if self._snapshot else None
+
+    @property
+    def snapshot(self) -> SnapshotStore | None:
+        return self._snapshot
+
+    @property
+    def metrics(self) -> BridgeMetrics:
+        return self._metrics
+
+    def connection_state(self) -> dict[str, bool]:
+        """Open/closed per connection; `postgres_locks` only exists with partitioning."""
+        state = {
+            "postgres_listen": self._pg_conn is not None and not self._pg_conn.is_closed(),
+            "postgres_pool": self._pg_pool is not None and not self._pg_pool.is_closing(),
+            "rabbitmq": self._rmq_conn is not None and not self._rmq_conn.is_closed,
+            "rabbitmq_channel": self._channel is not None and not self._channel.is_closed,
+        }
+        if self._streams:
+            state["redis"] = self._streams.connected
+        if self._settings.partition_count > 0:
+            state["postgres_locks"] = self._lock_conn is not None and not self._lock_conn.is_closed()
+        return state
+
+    def health(self) -> BridgeHealth:
+        connections = self.connection_state()
+        usage = self._metrics.notify_queue_usage
+        spool = self.spool_stats()
+        return BridgeHealth(
+            healthy=all(connections.values())
+            and (usage is None or usage < self._settings.notify_queue_usage_alert),
+            connections=connections,
+            notification_queue_usage=usage,
+            seconds_since_last_notification=self._metrics.seconds_since_last_notification(),
+            sequence_lag_events=self._sequence.stats().lag_events,
+            spool_pending=spool.pending if spool else 0,
+            work_queue_depth=self._work_queue.stats().depth,
+        )
+
+    def _on_partitions_changed(self, owned: frozenset[int]) -> None:
+        gained = owned - self._owned_partitions
+        self._owned_partitions = owned
+        if self._outbox:
+            self._outbox.wake()
+        if gained and self._settings.source_mode == "notify":
+            # Nobody published these partitions' NOTIFYs while they were between owners.
+            self._handover_pending |= gained
+            self._start_handover()
+
+    def _start_handover(self) -> None:
+        if self._journal is None or not self._handover_pending:
+            return  # connect() calls this again once the journal exists
+        partitions, self._handover_pending = frozenset(self._handover_pending), set()
+        task = asyncio.create_task(self._replay_handover(partitions), name="bridge-handover")
+        self._handover_tasks.add(task)
+        task.add_done_callback(self._handover_tasks.discard)
+
+    async def _replay_handover(self, partitions: frozenset[int]) -> None:
+        """Republish the journal window of newly owned partitions through the work queue."""
+        window = self._settings.partition_handover_replay_seconds
+        try:
+            replayed, truncated = await self._journal.replay_partitions(
+                partitions,
+                self._settings.partition_count,
+                window,
+                self._work_queue.put,
+                batch_size=self._settings.catchup_batch_size,
+                limit=self._settings.catchup_max_events,
+            )
+        except Exception as exc:  # noqa: BLE001 - live events keep flowing without the replay
+            print(f"[event_broker] handover replay of partitions {sorted(partitions)} failed: {exc!r}")
             return
+        self._sequence.replayed += replayed
+        if truncated:
+            self._sequence.replay_truncated += 1
+        if replayed:
+            print(f"[event_broker] replayed {replayed} events of {len(partitions)} taken-over partitions")
+
+    async def _open_pg(self) -> asyncpg.Connection:
+        conn = await asyncpg.connect(self._pg_dsn)
+        conn.add_termination_listener(self._on_pg_terminated)
+        return conn
 
+    def _on_pg_terminated(self, _conn: Any) -> None:
+        self._pg_lost.set()
+
+    async def _attach(self, conn: asyncpg.Connection) -> None:
+        if self._outbox:
+            await conn.add_listener(self._settings.outbox_channel, self._on_outbox_hint)
+        elif not self._replication:
+            await conn.add_listener(self._settings.listen_channel, self._handle_notification)
+
+    async def _supervise(self) -> None:
+        """Reconnects the source connection and samples sequence lag and NOTIFY queue usage."""
+        interval = self._settings.pg_health_check_interval_ms / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._pg_lost.wait(), timeout=interval)
+            except TimeoutError:
+                pass
+            if self._pg_conn is None or self._pg_conn.is_closed():
+                await self._reconnect()
+            if not self._outbox and not self._replication:
+                await self._sample_journal()
+            await self._sample_notify_queue()
+
+    async def _reconnect(self) -> None:
+        self._sequence.connected = False
+        print("[event_broker] Postgres connection lost, reconnecting")
+        backoff_max = self._settings.reconnect_backoff_max_ms / 1000
         async for attempt in AsyncRetrying(
             retry=retry_if_exception_type(Exception),
-            wait=wait_exponential(multiplier=0.2, min=0.5, max=5),
-            stop=stop_after_attempt(3),
+            wait=wait_exponential(multiplier=0.5, min=min(0.5, backoff_max), max=backoff_max),
         ):
             with attempt:
-                exchange = await self._channel.declare_exchange(
-                    self._settings.outgoing_exchange, aio_pika.ExchangeType.TOPIC
-                )
-                await exchange.publish(
-                    aio_pika.Message(
-                        body=message_body,
-                        content_type="application/json",
-                    ),
-                    routing_key=routing_key,
-                )
+                conn = await self._open_pg()
+        self._pg_conn = conn
+        self._pg_lost.clear()
+        if self._outbox:
+            self._outbox.use_connection(conn)
+        if self._feed:
+            self._feed.use_connection(conn)
+        await self._attach(conn)
+        self._sequence.connected = True
+        self._sequence.reconnects += 1
+        print(f"[event_broker] Postgres reconnected (attempts={attempt.retry_state.attempt_number})")
+        if not self._outbox and not self._replication:
+            await self._catch_up()
+
+    async def _catch_up(self) -> None:
+        """Republish NOTIFY events logged after the last published sequence, and the earlier
+        ones that committed after it (gaps)."""
+        after = self._sequence.replay_after()
+        try:
+            replayed, truncated = await self._journal.replay(
+                after,
+                self._work_queue.put,
+                batch_size=self._settings.catchup_batch_size,
+                limit=self._settings.catchup_max_events,
+                wanted=self._sequence.needs,
+            )
+        except Exception as exc:  # noqa: BLE001 - live events keep flowing without catch-up
+            print(f"[event_broker] catch-up after seq {after} failed: {exc!r}")
+            return
+        self._sequence.replayed += replayed
+        if truncated:
+            self._sequence.replay_truncated += 1
+            print(
+                f"[event_broker] catch-up stopped after {replayed} events past seq {after}; "
+                "older gaps need a consumer resync"
+            )
+        elif replayed:
+            print(f"[event_broker] replayed {replayed} events after seq {after}")
+
+    async def _sample_journal(self) -> None:
+        try:
+            await self._journal.sample(self._sequence)
+        except Exception as exc:  # noqa: BLE001 - lag is best effort (journal may be absent)
+            if not self._journal_warned:
+                print(f"[event_broker] sequence lag unavailable: {exc!r}")
+                self._journal_warned = True
+
+    async def _sample_notify_queue(self) -> None:
+        """Tracks `pg_notification_queue_usage()`; a full queue makes every NOTIFY-ing commit fail."""
+        if self._pg_pool is None:
+            return
+        try:
+            usage = await self._pg_pool.fetchval(NOTIFY_QUEUE_USAGE_SQL)
+        except Exception as exc:  # noqa: BLE001 - best effort, like sequence lag
+            print(f"[event_broker] notification queue usage unavailable: {exc!r}")
+            return
+        self._metrics.notify_queue_usage = usage
+        alert = self._settings.notify_queue_usage_alert
+        if usage >= alert and not self._notify_usage_warned:
+            print(f"[event_broker] NOTIFY queue {usage:.1%} full (alert at {alert:.0%})")
+        self._notify_usage_warned = usage >= alert
+
+    def _on_outbox_hint(self, *args: Any) -> None:
+        self._metrics.notification()
+        assert self._outbox is not None
+        self._outbox.wake(*args)
+
+    async def _handle_notification(
+        self, _conn: Any, _pid: int, _channel: str, payload: str
+    ) -> None:  # pragma: no cover - io heavy
+        self._metrics.notification()
+        await self._work_queue.put(payload)
+
+    async def _dispatch(self, payload: str) -> asyncio.Future[PublishOutcome] | None:
+        """Work-queue handler: hands the payload to the batch publisher or publishes inline."""
+        if not self._channel:
+            raise RuntimeError("RabbitMQ channel is not connected")
+        if (
+            self._codec.passthrough
+            and not self._needs_envelope
+            and '"data": ' in payload
+            and '"batch": ' not in payload
+        ):
+            routing_key = scan_routing_key(payload)
+            if routing_key:
+                self._metrics.receive(routing_key)
+                # Full trigger envelope going out unchanged: skip the parse/re-encode round trip.
+                published = await self._send_encoded(routing_key, self._codec.transcode(payload.encode()))
+                self._follow(published, {"seq": scan_seq(payload)})
+                return published
+        data = self._parse_payload(payload)
+        if data is None:
+            return None
+        if is_batch(data):
+            published = await self._dispatch_batch(data)
+        else:
+            self._metrics.receive(data.get("routing_key") or "")
+            if self._partitions and not self._partitions.owns(data):
+                self._sequence.published(data)  # another worker's; not a gap
+                return None
+            published = await self._route(data)
+        self._follow(published, data)
+        return published
 
-    def _prepare_message(self, payload: str) -> tuple[str | None, bytes | None]:
+    async def _route(self, data: dict[str, Any]) -> asyncio.Future[PublishOutcome] | None:
+        if self._coalescer.enabled:
+            return await self._coalescer.offer(data)
+        return await self._emit(data)
+
+    async def _dispatch_batch(self, data: dict[str, Any]) -> asyncio.Future[PublishOutcome] | None:
+        """Statement-level batch: fan out into per-row events or forward it as one message."""
+        if self._batches is None:
+            raise RuntimeError("statement batches need the Postgres pool")
+        rows = await self._batches.rows(data)
+        if rows is None:
+            return None
+        self._metrics.receive(data["routing_key"], len(rows))
+        if self._batches.forward:
+            if self._partitions and not self._partitions.owns(data):
+                self._sequence.published(data)
+                return None
+            return await self._emit(await self._batches.forward_body(data, rows))
+        published = []
+        for event in fan_out(data, rows):
+            if self._partitions and not self._partitions.owns(event):
+                continue
+            published.append(await self._route(event))
+        return _settled(published)
+
+    @property
+    def _needs_envelope(self) -> bool:
+        return (
+            self._coalescer.enabled
+            or self._partitions is not None
+            or self._snapshot is not None
+            or bool(self._full_rows)
+        )
+
+    def _follow(self, published: asyncio.Future[PublishOutcome] | None, data: dict[str, Any]) -> None:
+        if published is None:
+            self._sequence.published(data)
+        else:
+            published.add_done_callback(lambda done: self._track(done, data))
+
+    def _track(self, done: asyncio.Future[PublishOutcome], data: dict[str, Any]) -> None:
+        if not done.cancelled() and done.result() is PublishOutcome.CONFIRMED:
+            self._sequence.published(data)
+
+    async def _emit(self, data: dict[str, Any]) -> asyncio.Future[PublishOutcome] | None:
+        if self._hydrator and is_claim_check(data):
+            return self._hydrator.add(data)
+        if self._snapshot:
+            self._snapshot.apply(data)
+        routing_key, encoded = self._encode(data)
+        if routing_key is None or encoded is None:
+            return None
+        published = await self._send_encoded(routing_key, encoded)
+        return self._with_full_row(published, data)
+
+    def _with_full_row(
+        self, published: asyncio.Future[PublishOutcome] | None, data: dict[str, Any]
+    ) -> asyncio.Future[PublishOutcome] | None:
+        """Adds the `<routing_key>.full` copy of a column diff for keys in `FULL_ROW_ROUTES`."""
+        if self._hydrator is None or not self._full_rows.wants(data):
+            return published
+        return _settled([published, self._hydrator.add(full_row_claim(data))])
+
+    async def _send_encoded(
+        self, routing_key: str, encoded: Encoded
+    ) -> asyncio.Future[PublishOutcome] | None:
+        if self._spool and (self._broker_down or self._spool.pending):
+            # Keep FIFO order: while anything is spooled, newer events queue behind it.
+            return _resolved(self._to_spool(routing_key, encoded))
+        if self._publisher:
+            published = await self._publish_batched(routing_key, encoded)
+            return self._spool_unconfirmed(published, routing_key, encoded) if self._spool else published
+        try:
+            await self._send(routing_key, encoded)
+        except Exception as exc:
+            if not self._spool:
+                raise
+            if isinstance(exc, _REJECTIONS):
+                print(f"[event_broker] {routing_key} rejected, dropping: {exc!r}")
+                return _resolved(PublishOutcome.NACKED)
+            print(f"[event_broker] publish failed for {routing_key}, spooling: {exc!r}")
+            return _resolved(self._to_spool(routing_key, encoded))
+        return None
+
+    async def _submit_notify(self, routing_key: str, body: bytes) -> asyncio.Future[PublishOutcome]:
+        """`_submit` for NOTIFY-derived events, which have no durable copy besides the spool."""
+        if self._snapshot:
+            self._snapshot.apply(body)
+        published = await self._send_encoded(routing_key, self._codec.transcode(body))
+        return published if published is not None else _resolved(PublishOutcome.CONFIRMED)
+
+    def _open_spool(self) -> None:
+        self._spool = open_worker_spool(
+            self._settings.spool_path,
+            max_bytes=self._settings.spool_max_bytes,
+            segment_bytes=self._settings.spool_segment_bytes,
+            fsync_batch=self._settings.spool_fsync_batch,
+        )
+        if self._spool.pending:
+            print(f"[event_broker] recovered {self._spool.pending} spooled events")
+            self._spool_ready.set()
+        self._spool_tasks = [
+            asyncio.create_task(self._drain_spool(), name="bridge-spool-drain"),
+            asyncio.create_task(
+                sync_periodically(self._spool, self._settings.spool_fsync_interval_ms / 1000),
+                name="bridge-spool-sync",
+            ),
+        ]
+        if self._rmq_conn is not None:
+            self._rmq_conn.reconnect_callbacks.add(lambda *_: self._broker_back.set())
+
+    def _to_spool(self, routing_key: str, encoded: Encoded) -> PublishOutcome:
+        assert self._spool is not None
         try:
-            data = json.loads(payload)
+            self._spool.append(_spool_record(routing_key, encoded))
+        except SpoolFull as exc:
+            print(f"[event_broker] dropping {routing_key}, {exc}")
+            self._metrics.dropped(routing_key)
+            return PublishOutcome.FAILED
+        self._broker_down = True
+        self._spool_ready.set()
+        self._metrics.outcome(routing_key, PublishOutcome.SPOOLED)
+        return PublishOutcome.SPOOLED
+
+    def _spool_unconfirmed(
+        self, published: asyncio.Future[PublishOutcome], routing_key: str, encoded: Encoded
+    ) -> asyncio.Future[PublishOutcome]:
+        outcome: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+
+        def settle(done: asyncio.Future[PublishOutcome]) -> None:
+            # Only transport failures are worth retrying; a nack is final and already counted.
+            result = done.result()
+            if result is PublishOutcome.FAILED:
+                result = self._to_spool(routing_key, encoded)
+            outcome.set_result(result)
+
+        published.add_done_callback(settle)
+        return outcome
+
+    async def _drain_spool(self) -> None:
+        """Republishes spooled events in order once the broker takes messages again."""
+        assert self._spool is not None
+        retry_interval = self._settings.spool_retry_interval_ms / 1000
+        while True:
+            await self._spool_ready.wait()
+            records = self._spool.read(self._settings.spool_drain_batch)
+            if not records:
+                self._spool_ready.clear()
+                self._broker_down = False
+                continue
+            delivered = await self._deliver_spooled([_unspool_record(record) for record, _ in records])
+            if delivered:
+                self._spool.commit(records[delivered - 1][1], delivered)
+            if delivered < len(records):
+                self._broker_back.clear()
+                try:
+                    await asyncio.wait_for(self._broker_back.wait(), timeout=retry_interval)
+                except TimeoutError:
+                    pass
+
+    async def _deliver_spooled(self, messages: list[tuple[str, Encoded]]) -> int:
+        """Publish spooled messages; returns how many leading ones the broker answered.
+
+        A rejected message is dropped (counted as nacked) rather than blocking the spool;
+        the first transport failure stops the pass.
+        """
+        if self._publisher:
+            futures = [
+                await self._publish_batched(routing_key, encoded) for routing_key, encoded in messages
+            ]
+            outcomes = await asyncio.gather(*futures)
+            delivered = 0
+            for (routing_key, _), outcome in zip(messages, outcomes, strict=True):
+                if outcome is PublishOutcome.FAILED:
+                    break
+                if outcome is PublishOutcome.NACKED:
+                    print(f"[event_broker] spooled {routing_key} rejected, dropping")
+                delivered += 1
+            return delivered
+        for delivered, (routing_key, encoded) in enumerate(messages):
+            try:
+                await self._send(routing_key, encoded)
+            except _REJECTIONS as exc:
+                print(f"[event_broker] spooled {routing_key} rejected, dropping: {exc!r}")
+            except Exception as exc:  # noqa: BLE001 - retried on the next drain pass
+                print(f"[event_broker] spool drain paused: {exc!r}")
+                return delivered
+        return len(messages)
+
+    async def _submit(self, routing_key: str, body: bytes) -> asyncio.Future[PublishOutcome]:
+        """Publish a JSON body built by a source and return a future for its broker outcome."""
+        self._metrics.receive(routing_key)
+        envelope = json.loads(body) if self._full_rows else None
+        if self._snapshot:
+            self._snapshot.apply(envelope if envelope is not None else body)
+        encoded = self._codec.transcode(body)
+        if self._publisher:
+            published = await self._publish_batched(routing_key, encoded)
+        else:
+            # Awaited, so a drained batch reaches the broker in source order.
+            published = _resolved(await self._send_with_outcome(routing_key, encoded))
+        if envelope is not None:
+            published = self._with_full_row(published, envelope) or published
+        return published
+
+    def _batch_publisher(self, transport: Transport) -> BatchPublisher:
+        return BatchPublisher(
+            transport,
+            batch_size=self._settings.publish_batch_size,
+            linger=self._settings.publish_batch_linger_ms / 1000,
+            max_in_flight=self._settings.publish_max_in_flight,
+            on_batch=self._report_batch,
+            on_message=self._metrics.outcome,
+            on_retry=self._metrics.retry,
+        )
+
+    async def _publish_batched(
+        self, routing_key: str, encoded: Encoded
+    ) -> asyncio.Future[PublishOutcome]:
+        """Batched publish to every transport routed for the key; confirmed once all confirm."""
+        routes = self._routes.transports(routing_key)
+        if routes == (RABBITMQ,):
+            return await self._publish_rabbitmq(routing_key, encoded)
+        published = [
+            await self._publish_rabbitmq(routing_key, encoded)
+            if name == RABBITMQ
+            else await self._publish_transport(name, routing_key, encoded)
+            for name in routes
+        ]
+        settled = _settled(published)
+        assert settled is not None
+        return settled
+
+    async def _publish_transport(
+        self, name: str, routing_key: str, encoded: Encoded
+    ) -> asyncio.Future[PublishOutcome]:
+        return await self._transport_publishers[name].publish(
+            routing_key,
+            encoded.body,
+            content_type=encoded.content_type,
+            content_encoding=encoded.content_encoding,
+        )
+
+    async def _publish_rabbitmq(
+        self, routing_key: str, encoded: Encoded
+    ) -> asyncio.Future[PublishOutcome]:
+        assert self._publisher is not None
+        lane = self._lanes.lane(routing_key)
+        return await self._publisher.publish(
+            routing_key,
+            encoded.body,
+            content_type=encoded.content_type,
+            content_encoding=encoded.content_encoding,
+            priority=lane.priority,
+            exchange=lane.exchange,
+        )
+
+    async def _send_with_outcome(self, routing_key: str, encoded: Encoded) -> PublishOutcome:
+        try:
+            await self._send(routing_key, encoded)
+        except _REJECTIONS as exc:
+            print(f"[event_broker] {routing_key} rejected: {exc!r}")
+            return PublishOutcome.NACKED
+        except Exception as exc:  # noqa: BLE001 - surfaced as an outcome
+            print(f"[event_broker] publish failed for {routing_key}: {exc!r}")
+            return PublishOutcome.FAILED
+        return PublishOutcome.CONFIRMED
+
+    def _report_batch(self, result: BatchResult) -> None:
+        if result.nacked or result.failed:
+            print(
+                f"[event_broker] batch of {result.size}: confirmed={result.confirmed} "
+                f"nacked={result.nacked} failed={result.failed} in {result.elapsed:.3f}s"
+            )
+
+    async def _send(self, routing_key: str, encoded: Encoded) -> None:
+        """Unbatched publish; transports other than RabbitMQ still go through their batcher."""
+        for name in self._routes.transports(routing_key):
+            if name == RABBITMQ:
+                await self._send_rabbitmq(routing_key, encoded)
+                continue
+            outcome = await (await self._publish_transport(name, routing_key, encoded))
+            if outcome is PublishOutcome.NACKED:
+                raise _Rejected(f"{name} rejected {routing_key}")
+            if outcome is not PublishOutcome.CONFIRMED:
+                raise RuntimeError(f"{name} did not accept {routing_key}: {outcome.value}")
+
+    async def _send_rabbitmq(self, routing_key: str, encoded: Encoded) -> None:
+        assert self._channel is not None
+
+        lane = self._lanes.lane(routing_key)
+        started = time.perf_counter()
+        outcome = PublishOutcome.FAILED
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_not_exception_type(RabbitMqTransport.rejections),
+                wait=wait_exponential(multiplier=0.2, min=0.5, max=5),
+                stop=stop_after_attempt(3),
+                before_sleep=lambda _: self._metrics.retry(routing_key),
+                reraise=True,
+            ):
+                with attempt:
+                    if lane.exchange:
+                        exchange = await self._channel.declare_exchange(
+                            lane.exchange, aio_pika.ExchangeType.DIRECT
+                        )
+                    else:
+                        exchange = await self._channel.declare_exchange(
+                            self._settings.outgoing_exchange, aio_pika.ExchangeType.TOPIC
+                        )
+                    await exchange.publish(
+                        aio_pika.Message(
+                            body=encoded.body,
+                            content_type=encoded.content_type,
+                            content_encoding=encoded.content_encoding,
+                            priority=lane.priority,
+                        ),
+                        routing_key=routing_key,
+                    )
+            outcome = PublishOutcome.CONFIRMED
+        except RabbitMqTransport.rejections:
+            outcome = PublishOutcome.NACKED
+            raise
+        finally:
+            self._metrics.outcome(routing_key, outcome, time.perf_counter() - started)
+
+    def _parse_payload(self, payload: str) -> dict[str, Any] | None:
+        try:
+            return json.loads(payload)
         except json.JSONDecodeError:
             print(f"[event_broker] invalid JSON payload: {payload}")
-            return None, None
+            return None
 
+    def _encode(self, data: dict[str, Any]) -> tuple[str | None, Encoded | None]:
         routing_key = data.get("routing_key")
         if not routing_key:
-            print(f"[event_broker] missing routing key in payload: {payload}")
+            print(f"[event_broker] missing routing key in payload: {data}")
             return None, None
+        return routing_key, self._codec.encode(data)
+
+
+def _resolved(outcome: PublishOutcome) -> asyncio.Future[PublishOutcome]:
+    future: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+    future.set_result(outcome)
+    return future
+
+
+def _settled(
+    published: list[asyncio.Future[PublishOutcome] | None],
+) -> asyncio.Future[PublishOutcome] | None:
+    """One future for a fanned-out batch: confirmed only if every event was."""
+    pending = [future for future in published if future is not None]
+    if not pending:
+        return None
+    outcome: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+
+    def settle(gathered: asyncio.Future[list[PublishOutcome]]) -> None:
+        # A transport failure outranks a rejection: the event is still worth retrying.
+        results = gathered.result()
+        failed = [result for result in results if result is not PublishOutcome.CONFIRMED]
+        if PublishOutcome.FAILED in failed:
+            outcome.set_result(PublishOutcome.FAILED)
+        else:
+            outcome.set_result(failed[0] if failed else PublishOutcome.CONFIRMED)
+
+    asyncio.gather(*pending).add_done_callback(settle)
+    return outcome
+
 
-        body = json.dumps(data).encode("utf-8")
-        return routing_key, body
+def _spool_record(routing_key: str, encoded: Encoded) -> bytes:
+    header = json.dumps([routing_key, encoded.content_type, encoded.content_encoding])
+    return header.encode("utf-8") + b"\n" + encoded.body
 
 
+def _unspool_record(record: bytes) -> tuple[str, Encoded]:
+    header, _, body = record.partition(b"\n")
+    routing_key, content_type, content_encoding = json.loads(header)
+    return routing_key, Encoded(body, content_type, content_encoding)
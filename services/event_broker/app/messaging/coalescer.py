@@ -0,0 +1,131 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.messaging.diffs import merge_diff
+from app.messaging.publisher import PublishOutcome
+
+Emit = Callable[[dict[str, Any]], Awaitable["asyncio.Future[PublishOutcome] | None"]]
+
+
+@dataclass(slots=True)
+class _PendingUpdate:
+    envelope: dict[str, Any]
+    future: "asyncio.Future[PublishOutcome]"
+    timer: asyncio.TimerHandle | None = None
+
+
+@dataclass(slots=True)
+class CoalescerStats:
+    windows_ms: dict[str, float] = field(default_factory=dict)
+    pending: int = 0
+    emitted: int = 0
+    collapsed: int = 0
+    collapsed_by_key: dict[str, int] = field(default_factory=dict)
+
+
+class Coalescer:
+    """Debounces bursts of updates per aggregate before they are published.
+
+    Envelopes whose routing key has a window are held per `(table, id)`; a newer envelope with
+    the same routing key replaces the held one (a column diff is merged into it instead, so no
+    changed column is lost), and the held envelope is emitted when its window
+    (started by the first update) expires. Any other event for the same aggregate, such as a
+    create or delete, emits the held update first, so per-aggregate order is unchanged. All
+    collapsed envelopes share the future of the one that is finally published.
+    """
+
+    def __init__(self, emit: Emit, windows: dict[str, float]):
+        self._emit = emit
+        self._windows = dict(windows)
+        self._pending: dict[tuple[str, Any], _PendingUpdate] = {}
+        self._releases: set[asyncio.Task[None]] = set()
+        self.emitted = 0
+        self.collapsed_by_key: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._windows)
+
+    async def offer(self, envelope: dict[str, Any]) -> "asyncio.Future[PublishOutcome] | None":
+        key = aggregate_key(envelope)
+        if key is None:
+            return await self._emit_now(envelope)
+
+        routing_key = envelope.get("routing_key")
+        window = self._windows.get(routing_key) if routing_key else None
+        pending = self._pending.get(key)
+        if pending is not None:
+            if window is not None and pending.envelope.get("routing_key") == routing_key:
+                pending.envelope = merge_diff(pending.envelope, envelope)
+                self.collapsed_by_key[routing_key] = self.collapsed_by_key.get(routing_key, 0) + 1
+                return pending.future
+            await self._release(key)
+        if window is None:
+            return await self._emit_now(envelope)
+
+        loop = asyncio.get_running_loop()
+        pending = _PendingUpdate(envelope, loop.create_future())
+        pending.timer = loop.call_later(window, self._schedule_release, key)
+        self._pending[key] = pending
+        return pending.future
+
+    async def close(self) -> None:
+        for key in list(self._pending):
+            await self._release(key)
+        if self._releases:
+            await asyncio.gather(*self._releases)
+
+    def stats(self) -> CoalescerStats:
+        return CoalescerStats(
+            windows_ms={key: window * 1000 for key, window in self._windows.items()},
+            pending=len(self._pending),
+            emitted=self.emitted,
+            collapsed=sum(self.collapsed_by_key.values()),
+            collapsed_by_key=dict(self.collapsed_by_key),
+        )
+
+    def _schedule_release(self, key: tuple[str, Any]) -> None:
+        task = asyncio.create_task(self._release(key), name="bridge-coalesce")
+        self._releases.add(task)
+        task.add_done_callback(self._releases.discard)
+
+    async def _release(self, key: tuple[str, Any]) -> None:
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        try:
+            published = await self._emit_now(pending.envelope)
+        except Exception as exc:  # noqa: BLE001 - held futures resolve as failed, never hang
+            print(f"[event_broker] coalesced publish failed for {key}: {exc!r}")
+            pending.future.set_result(PublishOutcome.FAILED)
+            return
+        if published is None:
+            # Published inline (no confirm pipeline): the emit call already succeeded.
+            pending.future.set_result(PublishOutcome.CONFIRMED)
+            return
+        published.add_done_callback(
+            lambda done, target=pending.future: target.set_result(done.result())
+        )
+
+    async def _emit_now(self, envelope: dict[str, Any]) -> "asyncio.Future[PublishOutcome] | None":
+        self.emitted += 1
+        return await self._emit(envelope)
+
+
+def aggregate_key(envelope: dict[str, Any]) -> tuple[str, Any] | None:
+    """`(table, primary key)` of the row an envelope describes, for full and claim-check payloads."""
+    table = envelope.get("table")
+    row_id = envelope.get("id")
+    if row_id is None:
+        data = envelope.get("data")
+        row_id = data.get("id") if isinstance(data, dict) else None
+    if table is None or row_id is None:
+        return None
+    return table, row_id
+
+
+__all__ = ["Coalescer", "CoalescerStats", "aggregate_key"]
@@ -0,0 +1,144 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+
+try:  # optional fast paths; the bridge falls back to the stdlib codec when absent
+    import orjson
+except ImportError:  # pragma: no cover - depends on the image
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the image
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the image
+    zstandard = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+ZSTD_ENCODING = "zstd"
+
+_ROUTING_KEY_MARKER = '"routing_key": "'
+_SEQ_MARKER = '"seq": '
+
+
+@dataclass(slots=True)
+class Encoded:
+    body: bytes
+    content_type: str = JSON_CONTENT_TYPE
+    content_encoding: str | None = None
+
+
+class EventCodec:
+    """Serialises bridge envelopes and tags them with `content_type`/`content_encoding`.
+
+    `encode` takes a parsed envelope; `transcode` takes a body that sources already produced
+    as JSON text (outbox rows, replication, hydrated claims, pass-through NOTIFY payloads)
+    and only re-encodes it when the wire format is not JSON. Bodies of at least
+    `compress_min_bytes` are zstd-compressed when compression is enabled.
+    """
+
+    def __init__(
+        self,
+        name: str = "json",
+        *,
+        compression: str = "none",
+        compress_min_bytes: int = 4096,
+        compress_level: int = 3,
+    ):
+        if name not in CODECS:
+            raise ValueError(f"unknown event codec {name!r}; expected one of {sorted(CODECS)}")
+        if name == "orjson" and orjson is None:
+            raise RuntimeError("EVENT_CODEC=orjson requires the orjson package")
+        if name == "msgpack" and msgpack is None:
+            raise RuntimeError("EVENT_CODEC=msgpack requires the msgpack package")
+        if compression not in ("none", ZSTD_ENCODING):
+            raise ValueError(f"unknown event compression {compression!r}; expected 'none' or 'zstd'")
+        if compression == ZSTD_ENCODING and zstandard is None:
+            raise RuntimeError("EVENT_COMPRESSION=zstd requires the zstandard package")
+        self.name = name
+        self.content_type = MSGPACK_CONTENT_TYPE if name == "msgpack" else JSON_CONTENT_TYPE
+        self._compressor = (
+            zstandard.ZstdCompressor(level=compress_level) if compression == ZSTD_ENCODING else None
+        )
+        self._compress_min_bytes = compress_min_bytes
+
+    @property
+    def passthrough(self) -> bool:
+        return self.name == "passthrough"
+
+    def encode(self, envelope: dict[str, Any]) -> Encoded:
+        if self.name == "msgpack":
+            body = msgpack.packb(envelope, use_bin_type=True)
+        elif self.name == "json" or orjson is None:
+            body = json.dumps(envelope).encode("utf-8")
+        else:
+            body = orjson.dumps(envelope)
+        return self._finish(body)
+
+    def transcode(self, json_body: bytes) -> Encoded:
+        if self.name == "msgpack":
+            return self._finish(msgpack.packb(_loads(json_body), use_bin_type=True))
+        return self._finish(json_body)
+
+    def _finish(self, body: bytes) -> Encoded:
+        if self._compressor is not None and len(body) >= self._compress_min_bytes:
+            return Encoded(self._compressor.compress(body), self.content_type, ZSTD_ENCODING)
+        return Encoded(body, self.content_type)
+
+
+def _loads(body: bytes | str) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def scan_routing_key(payload: str) -> str | None:
+    """Top-level `routing_key` of a trigger envelope without parsing the document.
+
+    Postgres prints jsonb keys ordered by length, so `routing_key` follows the (possibly
+    large) `data` object and the last occurrence is the top-level one. Returns None when the
+    value needs unescaping, so callers can fall back to a full parse.
+    """
+    start = payload.rfind(_ROUTING_KEY_MARKER)
+    if start < 0:
+        return None
+    start += len(_ROUTING_KEY_MARKER)
+    end = payload.find('"', start)
+    if end < 0:
+        return None
+    routing_key = payload[start:end]
+    if not routing_key or "\\" in routing_key:
+        return None
+    return routing_key
+
+
+def scan_seq(payload: str) -> int | None:
+    """Top-level `seq` stamp; jsonb prints it before `data`, so the first match is the envelope's."""
+    start = payload.find(_SEQ_MARKER)
+    if start < 0:
+        return None
+    start += len(_SEQ_MARKER)
+    end = start
+    while end < len(payload) and payload[end].isdigit():
+        end += 1
+    return int(payload[start:end]) if end > start else None
+
+
+def decode_body(body: bytes, content_type: str = JSON_CONTENT_TYPE, content_encoding: str | None = None) -> Any:
+    """Inverse of `EventCodec` for consumers and tests."""
+    if content_encoding == ZSTD_ENCODING:
+        if zstandard is None:
+            raise RuntimeError("zstd-encoded event received but zstandard is not installed")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    if content_type == MSGPACK_CONTENT_TYPE:
+        if msgpack is None:
+            raise RuntimeError("msgpack event received but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return _loads(body)
+
+
+CODECS = ("json", "passthrough", "orjson", "msgpack")
+
+__all__ = ["CODECS", "Encoded", "EventCodec", "decode_body", "scan_routing_key", "scan_seq"]
@@ -0,0 +1,73 @@
+from collections.abc import Sequence
+from typing import Any
+
+from app.messaging.hydrator import SEQUENCE_FIELDS
+from app.messaging.lanes import topic_matches
+
+# Update envelopes whose `data` holds only the changed columns plus `id` and `updated_at`
+# (migration `20261018_06_update_diffs`); full-row envelopes stay at version 1.
+DIFF_SCHEMA_VERSION = 2
+FULL_ROW_SUFFIX = ".full"
+
+
+def is_diff(envelope: dict[str, Any]) -> bool:
+    return envelope.get("op") == "UPDATE" and envelope.get("schema_version", 1) >= DIFF_SCHEMA_VERSION
+
+
+def merge_diff(held: dict[str, Any], newer: dict[str, Any]) -> dict[str, Any]:
+    """Collapses two envelopes for one row: `newer` wins, a column diff keeps the other
+    columns of `held`. The result is a full row whenever `held` was one."""
+    held_row, newer_row = held.get("data"), newer.get("data")
+    if not is_diff(newer) or not isinstance(held_row, dict) or not isinstance(newer_row, dict):
+        return newer
+    return {**newer, "schema_version": held.get("schema_version", 1), "data": {**held_row, **newer_row}}
+
+
+def full_row_claim(envelope: dict[str, Any]) -> dict[str, Any]:
+    """Claim-check envelope that makes the hydrator publish `<routing_key>.full` with the
+    current row; stamps (`seq`, `event_id`, `batch_index`, ...) are kept for deduplication."""
+    claim = {
+        "routing_key": envelope["routing_key"] + FULL_ROW_SUFFIX,
+        "table": envelope["table"],
+        "op": envelope["op"],
+        "schema_version": 1,
+        "id": envelope["data"]["id"],
+    }
+    claim.update({key: envelope[key] for key in SEQUENCE_FIELDS if key in envelope})
+    return claim
+
+
+class FullRowRoutes:
+    """Routing keys whose diff updates are also published in full as `<routing_key>.full`.
+
+    Consumers that need whole rows bind to e.g. `instance.updated.full` instead of
+    `instance.updated`; the copy is only produced while some pattern matches. Lookups are
+    cached per routing key.
+    """
+
+    def __init__(self, patterns: Sequence[str] = ()):
+        self._patterns = tuple(patterns)
+        self._cache: dict[str, bool] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    def wants(self, envelope: dict[str, Any]) -> bool:
+        routing_key = envelope.get("routing_key")
+        if not self._patterns or not routing_key or not is_diff(envelope):
+            return False
+        matched = self._cache.get(routing_key)
+        if matched is None:
+            matched = any(topic_matches(pattern, routing_key) for pattern in self._patterns)
+            self._cache[routing_key] = matched
+        return matched and isinstance(envelope.get("data"), dict) and "id" in envelope["data"]
+
+
+__all__ = [
+    "DIFF_SCHEMA_VERSION",
+    "FULL_ROW_SUFFIX",
+    "FullRowRoutes",
+    "full_row_claim",
+    "is_diff",
+    "merge_diff",
+]
@@ -0,0 +1,160 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import asyncpg
+
+from app.messaging.publisher import PublishOutcome
+
+HYDRATABLE_TABLES = frozenset({"instances", "knowledge_bases", "knowledge_base_entries"})
+# Stamped by the trigger (migration `20261018_04_event_sequence`), by batch fan-out or by the
+# outbox (`event_id`, on full-row copies of diffs), and kept on hydrated events.
+SEQUENCE_FIELDS = ("seq", "event_id", "emitted_at", "batch_index", "batch_size")
+
+Submit = Callable[[str, bytes], Awaitable["asyncio.Future[PublishOutcome]"]]
+
+
+@dataclass(slots=True)
+class _Claim:
+    envelope: dict[str, Any]
+    future: "asyncio.Future[PublishOutcome]"
+
+
+class Hydrator:
+    """Turns claim-check notifications (table, op, id) into full events.
+
+    Claims are collected for `window` seconds (or until `max_batch`), then every table is
+    loaded with a single `WHERE id = ANY($1)` query. Deletes carry their tombstone in the
+    notification and are published without a lookup. Rows that vanished before hydration
+    are skipped: their delete event follows.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        submit: Submit,
+        *,
+        window: float = 0.025,
+        max_batch: int = 1000,
+    ):
+        self._pool = pool
+        self._submit = submit
+        self._window = window
+        self._max_batch = max_batch
+        self._claims: list[_Claim] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+        self.hydrated = 0
+        self.missing = 0
+
+    def add(self, envelope: dict[str, Any]) -> "asyncio.Future[PublishOutcome]":
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[PublishOutcome] = loop.create_future()
+        self._claims.append(_Claim(envelope, future))
+        if len(self._claims) >= self._max_batch:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._schedule_flush)
+        return future
+
+    async def close(self) -> None:
+        self._schedule_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._claims:
+            return
+        claims, self._claims = self._claims, []
+        task = asyncio.create_task(self._flush(claims), name="bridge-hydrate")
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, claims: list[_Claim]) -> None:
+        try:
+            rows = await self._load_rows(claims)
+        except Exception as exc:  # noqa: BLE001 - claims resolve as failed, never hang
+            print(f"[event_broker] hydration failed: {exc!r}")
+            for claim in claims:
+                claim.future.set_result(PublishOutcome.FAILED)
+            return
+
+        for claim in claims:
+            envelope = claim.envelope
+            if envelope["op"] == "DELETE":
+                data = json.dumps(envelope.get("tombstone") or {"id": envelope["id"]})
+            else:
+                data = rows.get((envelope["table"], envelope["id"]))
+                if data is None:
+                    self.missing += 1
+                    claim.future.set_result(PublishOutcome.CONFIRMED)
+                    continue
+            self.hydrated += 1
+            try:
+                published = await self._submit(envelope["routing_key"], _envelope_body(envelope, data))
+            except Exception as exc:  # noqa: BLE001 - the claim fails, the rest still publish
+                print(f"[event_broker] publish of hydrated {envelope['routing_key']} failed: {exc!r}")
+                claim.future.set_result(PublishOutcome.FAILED)
+                continue
+            published.add_done_callback(lambda done, target=claim.future: _settle(target, done))
+
+    async def _load_rows(self, claims: list[_Claim]) -> dict[tuple[str, int], str]:
+        ids_by_table: dict[str, set[int]] = {}
+        for claim in claims:
+            envelope = claim.envelope
+            if envelope["op"] != "DELETE" and envelope["table"] in HYDRATABLE_TABLES:
+                ids_by_table.setdefault(envelope["table"], set()).add(envelope["id"])
+
+        rows: dict[tuple[str, int], str] = {}
+        if not ids_by_table:
+            return rows
+        async with self._pool.acquire() as conn:
+            for table, ids in ids_by_table.items():
+                loaded = await fetch_rows(conn, table, ids)
+                rows.update({(table, row_id): data for row_id, data in loaded.items()})
+        return rows
+
+
+async def fetch_rows(conn: asyncpg.Connection, table: str, ids: Iterable[int]) -> dict[int, str]:
+    """Current rows of `table` by id, as JSON text straight from Postgres."""
+    if table not in HYDRATABLE_TABLES:
+        raise ValueError(f"table {table!r} cannot be hydrated")
+    records = await conn.fetch(
+        f'SELECT t.id, row_to_json(t)::text AS data FROM "{table}" t WHERE t.id = ANY($1::int[])',
+        list(ids),
+    )
+    return {record["id"]: record["data"] for record in records}
+
+
+def _settle(target: "asyncio.Future[PublishOutcome]", done: "asyncio.Future[PublishOutcome]") -> None:
+    if target.done():
+        return
+    if done.cancelled() or done.exception() is not None:
+        target.set_result(PublishOutcome.FAILED)
+    else:
+        target.set_result(done.result())
+
+
+def is_claim_check(envelope: dict[str, Any]) -> bool:
+    return "data" not in envelope and "id" in envelope
+
+
+def _envelope_body(envelope: dict[str, Any], data_json: str) -> bytes:
+    # Splice the row JSON from Postgres in as-is instead of decoding and re-encoding it.
+    fields = {
+        "routing_key": envelope["routing_key"],
+        "table": envelope["table"],
+        "op": envelope["op"],
+        "schema_version": envelope.get("schema_version", 1),
+    }
+    fields.update({key: envelope[key] for key in SEQUENCE_FIELDS if key in envelope})
+    head = json.dumps(fields)
+    return f'{head[:-1]}, "data": {data_json}}}'.encode("utf-8")
+
+
+__all__ = ["Hydrator", "fetch_rows", "is_claim_check"]
@@ -0,0 +1,214 @@
+import time
+from collections.abc import Awaitable, Callable, Collection
+from dataclasses import dataclass
+from typing import Any
+
+import asyncpg
+
+# `domain_event_log` is written by `notify_domain_event()` next to every NOTIFY (migration
+# `20261018_04_event_sequence`); `seq` comes from the shared `domain_event_seq` sequence.
+CATCHUP_SQL = """
+SELECT seq, payload::text AS body
+FROM domain_event_log
+WHERE seq > $1
+ORDER BY seq
+LIMIT $2
+"""
+
+# Rows of the given partitions (same function as `app.messaging.partitions.partition_for`)
+# logged in the last $3 seconds: what a partition's previous owner may not have published.
+PARTITION_REPLAY_SQL = """
+SELECT seq, payload::text AS body
+FROM domain_event_log
+WHERE seq > $1
+  AND created_at >= now() - make_interval(secs => $3)
+  AND mod(COALESCE((payload->>'id')::bigint, (payload->'data'->>'id')::bigint, 0), $4) = ANY($5::int[])
+ORDER BY seq
+LIMIT $2
+"""
+
+LAG_SQL = """
+SELECT (SELECT max(seq) FROM domain_event_log) AS head,
+       (SELECT extract(epoch FROM now() - created_at)
+          FROM domain_event_log WHERE seq > $1 ORDER BY seq LIMIT 1) AS oldest_pending_s
+"""
+
+PRUNE_SQL = "DELETE FROM domain_event_log WHERE created_at < now() - make_interval(mins => $1)"
+
+
+@dataclass(slots=True)
+class SequenceStats:
+    connected: bool
+    last_published_seq: int | None
+    head_seq: int | None
+    lag_events: int
+    lag_seconds: float
+    reconnects: int
+    replayed: int
+    replay_truncated: int
+    gaps: int
+
+
+class SequenceTracker:
+    """Follows the `seq` stamp of NOTIFY envelopes the bridge has handled.
+
+    Sequences are taken when the trigger fires, not at commit, so events commit (and arrive)
+    out of `seq` order: seq 10 can commit after seq 11 was published. `last_published` is the
+    high-water mark; every lower seq not yet seen is kept as a gap for `gap_ttl` seconds
+    (longer than any writing transaction runs; gaps of rolled-back transactions never fill).
+    Catch-up replays from the oldest gap and skips what was already published.
+    """
+
+    def __init__(self, *, gap_ttl: float = 600.0, max_gaps: int = 100_000):
+        self.connected = False
+        self.last_published: int | None = None
+        self.head: int | None = None
+        self.oldest_pending_s = 0.0
+        self.reconnects = 0
+        self.replayed = 0
+        self.replay_truncated = 0
+        self._gap_ttl = gap_ttl
+        self._max_gaps = max_gaps
+        self._gaps: dict[int, float] = {}  # seq -> when it was first skipped, oldest first
+
+    def start_at(self, head: int | None) -> None:
+        if self.last_published is None:
+            self.last_published = head or 0
+
+    def published(self, envelope: dict[str, Any]) -> None:
+        """Marks a seq handled: published, or skipped on purpose (another worker's partition)."""
+        seq = envelope.get("seq")
+        if not isinstance(seq, int):
+            return
+        if self.last_published is None:
+            self.last_published = seq
+        elif seq > self.last_published:
+            skipped_at = time.monotonic()
+            for missing in range(max(self.last_published + 1, seq - self._max_gaps), seq):
+                self._gaps[missing] = skipped_at
+            self.last_published = seq
+            while len(self._gaps) > self._max_gaps:
+                del self._gaps[next(iter(self._gaps))]
+        else:
+            self._gaps.pop(seq, None)
+
+    def replay_after(self) -> int:
+        """The catch-up starting point: just below the oldest gap, else `last_published`."""
+        if self._gaps:
+            return min(self._gaps) - 1
+        return self.last_published or 0
+
+    def needs(self, seq: int) -> bool:
+        """True if a journal row with this seq has not been handled yet."""
+        return seq > (self.last_published or 0) or seq in self._gaps
+
+    def sample(self, head: int | None, oldest_pending_s: float | None) -> None:
+        """Also expires old gaps; only called while connected, so a gap that fills during
+        an outage is still replayed on reconnect."""
+        self.head = head
+        self.oldest_pending_s = oldest_pending_s or 0.0
+        expired = time.monotonic() - self._gap_ttl
+        while self._gaps:
+            seq, skipped_at = next(iter(self._gaps.items()))
+            if skipped_at > expired:
+                break
+            del self._gaps[seq]
+
+    def stats(self) -> SequenceStats:
+        lag = max(0, (self.head or 0) - (self.last_published or 0))
+        return SequenceStats(
+            connected=self.connected,
+            last_published_seq=self.last_published,
+            head_seq=self.head,
+            lag_events=lag,
+            lag_seconds=round(self.oldest_pending_s, 3) if lag else 0.0,
+            reconnects=self.reconnects,
+            replayed=self.replayed,
+            replay_truncated=self.replay_truncated,
+            gaps=len(self._gaps),
+        )
+
+
+class EventJournal:
+    """Catch-up, lag sampling and retention for `domain_event_log`."""
+
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(self, pool: asyncpg.Pool, *, retention_minutes: int = 1440):
+        self._pool = pool
+        self._retention_minutes = retention_minutes
+        self._last_prune = 0.0
+
+    async def head(self) -> int | None:
+        async with self._pool.acquire() as conn:
+            record = await conn.fetchrow(LAG_SQL, 0)
+        return record["head"]
+
+    async def sample(self, tracker: SequenceTracker) -> None:
+        async with self._pool.acquire() as conn:
+            record = await conn.fetchrow(LAG_SQL, tracker.last_published or 0)
+            if time.monotonic() - self._last_prune >= self.PRUNE_INTERVAL:
+                await conn.execute(PRUNE_SQL, self._retention_minutes)
+                self._last_prune = time.monotonic()
+        oldest = record["oldest_pending_s"]
+        tracker.sample(record["head"], float(oldest) if oldest is not None else None)
+
+    async def replay(
+        self,
+        after: int,
+        put: Callable[[str], Awaitable[None]],
+        *,
+        batch_size: int = 1000,
+        limit: int = 100_000,
+        wanted: Callable[[int], bool] | None = None,
+    ) -> tuple[int, bool]:
+        """Feed logged envelopes with `seq > after` (and `wanted(seq)`, if given) to `put`.
+
+        Returns `(replayed, truncated)`; `limit` bounds the rows read, not just the ones fed.
+        """
+        return await self._replay(CATCHUP_SQL, (), after, put, batch_size, limit, wanted)
+
+    async def replay_partitions(
+        self,
+        partitions: Collection[int],
+        partition_count: int,
+        window_seconds: float,
+        put: Callable[[str], Awaitable[None]],
+        *,
+        batch_size: int = 1000,
+        limit: int = 100_000,
+    ) -> tuple[int, bool]:
+        """Feed the envelopes of `partitions` logged in the last `window_seconds` to `put`."""
+        args = (float(window_seconds), partition_count, sorted(partitions))
+        return await self._replay(PARTITION_REPLAY_SQL, args, 0, put, batch_size, limit, None)
+
+    async def _replay(
+        self,
+        sql: str,
+        args: tuple[Any, ...],
+        after: int,
+        put: Callable[[str], Awaitable[None]],
+        batch_size: int,
+        limit: int,
+        wanted: Callable[[int], bool] | None,
+    ) -> tuple[int, bool]:
+        replayed = scanned = 0
+        cursor = after
+        while True:
+            size = min(batch_size, limit - scanned)
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(sql, cursor, max(size, 1), *args)
+            if size <= 0:
+                # Over the bound: report whether anything was left behind.
+                return replayed, bool(rows)
+            for row in rows:
+                cursor = row["seq"]
+                if wanted is None or wanted(cursor):
+                    await put(row["body"])
+                    replayed += 1
+            scanned += len(rows)
+            if len(rows) < size:
+                return replayed, False
+
+
+__all__ = ["EventJournal", "SequenceStats", "SequenceTracker"]
@@ -0,0 +1,132 @@
+import bisect
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+
+DEFAULT_LANE = "default"
+
+# Upper bounds in milliseconds, Prometheus style (cumulative, plus an implicit +Inf).
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10_000)
+
+
+@dataclass(slots=True)
+class Lane:
+    name: str
+    patterns: tuple[str, ...] = ()
+    weight: int = 1
+    priority: int | None = None
+    exchange: str | None = None
+
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+    """AMQP topic matching: `*` is exactly one word, `#` is zero or more words."""
+    return _match(pattern.split("."), routing_key.split("."))
+
+
+def _match(pattern: list[str], words: list[str]) -> bool:
+    if not pattern:
+        return not words
+    head, rest = pattern[0], pattern[1:]
+    if head == "#":
+        return any(_match(rest, words[index:]) for index in range(len(words) + 1))
+    if not words:
+        return False
+    return (head == "*" or head == words[0]) and _match(rest, words[1:])
+
+
+class LaneRouter:
+    """Maps routing keys to priority lanes; the first lane with a matching pattern wins.
+
+    Unmatched keys (and payloads without a readable key) fall into `default`, which is
+    always the last lane. Lookups are cached per routing key.
+    """
+
+    def __init__(self, lanes: Sequence[Lane] = ()):
+        named = [lane for lane in lanes if lane.name != DEFAULT_LANE]
+        default = next((lane for lane in lanes if lane.name == DEFAULT_LANE), Lane(DEFAULT_LANE))
+        self.lanes: tuple[Lane, ...] = (*named, default)
+        self._cache: dict[str, int] = {}
+
+    @classmethod
+    def from_settings(
+        cls,
+        patterns: Mapping[str, Sequence[str]],
+        weights: Mapping[str, int],
+        priorities: Mapping[str, int],
+        exchanges: Mapping[str, str],
+    ) -> "LaneRouter":
+        names = list(patterns)
+        if DEFAULT_LANE not in names:
+            names.append(DEFAULT_LANE)
+        for name in (*weights, *priorities, *exchanges):
+            if name not in names:
+                raise ValueError(f"priority lane {name!r} has no entry in PRIORITY_LANES")
+        return cls(
+            [
+                Lane(
+                    name,
+                    tuple(patterns.get(name, ())),
+                    weight=max(1, int(weights.get(name, 1))),
+                    priority=priorities.get(name),
+                    exchange=exchanges.get(name),
+                )
+                for name in names
+            ]
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.lanes) > 1
+
+    def index(self, routing_key: str | None) -> int:
+        if not routing_key:
+            return len(self.lanes) - 1
+        index = self._cache.get(routing_key)
+        if index is None:
+            index = next(
+                (
+                    position
+                    for position, lane in enumerate(self.lanes[:-1])
+                    if any(topic_matches(pattern, routing_key) for pattern in lane.patterns)
+                ),
+                len(self.lanes) - 1,
+            )
+            self._cache[routing_key] = index
+        return index
+
+    def lane(self, routing_key: str | None) -> Lane:
+        return self.lanes[self.index(routing_key)]
+
+
+@dataclass(slots=True)
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed millisecond buckets."""
+
+    bounds: tuple[float, ...] = LATENCY_BUCKETS_MS
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    count: int = 0
+    sum_ms: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        millis = seconds * 1000
+        self.counts[bisect.bisect_left(self.bounds, millis)] += 1
+        self.count += 1
+        self.sum_ms += millis
+
+    def cumulative(self) -> dict[str, int]:
+        """`le` label to cumulative count, e.g. `{"1": 3, ..., "+Inf": 12}`."""
+        buckets: dict[str, int] = {}
+        running = 0
+        for bound, count in zip((*self.bounds, None), self.counts, strict=True):
+            running += count
+            buckets["+Inf" if bound is None else f"{bound:g}"] = running
+        return buckets
+
+
+__all__ = [
+    "DEFAULT_LANE",
+    "LATENCY_BUCKETS_MS",
+    "Lane",
+    "LaneRouter",
+    "LatencyHistogram",
+    "topic_matches",
+]
@@ -0,0 +1,197 @@
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+    Metric,
+)
+
+from app.messaging.lanes import LATENCY_BUCKETS_MS
+from app.messaging.publisher import PublishOutcome
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.messaging.bridge import EventBridge
+
+NOTIFY_QUEUE_USAGE_SQL = "SELECT pg_notification_queue_usage()"
+
+PUBLISH_BUCKETS = tuple(bound / 1000 for bound in LATENCY_BUCKETS_MS)
+
+
+@dataclass(slots=True)
+class BridgeHealth:
+    healthy: bool
+    connections: dict[str, bool]
+    notification_queue_usage: float | None
+    seconds_since_last_notification: float | None
+    sequence_lag_events: int
+    spool_pending: int
+    work_queue_depth: int
+
+
+class BridgeMetrics:
+    """Prometheus instruments for one `EventBridge`, on a registry of its own.
+
+    Hot-path counters and the publish latency histogram are updated as events flow;
+    queue depths, lag, spool backlog and connection state are read from the bridge's
+    stats at scrape time by `BridgeCollector`.
+    """
+
+    def __init__(self, registry: CollectorRegistry | None = None):
+        self.registry = registry or CollectorRegistry()
+        self.received = Counter(
+            "event_broker_events_received",
+            "Events the bridge took from its source (NOTIFY, outbox or replication).",
+            ["routing_key"],
+            registry=self.registry,
+        )
+        self.published = Counter(
+            "event_broker_events_published",
+            "Events confirmed by RabbitMQ.",
+            ["routing_key"],
+            registry=self.registry,
+        )
+        self.failures = Counter(
+            "event_broker_publish_failures",
+            "Publishes nacked, failed after retries, or dropped because the spool was full.",
+            ["routing_key", "outcome"],
+            registry=self.registry,
+        )
+        self.spooled = Counter(
+            "event_broker_events_spooled",
+            "Events written to the on-disk spool instead of RabbitMQ.",
+            ["routing_key"],
+            registry=self.registry,
+        )
+        self.retries = Counter(
+            "event_broker_publish_retries",
+            "Publish attempts retried after an error.",
+            ["routing_key"],
+            registry=self.registry,
+        )
+        self.publish_latency = Histogram(
+            "event_broker_publish_latency_seconds",
+            "Time from handing a message to the publisher until RabbitMQ answered.",
+            ["routing_key"],
+            buckets=PUBLISH_BUCKETS,
+            registry=self.registry,
+        )
+        self.notify_queue_usage: float | None = None
+        self.last_notification_at: float | None = None
+
+    def receive(self, routing_key: str, count: int = 1) -> None:
+        self.received.labels(routing_key).inc(count)
+
+    def dropped(self, routing_key: str) -> None:
+        self.failures.labels(routing_key, "dropped").inc()
+
+    def notification(self) -> None:
+        self.last_notification_at = time.time()
+
+    def seconds_since_last_notification(self) -> float | None:
+        if self.last_notification_at is None:
+            return None
+        return max(0.0, time.time() - self.last_notification_at)
+
+    def outcome(self, routing_key: str, outcome: PublishOutcome, seconds: float | None = None) -> None:
+        if outcome is PublishOutcome.CONFIRMED:
+            self.published.labels(routing_key).inc()
+        elif outcome is PublishOutcome.SPOOLED:
+            self.spooled.labels(routing_key).inc()
+        else:
+            self.failures.labels(routing_key, outcome.value).inc()
+        if seconds is not None and outcome is not PublishOutcome.SPOOLED:
+            self.publish_latency.labels(routing_key).observe(seconds)
+
+    def retry(self, routing_key: str) -> None:
+        self.retries.labels(routing_key).inc()
+
+
+class BridgeCollector:
+    """Scrape-time gauges derived from the bridge's own stats."""
+
+    def __init__(self, bridge: "EventBridge", metrics: BridgeMetrics):
+        self._bridge = bridge
+        self._metrics = metrics
+
+    def collect(self) -> Iterator[Metric]:
+        bridge = self._bridge
+        health = bridge.health()
+
+        up = GaugeMetricFamily(
+            "event_broker_connection_up", "1 while the connection is open.", labels=["connection"]
+        )
+        for name, is_up in health.connections.items():
+            up.add_metric([name], 1.0 if is_up else 0.0)
+        yield up
+
+        yield _gauge(
+            "event_broker_pg_notification_queue_usage",
+            "Fraction of the Postgres NOTIFY queue in use (pg_notification_queue_usage()).",
+            health.notification_queue_usage,
+        )
+        yield _gauge(
+            "event_broker_last_notification_timestamp_seconds",
+            "Unix time of the last NOTIFY received from Postgres.",
+            self._metrics.last_notification_at,
+        )
+        yield _gauge(
+            "event_broker_seconds_since_last_notification",
+            "Seconds since the last NOTIFY received from Postgres.",
+            health.seconds_since_last_notification,
+        )
+
+        queue = bridge.stats()
+        depth = GaugeMetricFamily("event_broker_work_queue_depth", "Events waiting in the work queue.", labels=["lane"])
+        latency = HistogramMetricFamily(
+            "event_broker_queue_latency_seconds",
+            "Enqueue-to-confirm latency of NOTIFY events, per priority lane.",
+            labels=["lane"],
+        )
+        for lane in queue.lanes:
+            depth.add_metric([lane.name], lane.depth)
+            buckets = [
+                ("+Inf" if bound == "+Inf" else str(float(bound) / 1000), count)
+                for bound, count in lane.latency_histogram_ms.items()
+            ]
+            latency.add_metric([lane.name], buckets, lane.latency_sum_ms / 1000)
+        yield depth
+        yield latency
+        yield _counter("event_broker_work_queue_dropped", "Events dropped by the overflow policy.", queue.dropped)
+        yield _counter("event_broker_work_queue_failed", "Events whose handler raised.", queue.failed)
+
+        sequence = bridge.sequence_stats()
+        yield _gauge("event_broker_sequence_lag_events", "Journal head minus last published seq.", sequence.lag_events)
+        yield _gauge(
+            "event_broker_sequence_lag_seconds", "Age of the oldest unpublished journal row.", sequence.lag_seconds
+        )
+        yield _counter("event_broker_reconnects", "Postgres source reconnects.", sequence.reconnects)
+
+        spool = bridge.spool_stats()
+        if spool is not None:
+            yield _gauge("event_broker_spool_pending", "Events waiting in the on-disk spool.", spool.pending)
+            yield _gauge("event_broker_spool_bytes", "Bytes used by the on-disk spool.", spool.bytes)
+
+        partitions = bridge.partition_stats()
+        if partitions is not None:
+            yield _gauge("event_broker_partitions_owned", "Partitions this bridge publishes.", len(partitions.owned))
+
+
+def _gauge(name: str, documentation: str, value: float | None) -> GaugeMetricFamily:
+    return GaugeMetricFamily(name, documentation, value=float("nan") if value is None else value)
+
+
+def _counter(name: str, documentation: str, value: float) -> CounterMetricFamily:
+    return CounterMetricFamily(name, documentation, value=value)
+
+
+__all__ = [
+    "NOTIFY_QUEUE_USAGE_SQL",
+    "BridgeCollector",
+    "BridgeHealth",
+    "BridgeMetrics",
+]
@@ -0,0 +1,166 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Collection
+from typing import Any
+
+import asyncpg
+
+from app.messaging.publisher import PublishOutcome
+
+# The envelope is assembled in SQL so the bridge never re-encodes the row.
+_FETCH_SELECT = """
+SELECT id,
+       routing_key,
+       table_name || ':' || COALESCE(payload->>'id', '') AS aggregate,
+       jsonb_build_object(
+           'routing_key', routing_key,
+           'table', table_name,
+           'op', op,
+           'schema_version', schema_version,
+           'event_id', id,
+           'data', payload
+       )::text AS body
+FROM domain_events
+"""
+
+FETCH_BATCH_SQL = _FETCH_SELECT + """
+ORDER BY id
+LIMIT $1
+FOR UPDATE SKIP LOCKED
+"""
+
+# Same partition function as `app.messaging.partitions.partition_for` (row id modulo count).
+FETCH_PARTITIONS_SQL = _FETCH_SELECT + """
+WHERE mod(COALESCE((payload->>'id')::bigint, 0), $2) = ANY($3::int[])
+ORDER BY id
+LIMIT $1
+FOR UPDATE SKIP LOCKED
+"""
+
+DELETE_SQL = "DELETE FROM domain_events WHERE id = ANY($1::bigint[])"
+
+# Held for one drain transaction; partition ownership uses (namespace, partition) keys.
+DRAIN_LOCK_SQL = "SELECT pg_try_advisory_xact_lock($1, -1)"
+
+ARCHIVE_SQL = """
+WITH moved AS (
+    DELETE FROM domain_events WHERE id = ANY($1::bigint[])
+    RETURNING id, routing_key, table_name, op, schema_version, payload, created_at
+)
+INSERT INTO domain_events_archive (id, routing_key, table_name, op, schema_version, payload, created_at)
+SELECT id, routing_key, table_name, op, schema_version, payload, created_at FROM moved
+"""
+
+Submit = Callable[[str, bytes], Awaitable["asyncio.Future[PublishOutcome]"]]
+
+
+class OutboxDrainer:
+    """Drains `domain_events` in `FOR UPDATE SKIP LOCKED` batches.
+
+    Rows are removed (or archived) in one statement once RabbitMQ confirms them; nacked or
+    failed rows stay in the table and are retried on the next pass, and so do the later
+    rows of the same aggregate (even if confirmed), so a retry never lands after a newer
+    event for that row. `submit` is awaited row by row, in id order.
+
+    `SKIP LOCKED` alone would hand rows of one aggregate to different bridges, which then
+    publish them in any order. With `partitions` each bridge only fetches the aggregates it
+    owns, so bridges drain concurrently and per-aggregate order holds. Without them, pass
+    `lock_namespace`: each drain then takes a transaction-scoped advisory lock and bridges
+    take turns, one batch at a time.
+    """
+
+    def __init__(
+        self,
+        conn: asyncpg.Connection,
+        submit: Submit,
+        *,
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+        archive: bool = False,
+        partition_count: int = 0,
+        partitions: Callable[[], Collection[int]] | None = None,
+        lock_namespace: int | None = None,
+    ):
+        self._conn = conn
+        self._submit = submit
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._ack_sql = ARCHIVE_SQL if archive else DELETE_SQL
+        self._partition_count = partition_count
+        self._partitions = partitions
+        self._lock_namespace = lock_namespace
+        self._wakeup = asyncio.Event()
+        self.published = 0
+        self.unconfirmed = 0
+
+    def use_connection(self, conn: asyncpg.Connection) -> None:
+        """Switch to a reconnected session; the next drain runs on it."""
+        self._conn = conn
+
+    def wake(self, *_: Any) -> None:
+        """LISTEN callback for the outbox wake-up channel; the payload is ignored."""
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                fetched, confirmed = await self.drain_once()
+            except Exception as exc:  # noqa: BLE001 - keep draining after transient errors
+                print(f"[event_broker] outbox drain failed: {exc!r}")
+                fetched, confirmed = 0, 0
+            if fetched == self._batch_size and confirmed == fetched:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except TimeoutError:
+                pass
+
+    async def drain_once(self) -> tuple[int, int]:
+        """Publish one batch; returns `(fetched, confirmed)`."""
+        async with self._conn.transaction():
+            if not await self._take_turn():
+                return 0, 0
+            rows = await self._fetch()
+            if not rows:
+                return 0, 0
+            futures = [await self._submit(row["routing_key"], row["body"].encode("utf-8")) for row in rows]
+            outcomes = await asyncio.gather(*futures)
+            confirmed = _ackable(rows, outcomes)
+            if confirmed:
+                await self._conn.execute(self._ack_sql, confirmed)
+        self.published += len(confirmed)
+        self.unconfirmed += len(rows) - len(confirmed)
+        return len(rows), len(confirmed)
+
+    async def _take_turn(self) -> bool:
+        """False while another unpartitioned bridge is draining."""
+        if self._partitions is not None or self._lock_namespace is None:
+            return True
+        return await self._conn.fetchval(DRAIN_LOCK_SQL, self._lock_namespace)
+
+    async def _fetch(self) -> list[Any]:
+        if self._partitions is None:
+            return await self._conn.fetch(FETCH_BATCH_SQL, self._batch_size)
+        owned = sorted(self._partitions())
+        if not owned:
+            return []
+        return await self._conn.fetch(
+            FETCH_PARTITIONS_SQL, self._batch_size, self._partition_count, owned
+        )
+
+
+def _ackable(rows: list[Any], outcomes: list[PublishOutcome]) -> list[int]:
+    """Ids of confirmed rows up to the first unconfirmed row of their aggregate."""
+    blocked: set[str] = set()
+    ackable = []
+    for row, outcome in zip(rows, outcomes):
+        if row["aggregate"] in blocked:
+            continue
+        if outcome is PublishOutcome.CONFIRMED:
+            ackable.append(row["id"])
+        else:
+            blocked.add(row["aggregate"])
+    return ackable
+
+
+__all__ = ["OutboxDrainer"]
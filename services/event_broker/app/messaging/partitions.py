@@ -0,0 +1,155 @@
+import asyncio
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import asyncpg
+
+# Two-key advisory locks: (namespace, partition) for ownership, (namespace + 1, 0) held in
+# shared mode by every live bridge so each one can size its fair share.
+TRY_LOCK_SQL = "SELECT pg_try_advisory_lock($1, $2)"
+UNLOCK_SQL = "SELECT pg_advisory_unlock($1, $2)"
+UNLOCK_ALL_SQL = "SELECT pg_advisory_unlock_all()"
+JOIN_SQL = "SELECT pg_advisory_lock_shared($1, 0)"
+MEMBERS_SQL = """
+SELECT count(DISTINCT pid)
+FROM pg_locks
+WHERE locktype = 'advisory' AND classid::bigint = $1 AND objid = 0 AND objsubid = 2 AND granted
+"""
+
+
+@dataclass(slots=True)
+class PartitionStats:
+    partitions: int
+    owned: list[int]
+    members: int
+    skipped: int
+
+
+def partition_for(envelope: dict[str, Any], count: int) -> int:
+    """Partition of the aggregate an envelope describes: its integer row id modulo `count`.
+
+    Must match the SQL filter in `app.messaging.outbox` so both sources agree on ownership.
+    """
+    row_id = envelope.get("id")
+    if row_id is None:
+        data = envelope.get("data")
+        row_id = data.get("id") if isinstance(data, dict) else None
+    try:
+        return int(row_id) % count
+    except (TypeError, ValueError):
+        return 0
+
+
+class PartitionCoordinator:
+    """Splits the event stream between bridges with Postgres advisory locks.
+
+    Every bridge holds a session on a dedicated connection. It claims free partitions with
+    `pg_try_advisory_lock` up to `ceil(partitions / live bridges)` and releases any surplus,
+    so adding a worker rebalances the load and a dead worker's locks vanish with its session.
+    Locks are exclusive, so each partition has at most one publisher.
+    """
+
+    def __init__(
+        self,
+        conn: asyncpg.Connection,
+        *,
+        partitions: int,
+        namespace: int,
+        rebalance_interval: float = 2.0,
+        on_change: Callable[[frozenset[int]], None] | None = None,
+    ):
+        self._conn = conn
+        self._partitions = partitions
+        self._namespace = namespace
+        self._rebalance_interval = rebalance_interval
+        self._on_change = on_change
+        self._owned: set[int] = set()
+        self._joined = False
+        self.members = 0
+        self.skipped = 0
+
+    @property
+    def owned(self) -> frozenset[int]:
+        return frozenset(self._owned)
+
+    @property
+    def partitions(self) -> int:
+        return self._partitions
+
+    def owns(self, envelope: dict[str, Any]) -> bool:
+        if partition_for(envelope, self._partitions) in self._owned:
+            return True
+        self.skipped += 1
+        return False
+
+    async def join(self) -> None:
+        await self._conn.fetchval(JOIN_SQL, self._namespace + 1)
+        self._joined = True
+        await self.rebalance()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self._rebalance_interval)
+            try:
+                if self._joined:
+                    await self.rebalance()
+                else:
+                    await self.join()
+            except Exception as exc:  # noqa: BLE001 - retry next tick
+                print(f"[event_broker] partition rebalance failed: {exc!r}")
+                await self._reset()
+
+    async def _reset(self) -> None:
+        # The session may have lost its locks; stop publishing rather than risk a second owner,
+        # and drop whatever is still held so a later join starts from a clean lock count.
+        self._joined = False
+        try:
+            await self._conn.fetchval(UNLOCK_ALL_SQL)
+        except Exception:  # noqa: BLE001 - a dead session holds nothing
+            pass
+        if self._owned:
+            self._owned.clear()
+            if self._on_change:
+                self._on_change(self.owned)
+
+    async def rebalance(self) -> frozenset[int]:
+        before = self.owned
+        self.members = max(1, await self._conn.fetchval(MEMBERS_SQL, self._namespace + 1))
+        target = math.ceil(self._partitions / self.members)
+
+        for partition in sorted(self._owned, reverse=True)[: max(0, len(self._owned) - target)]:
+            await self._conn.fetchval(UNLOCK_SQL, self._namespace, partition)
+            self._owned.discard(partition)
+        for partition in range(self._partitions):
+            if len(self._owned) >= target:
+                break
+            if partition in self._owned:
+                continue
+            if await self._conn.fetchval(TRY_LOCK_SQL, self._namespace, partition):
+                self._owned.add(partition)
+
+        owned = self.owned
+        if owned != before:
+            print(f"[event_broker] owning {len(owned)}/{self._partitions} partitions ({self.members} bridges)")
+            if self._on_change:
+                self._on_change(owned)
+        return owned
+
+    def stats(self) -> PartitionStats:
+        return PartitionStats(
+            partitions=self._partitions,
+            owned=sorted(self._owned),
+            members=self.members,
+            skipped=self.skipped,
+        )
+
+    async def close(self) -> None:
+        # Closing the session releases every lock; this only makes the handover immediate.
+        for partition in list(self._owned):
+            await self._conn.fetchval(UNLOCK_SQL, self._namespace, partition)
+        self._owned.clear()
+
+
+__all__ = ["PartitionCoordinator", "PartitionStats", "partition_for"]
@@ -0,0 +1,243 @@
+import asyncio
+import enum
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.messaging.transports import OutgoingMessage, Transport
+
+
+class PublishOutcome(str, enum.Enum):
+    CONFIRMED = "confirmed"
+    NACKED = "nacked"
+    FAILED = "failed"
+    SPOOLED = "spooled"
+
+
+@dataclass(slots=True)
+class BatchResult:
+    """Confirm/nack tally for one flushed batch."""
+
+    size: int
+    confirmed: int = 0
+    nacked: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass(slots=True)
+class PublisherStats:
+    batches: int = 0
+    confirmed: int = 0
+    nacked: int = 0
+    failed: int = 0
+
+
+@dataclass(slots=True)
+class _Pending:
+    message: OutgoingMessage
+    future: asyncio.Future[PublishOutcome]
+    submitted: float = field(default_factory=time.perf_counter)
+
+
+class _Undelivered(Exception):
+    """Some messages of a batch are still neither confirmed nor rejected."""
+
+
+class BatchPublisher:
+    """Sends messages through a `Transport` in size/time bounded batches.
+
+    Messages submitted within `linger` seconds (or until `batch_size` is reached) are
+    flushed together as one `Transport.send`. Batches go out one after another in submit
+    order, each once the previous one is settled, so a later batch never overtakes an
+    earlier one. When a message is not delivered, it and every message after it in the
+    batch are resent with backoff, so nothing is confirmed ahead of an earlier message;
+    rejections (`Transport.rejections`, e.g. a broker nack) are final. `on_message` sees every
+    outcome with its submit-to-answer latency and `on_retry` every retried attempt,
+    both by routing key.
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        *,
+        batch_size: int = 500,
+        linger: float = 0.02,
+        max_in_flight: int = 1000,
+        on_batch: Callable[[BatchResult], None] | None = None,
+        on_message: Callable[[str, PublishOutcome, float], None] | None = None,
+        on_retry: Callable[[str], None] | None = None,
+    ):
+        self.transport = transport
+        self._batch_size = batch_size
+        self._linger = linger
+        self._capacity = asyncio.Semaphore(max_in_flight)
+        self._on_batch = on_batch
+        self._on_message = on_message
+        self._on_retry = on_retry
+        self._buffer: list[_Pending] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+        self._last_batch: asyncio.Task[None] | None = None
+        self.stats = PublisherStats()
+
+    async def start(self) -> None:
+        await self.transport.start()
+
+    def submit(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict[str, str] | None = None,
+        *,
+        content_type: str = "application/json",
+        content_encoding: str | None = None,
+        priority: int | None = None,
+        exchange: str | None = None,
+    ) -> asyncio.Future[PublishOutcome]:
+        """Queue a message for the next batch; the future resolves once the backend answers."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[PublishOutcome] = loop.create_future()
+        message = OutgoingMessage(
+            routing_key,
+            body,
+            headers or {},
+            content_type,
+            content_encoding,
+            priority,
+            exchange,
+        )
+        self._buffer.append(_Pending(message, future))
+        if len(self._buffer) >= self._batch_size:
+            self._flush_buffer()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self._linger, self._flush_buffer)
+        return future
+
+    async def publish(
+        self,
+        routing_key: str,
+        body: bytes,
+        headers: dict[str, str] | None = None,
+        *,
+        content_type: str = "application/json",
+        content_encoding: str | None = None,
+        priority: int | None = None,
+        exchange: str | None = None,
+    ) -> asyncio.Future[PublishOutcome]:
+        """Like `submit`, but waits while `max_in_flight` messages are still unconfirmed."""
+        await self._capacity.acquire()
+        future = self.submit(
+            routing_key,
+            body,
+            headers,
+            content_type=content_type,
+            content_encoding=content_encoding,
+            priority=priority,
+            exchange=exchange,
+        )
+        future.add_done_callback(lambda _: self._capacity.release())
+        return future
+
+    async def flush(self) -> None:
+        """Send whatever is buffered and wait for every outstanding confirm."""
+        self._flush_buffer()
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks)
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def _flush_buffer(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        task = asyncio.create_task(self._send_batch(batch, self._last_batch), name="bridge-publish-batch")
+        self._last_batch = task
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: list[_Pending], previous: asyncio.Task[None] | None) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        started = time.perf_counter()
+        outcomes = await self._deliver(batch)
+        result = BatchResult(
+            size=len(batch),
+            confirmed=outcomes.count(PublishOutcome.CONFIRMED),
+            nacked=outcomes.count(PublishOutcome.NACKED),
+            failed=outcomes.count(PublishOutcome.FAILED),
+            elapsed=time.perf_counter() - started,
+        )
+        self.stats.batches += 1
+        self.stats.confirmed += result.confirmed
+        self.stats.nacked += result.nacked
+        self.stats.failed += result.failed
+        if self._on_batch:
+            self._on_batch(result)
+
+    async def _deliver(self, batch: list[_Pending]) -> list[PublishOutcome]:
+        """Send a batch, resending from the first undelivered message on, and settle every future."""
+        outcomes: list[PublishOutcome] = []
+        remaining = batch
+        errors: list[BaseException | None] = []
+
+        def before_retry(_state: RetryCallState) -> None:
+            if self._on_retry:
+                for pending in remaining:
+                    self._on_retry(pending.message.routing_key)
+
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception_type(_Undelivered),
+                wait=wait_exponential(multiplier=0.2, min=0.5, max=5),
+                stop=stop_after_attempt(3),
+                before_sleep=before_retry,
+                reraise=True,
+            ):
+                with attempt:
+                    try:
+                        replies = await self.transport.send([pending.message for pending in remaining])
+                    except Exception as exc:  # noqa: BLE001 - retried like a per-message error
+                        replies = [exc] * len(remaining)
+                    settled = 0
+                    for pending, error in zip(remaining, replies, strict=True):
+                        if error is None:
+                            outcomes.append(self._settle(pending, PublishOutcome.CONFIRMED))
+                        elif isinstance(error, self.transport.rejections):
+                            outcomes.append(self._settle(pending, PublishOutcome.NACKED))
+                        else:
+                            break
+                        settled += 1
+                    # Later messages may have gone through, but confirming them now would
+                    # put them ahead of the undelivered one; they are resent with it.
+                    remaining, errors = remaining[settled:], replies[settled:]
+                    if remaining:
+                        raise _Undelivered()
+        except _Undelivered:
+            for pending, error in zip(remaining, errors, strict=True):
+                if error is not None:
+                    print(f"[event_broker] publish failed for {pending.message.routing_key}: {error!r}")
+                outcomes.append(self._settle(pending, PublishOutcome.FAILED))
+        return outcomes
+
+    def _settle(self, pending: _Pending, outcome: PublishOutcome) -> PublishOutcome:
+        if self._on_message:
+            self._on_message(pending.message.routing_key, outcome, time.perf_counter() - pending.submitted)
+        if not pending.future.done():
+            pending.future.set_result(outcome)
+        return outcome
+
+
+__all__ = ["BatchPublisher", "BatchResult", "PublishOutcome", "PublisherStats"]
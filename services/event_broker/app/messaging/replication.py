@@ -0,0 +1,386 @@
+import asyncio
+import json
+import struct
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+import asyncpg
+
+from app.messaging.publisher import PublishOutcome
+
+# Mirrors the trigger arguments in the shared_psql migrations.
+ROUTING_KEYS: dict[tuple[str, str], str] = {
+    ("instances", "INSERT"): "instance.created",
+    ("instances", "UPDATE"): "instance.updated",
+    ("instances", "DELETE"): "instance.deleted",
+    ("knowledge_bases", "INSERT"): "knowledge_base.created",
+    ("knowledge_bases", "DELETE"): "knowledge_base.deleted",
+    ("knowledge_base_entries", "INSERT"): "knowledge_base.entry.created",
+    ("knowledge_base_entries", "UPDATE"): "knowledge_base.entry.updated",
+    ("knowledge_base_entries", "DELETE"): "knowledge_base.entry.deleted",
+}
+
+CREATE_SLOT_SQL = """
+SELECT pg_create_logical_replication_slot($1, $2)
+WHERE NOT EXISTS (SELECT 1 FROM pg_replication_slots WHERE slot_name = $1)
+"""
+PEEK_PGOUTPUT_SQL = """
+SELECT lsn::text AS lsn, data
+FROM pg_logical_slot_peek_binary_changes($1, NULL, $2, 'proto_version', '1', 'publication_names', $3)
+"""
+PEEK_WAL2JSON_SQL = """
+SELECT lsn::text AS lsn, data
+FROM pg_logical_slot_peek_changes(
+    $1, NULL, $2, 'format-version', '2', 'include-types', 'true', 'include-lsn', 'true'
+)
+"""
+ADVANCE_SQL = "SELECT pg_replication_slot_advance($1, $2::pg_lsn)"
+
+
+def parse_lsn(lsn: str) -> int:
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def format_lsn(value: int) -> str:
+    return f"{value >> 32:X}/{value & 0xFFFFFFFF:X}"
+
+
+@dataclass(slots=True)
+class WalRecord:
+    lsn: str
+    data: bytes | str
+
+
+@dataclass(slots=True)
+class Change:
+    table: str
+    op: str
+    data: dict[str, Any]
+
+
+@dataclass(slots=True)
+class Commit:
+    end_lsn: str
+
+
+class ChangeFeed(Protocol):
+    async def peek(self, limit: int) -> list[WalRecord]: ...
+
+    async def advance(self, lsn: str) -> None: ...
+
+
+class SlotChangeFeed:
+    """Reads a logical replication slot with the SQL peek/advance functions."""
+
+    def __init__(self, conn: asyncpg.Connection, slot: str, plugin: str, publication: str):
+        self._conn = conn
+        self._slot = slot
+        self._plugin = plugin
+        self._publication = publication
+
+    def use_connection(self, conn: asyncpg.Connection) -> None:
+        self._conn = conn
+
+    async def ensure_slot(self) -> None:
+        await self._conn.execute(CREATE_SLOT_SQL, self._slot, self._plugin)
+
+    async def peek(self, limit: int) -> list[WalRecord]:
+        if self._plugin == "pgoutput":
+            rows = await self._conn.fetch(PEEK_PGOUTPUT_SQL, self._slot, limit, self._publication)
+        else:
+            rows = await self._conn.fetch(PEEK_WAL2JSON_SQL, self._slot, limit)
+        return [WalRecord(row["lsn"], row["data"]) for row in rows]
+
+    async def advance(self, lsn: str) -> None:
+        await self._conn.execute(ADVANCE_SQL, self._slot, lsn)
+
+
+class RecordedChangeFeed:
+    """Replays recorded slot output; behaves like a slot that only moves on `advance`.
+
+    Recordings are JSON lines of `{"lsn": ..., "data": ...}` (wal2json) or
+    `{"lsn": ..., "data_hex": ...}` (pgoutput).
+    """
+
+    def __init__(self, records: Iterable[WalRecord]):
+        self._records = list(records)
+        self.confirmed_lsn: str | None = None
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "RecordedChangeFeed":
+        records = []
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            data = bytes.fromhex(item["data_hex"]) if "data_hex" in item else item["data"]
+            records.append(WalRecord(item["lsn"], data))
+        return cls(records)
+
+    async def peek(self, limit: int) -> list[WalRecord]:
+        # Like the server, `limit` is a soft bound: the current transaction is always finished.
+        batch: list[WalRecord] = []
+        for record in self._records:
+            batch.append(record)
+            if len(batch) >= limit and _is_commit(record):
+                break
+        return batch
+
+    async def advance(self, lsn: str) -> None:
+        self.confirmed_lsn = lsn
+        target = parse_lsn(lsn)
+        self._records = [record for record in self._records if parse_lsn(record.lsn) >= target]
+
+
+def _is_commit(record: WalRecord) -> bool:
+    if isinstance(record.data, bytes):
+        return record.data[:1] == b"C"
+    return json.loads(record.data).get("action") == "C"
+
+
+class Wal2JsonDecoder:
+    """Decodes wal2json `format-version` 2 records."""
+
+    _ops = {"I": "INSERT", "U": "UPDATE", "D": "DELETE"}
+
+    def decode(self, record: WalRecord) -> Change | Commit | None:
+        message = json.loads(record.data)
+        action = message.get("action")
+        if action == "C":
+            next_lsn = message.get("nextlsn")
+            return Commit(next_lsn or format_lsn(parse_lsn(record.lsn) + 1))
+        op = self._ops.get(action)
+        if op is None:
+            return None
+        columns = message.get("columns") or message.get("identity") or []
+        data = {
+            column["name"]: _convert_value(column.get("type", ""), column["value"]) for column in columns
+        }
+        return Change(table=message["table"], op=op, data=data)
+
+
+class PgOutputDecoder:
+    """Decodes pgoutput protocol v1 messages (text tuple values only)."""
+
+    # Builtin type OIDs that need conversion from their text form.
+    _int_oids = {20, 21, 23}
+    _float_oids = {700, 701}
+    _json_oids = {114, 3802}
+    _timestamp_oids = {1114, 1184}
+    _bool_oid = 16
+
+    def __init__(self) -> None:
+        self._relations: dict[int, tuple[str, list[tuple[str, int]]]] = {}
+
+    def decode(self, record: WalRecord) -> Change | Commit | None:
+        data = record.data if isinstance(record.data, bytes) else bytes.fromhex(record.data)
+        kind, body = data[:1], memoryview(data)[1:]
+        if kind == b"R":
+            self._decode_relation(body)
+            return None
+        if kind == b"C":
+            _flags, _commit_lsn, end_lsn, _ts = struct.unpack_from("!bQQq", body)
+            return Commit(format_lsn(end_lsn))
+        if kind == b"I":
+            (relid,) = struct.unpack_from("!I", body)
+            values, _ = self._decode_tuple(relid, body, 5)
+            return self._change(relid, "INSERT", values)
+        if kind == b"U":
+            (relid,) = struct.unpack_from("!I", body)
+            offset, old = 4, {}
+            if body[offset : offset + 1] in (b"K", b"O"):
+                # REPLICA IDENTITY FULL ships the whole old row, which is where unchanged
+                # TOAST columns of the new tuple take their value from.
+                old, offset = self._decode_tuple(relid, body, offset + 1)
+            values, _ = self._decode_tuple(relid, body, offset + 1, unchanged=old)
+            return self._change(relid, "UPDATE", values)
+        if kind == b"D":
+            (relid,) = struct.unpack_from("!I", body)
+            values, _ = self._decode_tuple(relid, body, 5)
+            return self._change(relid, "DELETE", values)
+        return None
+
+    def _change(self, relid: int, op: str, values: dict[str, Any]) -> Change:
+        return Change(table=self._relations[relid][0], op=op, data=values)
+
+    def _decode_relation(self, body: memoryview) -> None:
+        (relid,) = struct.unpack_from("!I", body)
+        offset = 4
+        _namespace, offset = _read_cstring(body, offset)
+        name, offset = _read_cstring(body, offset)
+        offset += 1  # replica identity setting
+        (ncols,) = struct.unpack_from("!h", body, offset)
+        offset += 2
+        columns = []
+        for _ in range(ncols):
+            offset += 1  # flags
+            column, offset = _read_cstring(body, offset)
+            type_oid, _typmod = struct.unpack_from("!Ii", body, offset)
+            offset += 8
+            columns.append((column, type_oid))
+        self._relations[relid] = (name, columns)
+
+    def _decode_tuple(
+        self, relid: int, body: memoryview, offset: int, unchanged: dict[str, Any] | None = None
+    ) -> tuple[dict[str, Any], int]:
+        """Column values of a tuple and the offset after it.
+
+        Unchanged TOAST values (`u`) are not shipped; they are taken from `unchanged`
+        (the old tuple of an update) and left out if it does not have them.
+        """
+        _, columns = self._relations[relid]
+        (ncols,) = struct.unpack_from("!h", body, offset)
+        offset += 2
+        values: dict[str, Any] = {}
+        for index in range(ncols):
+            name, type_oid = columns[index]
+            kind = body[offset : offset + 1].tobytes()
+            offset += 1
+            if kind == b"n":
+                values[name] = None
+            elif kind == b"t":
+                (length,) = struct.unpack_from("!i", body, offset)
+                offset += 4
+                text = body[offset : offset + length].tobytes().decode("utf-8")
+                offset += length
+                values[name] = self._convert(type_oid, text)
+            elif kind == b"u" and unchanged and name in unchanged:
+                values[name] = unchanged[name]
+        return values, offset
+
+    def _convert(self, type_oid: int, text: str) -> Any:
+        if type_oid in self._int_oids:
+            return int(text)
+        if type_oid in self._float_oids:
+            return float(text)
+        if type_oid == self._bool_oid:
+            return text == "t"
+        if type_oid in self._json_oids:
+            return json.loads(text)
+        if type_oid in self._timestamp_oids:
+            return text.replace(" ", "T", 1)
+        return text
+
+
+def _read_cstring(body: memoryview, offset: int) -> tuple[str, int]:
+    end = offset
+    while body[end] != 0:
+        end += 1
+    return body[offset:end].tobytes().decode("utf-8"), end + 1
+
+
+def _convert_value(type_name: str, value: Any) -> Any:
+    if type_name in ("json", "jsonb") and isinstance(value, str):
+        return json.loads(value)
+    if type_name.startswith("timestamp") and isinstance(value, str):
+        return value.replace(" ", "T", 1)
+    return value
+
+
+def build_envelope(change: Change) -> tuple[str, bytes] | None:
+    routing_key = ROUTING_KEYS.get((change.table, change.op))
+    if routing_key is None:
+        return None
+    envelope = {
+        "routing_key": routing_key,
+        "table": change.table,
+        "op": change.op,
+        "schema_version": 1,
+        "data": change.data,
+    }
+    return routing_key, json.dumps(envelope).encode("utf-8")
+
+
+Submit = Callable[[str, bytes], Awaitable["asyncio.Future[PublishOutcome]"]]
+
+
+@dataclass(slots=True)
+class _Transaction:
+    futures: list["asyncio.Future[PublishOutcome]"] = field(default_factory=list)
+    end_lsn: str | None = None
+
+
+class ReplicationSource:
+    """Turns logical decoding output into bridge envelopes.
+
+    The slot is advanced to a transaction's end LSN only after every event of that
+    transaction (and of all earlier ones) is confirmed by RabbitMQ, so a crash replays
+    at most the unconfirmed tail.
+    """
+
+    def __init__(
+        self,
+        feed: ChangeFeed,
+        submit: Submit,
+        *,
+        plugin: str = "pgoutput",
+        batch_size: int = 500,
+        poll_interval: float = 0.2,
+        active: Callable[[], bool] | None = None,
+    ):
+        self._feed = feed
+        self._submit = submit
+        self._decoder = PgOutputDecoder() if plugin == "pgoutput" else Wal2JsonDecoder()
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._active = active
+        self.published = 0
+        self.confirmed_lsn: str | None = None
+
+    async def run(self) -> None:
+        while True:
+            if self._active is not None and not self._active():
+                # A slot has a single reader: only the bridge that holds the leader
+                # partition decodes it.
+                await asyncio.sleep(self._poll_interval)
+                continue
+            try:
+                records = await self.poll_once()
+            except Exception as exc:  # noqa: BLE001 - keep polling after transient errors
+                print(f"[event_broker] replication poll failed: {exc!r}")
+                records = 0
+            if records < self._batch_size:
+                await asyncio.sleep(self._poll_interval)
+
+    async def poll_once(self) -> int:
+        """Publish one peeked batch; returns the number of WAL records read."""
+        records = await self._feed.peek(self._batch_size)
+        transactions: list[_Transaction] = []
+        current = _Transaction()
+        for record in records:
+            decoded = self._decoder.decode(record)
+            if isinstance(decoded, Commit):
+                current.end_lsn = decoded.end_lsn
+                transactions.append(current)
+                current = _Transaction()
+            elif isinstance(decoded, Change):
+                message = build_envelope(decoded)
+                if message is not None:
+                    current.futures.append(await self._submit(*message))
+
+        advance_to: str | None = None
+        for transaction in transactions:
+            outcomes = await asyncio.gather(*transaction.futures)
+            if any(outcome is not PublishOutcome.CONFIRMED for outcome in outcomes):
+                break
+            self.published += len(outcomes)
+            advance_to = transaction.end_lsn
+        if advance_to is not None:
+            await self._feed.advance(advance_to)
+            self.confirmed_lsn = advance_to
+        return len(records)
+
+
+__all__ = [
+    "ChangeFeed",
+    "PgOutputDecoder",
+    "RecordedChangeFeed",
+    "ReplicationSource",
+    "SlotChangeFeed",
+    "Wal2JsonDecoder",
+    "WalRecord",
+    "build_envelope",
+]
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.messaging.diffs import FULL_ROW_SUFFIX, is_diff, merge_diff
+
+# `position` is the envelope's ordering stamp: `seq` (notify, claim_check) or `event_id`
+# (outbox); replication envelopes carry neither and are applied in arrival order.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    key TEXT PRIMARY KEY,
+    routing_key TEXT NOT NULL,
+    position INTEGER,
+    deleted INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshot_tombstones ON snapshot (updated_at) WHERE deleted = 1;
+"""
+
+# Older events (a catch-up replay, a spool redelivery) never overwrite newer state.
+UPSERT_SQL = """
+INSERT INTO snapshot (key, routing_key, position, deleted, payload, updated_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    routing_key = excluded.routing_key,
+    position = excluded.position,
+    deleted = excluded.deleted,
+    payload = excluded.payload,
+    updated_at = excluded.updated_at
+WHERE snapshot.position IS NULL OR excluded.position IS NULL OR excluded.position >= snapshot.position
+"""
+
+PURGE_SQL = "DELETE FROM snapshot WHERE deleted = 1 AND updated_at < ?"
+PAGE_SQL = """
+SELECT key, position, deleted, payload FROM snapshot
+WHERE key > ? AND key >= ? AND key < ? AND (deleted = 0 OR ?)
+ORDER BY key
+LIMIT ?
+"""
+STORED_SQL = "SELECT key, payload FROM snapshot WHERE deleted = 0 AND key IN ({})"
+COUNTS_SQL = "SELECT max(position), count(*) - coalesce(sum(deleted), 0), coalesce(sum(deleted), 0) FROM snapshot"
+_KEY_END = "\U0010ffff"
+_LOOKUP_CHUNK = 500
+
+
+@dataclass(slots=True)
+class SnapshotStats:
+    path: str
+    live: int
+    tombstones: int
+    applied: int
+    skipped: int
+    pending: int
+    purged: int
+    high_position: int | None
+
+
+def aggregate_key(envelope: dict[str, Any]) -> str | None:
+    """`<table>:<id>` of the row an envelope describes, or None if it has no id."""
+    table = envelope.get("table")
+    row = envelope.get("data") or envelope.get("tombstone") or envelope
+    row_id = row.get("id") if isinstance(row, dict) else None
+    if not table or row_id is None:
+        return None
+    return f"{table}:{row_id}"
+
+
+class SnapshotStore:
+    """Latest envelope per aggregate in a SQLite file, with deletes kept as tombstones.
+
+    `apply` only queues the event (raw body bytes or an already-parsed envelope), so it is
+    safe to call on the event loop; `flush` parses the queue and writes it in one
+    transaction and is meant to run in a thread (`maintain_periodically` does so every
+    `SNAPSHOT_FLUSH_INTERVAL_MS`, or as soon as `flush_batch` events are queued).
+    WAL mode lets several workers write the same file and lets `bootstrap` read a
+    consistent view while writes continue. Tombstones older than `tombstone_ttl` seconds
+    are purged, so a bootstrap costs O(live aggregates). Column diffs (see
+    `app.messaging.diffs`) are merged into the stored row when flushed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        tombstone_ttl: float = 86_400,
+        flush_batch: int = 500,
+        page_size: int = 1000,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tombstone_ttl = tombstone_ttl
+        self._flush_batch = flush_batch
+        self._page_size = page_size
+        # Written from whichever thread runs `flush`/`purge_tombstones`, one at a time.
+        self._conn = _connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._write_lock = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._queue: list[tuple[dict[str, Any] | bytes, float]] = []
+        self.backlog = asyncio.Event()
+        self.applied = 0
+        self.skipped = 0
+        self.purged = 0
+        self._counts = self._conn.execute(COUNTS_SQL).fetchone()
+
+    def apply(self, envelope: dict[str, Any] | bytes) -> None:
+        """Queue an event for the next flush; raw bodies are parsed there, off the loop."""
+        with self._queue_lock:
+            self._queue.append((envelope, time.time()))
+            queued = len(self._queue)
+        if queued >= self._flush_batch:
+            self.backlog.set()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._queue_lock:
+                queued, self._queue = self._queue, []
+            if not queued:
+                return
+            pending = self._expand(queued)
+            if pending:
+                with self._conn:
+                    rows = self._resolve_diffs(pending)
+                    self._conn.executemany(UPSERT_SQL, rows)
+                self._counts = self._conn.execute(COUNTS_SQL).fetchone()
+            self.applied += len(pending)
+
+    def _expand(self, queued: list[tuple[dict[str, Any] | bytes, float]]) -> list[tuple[Any, ...]]:
+        """Upsert rows for queued events; statement batches forwarded as one message apply per row."""
+        pending: list[tuple[Any, ...]] = []
+        for raw, applied_at in queued:
+            envelope = json.loads(raw) if isinstance(raw, (bytes, str)) else raw
+            rows = envelope.get("rows")
+            if isinstance(rows, list):
+                head = {key: value for key, value in envelope.items() if key != "rows"}
+                head["routing_key"] = head.get("routing_key", "").removesuffix(".batch")
+                expanded = [{**head, "batch_index": index, "data": row} for index, row in enumerate(rows)]
+            else:
+                expanded = [envelope]
+            for event in expanded:
+                key = aggregate_key(event)
+                if key is None or event.get("routing_key", "").endswith(FULL_ROW_SUFFIX):
+                    # Full-row copies repeat a diff that was already applied.
+                    self.skipped += 1
+                    continue
+                position = event.get("seq", event.get("event_id"))
+                deleted = int(event.get("op") == "DELETE")
+                pending.append((key, event.get("routing_key", ""), position, deleted, event, applied_at))
+        return pending
+
+    def _resolve_diffs(self, pending: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+        """Serialises pending envelopes, merging each diff into the latest row for its key."""
+        diff_keys = list({key for key, *_, envelope, _ in pending if is_diff(envelope)})
+        latest: dict[str, dict[str, Any]] = {}
+        for start in range(0, len(diff_keys), _LOOKUP_CHUNK):
+            chunk = diff_keys[start : start + _LOOKUP_CHUNK]
+            sql = STORED_SQL.format(", ".join("?" * len(chunk)))
+            latest.update((key, json.loads(payload)) for key, payload in self._conn.execute(sql, chunk))
+        rows = []
+        for key, routing_key, position, deleted, envelope, applied_at in pending:
+            if key in latest and is_diff(envelope):
+                envelope = merge_diff(latest[key], envelope)
+            latest[key] = envelope
+            payload = json.dumps(envelope, separators=(",", ":"), default=str)
+            rows.append((key, routing_key, position, deleted, payload, applied_at))
+        return rows
+
+    def purge_tombstones(self) -> int:
+        with self._write_lock:
+            with self._conn:
+                purged = self._conn.execute(PURGE_SQL, (time.time() - self._tombstone_ttl,)).rowcount
+            self._counts = self._conn.execute(COUNTS_SQL).fetchone()
+        self.purged += purged
+        return purged
+
+    def bootstrap(self, *, prefix: str = "", include_tombstones: bool = False) -> Iterator[str]:
+        """NDJSON lines of the current entries, then one `handoff` line.
+
+        Runs in one read transaction on its own connection, so every page and the handoff
+        come from the same view; `handoff.position` is the highest position in it. A consumer
+        that bound its live queue before bootstrapping applies a live event only if its
+        `seq`/`event_id` is above the position it received for that key (or the key was absent).
+        """
+        # Starlette iterates sync generators in a thread pool, one `next()` per worker thread.
+        conn = _connect(self.path, autocommit=True, check_same_thread=False)
+        try:
+            conn.execute("BEGIN")
+            high, live, tombstones = conn.execute(COUNTS_SQL).fetchone()
+            after, end = "", (prefix + _KEY_END) if prefix else _KEY_END
+            sent = 0
+            while True:
+                rows = conn.execute(PAGE_SQL, (after, prefix, end, include_tombstones, self._page_size)).fetchall()
+                for key, position, deleted, payload in rows:
+                    yield (
+                        f'{{"key":{json.dumps(key)},"position":{json.dumps(position)},'
+                        f'"deleted":{"true" if deleted else "false"},"event":{payload}}}\n'
+                    )
+                sent += len(rows)
+                if len(rows) < self._page_size:
+                    break
+                after = rows[-1][0]
+            handoff = {"position": high, "entries": sent, "live": live, "tombstones": tombstones}
+            yield json.dumps({"handoff": handoff}) + "\n"
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+
+    def stats(self) -> SnapshotStats:
+        """Counters as of the last flush or purge; never touches the file."""
+        high, live, tombstones = self._counts
+        return SnapshotStats(
+            path=str(self.path),
+            live=live,
+            tombstones=tombstones,
+            applied=self.applied,
+            skipped=self.skipped,
+            pending=len(self._queue),
+            purged=self.purged,
+            high_position=high,
+        )
+
+    def close(self) -> None:
+        self.flush()
+        with self._write_lock:
+            self._conn.close()
+
+
+def _connect(path: Path, *, autocommit: bool = False, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    if not autocommit:
+        conn.isolation_level = "DEFERRED"
+    return conn
+
+
+async def maintain_periodically(store: SnapshotStore, flush_interval: float, purge_interval: float = 60.0) -> None:
+    """Flushes every `flush_interval` (or once `flush_batch` events are queued) and purges
+    expired tombstones, both in a worker thread so SQLite I/O never blocks the loop."""
+    last_purge = time.monotonic()
+    while True:
+        try:
+            await asyncio.wait_for(store.backlog.wait(), flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        store.backlog.clear()
+        await asyncio.to_thread(store.flush)
+        if time.monotonic() - last_purge >= purge_interval:
+            await asyncio.to_thread(store.purge_tombstones)
+            last_purge = time.monotonic()
+
+
+__all__ = [
+    "SnapshotStats",
+    "SnapshotStore",
+    "aggregate_key",
+    "maintain_periodically",
+]
@@ -0,0 +1,317 @@
+import asyncio
+import fcntl
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+# Frame: payload length, crc32 of the payload, payload.
+_FRAME = struct.Struct("!II")
+_SEGMENT_GLOB = "segment-*.log"
+_CURSOR_FILE = "cursor"
+_LOCK_FILE = "lock"
+
+
+class SpoolFull(Exception):
+    """Raised by `DiskSpool.append` when a record would exceed `max_bytes`."""
+
+
+class SpoolLocked(Exception):
+    """Raised by `DiskSpool.open` when another process owns the directory."""
+
+
+@dataclass(slots=True, frozen=True)
+class SpoolPosition:
+    segment: int
+    offset: int
+
+
+@dataclass(slots=True)
+class SpoolStats:
+    segments: int
+    bytes: int
+    max_bytes: int
+    pending: int
+    appended: int
+    drained: int
+    rejected: int
+    recovered: int
+    drain_rate_per_s: float
+
+
+class DiskSpool:
+    """Append-only, segmented on-disk FIFO of byte records.
+
+    Records are CRC-framed and appended to `segment-<n>.log` files that roll over at
+    `segment_bytes`. Writes are flushed to the OS immediately; `append` never fsyncs but
+    sets `backlog` once `fsync_batch` records are unsynced. `sync()` blocks on the disk and
+    is meant to run in a thread (`sync_periodically` does so every few milliseconds, or as
+    soon as `backlog` is set), so a crash loses at most the unsynced tail. The read cursor
+    is persisted on `commit`; fully consumed segments are deleted. On open, segments are
+    rescanned, a torn trailing frame is truncated, and reading resumes at the committed
+    cursor.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        max_bytes: int = 512 * 1024 * 1024,
+        segment_bytes: int = 16 * 1024 * 1024,
+        fsync_batch: int = 256,
+    ):
+        self._dir = Path(directory)
+        self._max_bytes = max_bytes
+        self._segment_bytes = segment_bytes
+        self._fsync_batch = fsync_batch
+        self._segments: list[int] = []
+        self._sizes: dict[int, int] = {}
+        self._writer = None
+        self._lock = None
+        # Segments rolled over but not yet fsynced; `sync` fsyncs and closes them.
+        self._retired: deque[BinaryIO] = deque()
+        self._sync_lock = threading.Lock()
+        self._synced = 0
+        self.backlog = asyncio.Event()
+        self._read = SpoolPosition(0, 0)
+        self._drained_at: deque[tuple[float, int]] = deque(maxlen=64)
+        self.pending = 0
+        self.appended = 0
+        self.drained = 0
+        self.rejected = 0
+        self.recovered = 0
+
+    def open(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._lock = (self._dir / _LOCK_FILE).open("a")
+        try:
+            fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock.close()
+            self._lock = None
+            raise SpoolLocked(str(self._dir)) from None
+        self._segments = sorted(int(path.stem.split("-")[1]) for path in self._dir.glob(_SEGMENT_GLOB))
+        cursor = self._load_cursor()
+        for segment in list(self._segments):
+            if segment < cursor.segment:
+                self._path(segment).unlink(missing_ok=True)
+                self._segments.remove(segment)
+                continue
+            valid, records = self._scan(segment, cursor.offset if segment == cursor.segment else 0)
+            self._sizes[segment] = valid
+            self.pending += records
+        if not self._segments:
+            self._segments = [cursor.segment if cursor.segment else 1]
+            self._sizes[self._segments[0]] = 0
+            cursor = SpoolPosition(self._segments[0], 0)
+        elif cursor.segment not in self._sizes:
+            cursor = SpoolPosition(self._segments[0], 0)
+        elif cursor.offset > self._sizes[cursor.segment]:
+            # The segment was reset after a full drain but the cursor write did not land.
+            cursor = SpoolPosition(cursor.segment, 0)
+        self._read = cursor
+        self.recovered = self.pending
+        self._writer = self._path(self._segments[-1]).open("ab")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.sync()
+            with self._sync_lock:
+                self._writer.close()
+                self._writer = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def append(self, record: bytes) -> None:
+        assert self._writer is not None, "spool is not open"
+        frame = _FRAME.pack(len(record), zlib.crc32(record)) + record
+        if self.size_bytes + len(frame) > self._max_bytes:
+            self.rejected += 1
+            raise SpoolFull(f"spool at {self.size_bytes} bytes, limit {self._max_bytes}")
+        active = self._segments[-1]
+        if self._sizes[active] and self._sizes[active] + len(frame) > self._segment_bytes:
+            active = self._roll()
+        self._writer.write(frame)
+        self._writer.flush()
+        self._sizes[active] += len(frame)
+        self.pending += 1
+        self.appended += 1
+        if self.unsynced >= self._fsync_batch:
+            self.backlog.set()
+
+    @property
+    def unsynced(self) -> int:
+        return self.appended - self._synced
+
+    def sync(self) -> None:
+        """fsync everything appended so far; blocks on the disk, so run it in a thread."""
+        with self._sync_lock:
+            appended, writer = self.appended, self._writer
+            while self._retired:
+                handle = self._retired[0]
+                os.fsync(handle.fileno())
+                handle.close()
+                self._retired.popleft()
+            # `writer` may have been retired (and synced above) since it was read.
+            if writer is not None and not writer.closed and appended > self._synced:
+                os.fsync(writer.fileno())
+            self._synced = appended
+
+    def read(self, limit: int) -> list[tuple[bytes, SpoolPosition]]:
+        """Up to `limit` records from the head, each with the position just past it."""
+        records: list[tuple[bytes, SpoolPosition]] = []
+        position = self._read
+        while len(records) < limit:
+            if position.offset >= self._sizes.get(position.segment, 0):
+                later = [segment for segment in self._segments if segment > position.segment]
+                if not later:
+                    break
+                position = SpoolPosition(later[0], 0)
+                continue
+            with self._path(position.segment).open("rb") as handle:
+                handle.seek(position.offset)
+                end = self._sizes[position.segment]
+                offset = position.offset
+                while len(records) < limit and offset < end:
+                    length, _crc = _FRAME.unpack(handle.read(_FRAME.size))
+                    record = handle.read(length)
+                    offset += _FRAME.size + length
+                    records.append((record, SpoolPosition(position.segment, offset)))
+                position = SpoolPosition(position.segment, offset)
+        return records
+
+    def commit(self, position: SpoolPosition, count: int) -> None:
+        """Mark everything before `position` as delivered."""
+        self._read = position
+        self.pending = max(0, self.pending - count)
+        self.drained += count
+        self._drained_at.append((time.monotonic(), count))
+        for segment in [s for s in self._segments if s < position.segment]:
+            self._path(segment).unlink(missing_ok=True)
+            self._segments.remove(segment)
+            self._sizes.pop(segment, None)
+        if not self.pending and position.segment == self._segments[-1]:
+            # Everything delivered: start the active segment over instead of growing it.
+            self._writer.truncate(0)
+            self._writer.seek(0)
+            self._sizes[position.segment] = 0
+            self._read = SpoolPosition(position.segment, 0)
+        self._store_cursor(self._read)
+
+    def stats(self) -> SpoolStats:
+        return SpoolStats(
+            segments=len(self._segments),
+            bytes=self.size_bytes,
+            max_bytes=self._max_bytes,
+            pending=self.pending,
+            appended=self.appended,
+            drained=self.drained,
+            rejected=self.rejected,
+            recovered=self.recovered,
+            drain_rate_per_s=round(self._drain_rate(), 1),
+        )
+
+    def _drain_rate(self, window: float = 10.0) -> float:
+        now = time.monotonic()
+        recent = [(at, count) for at, count in self._drained_at if now - at <= window]
+        if not recent:
+            return 0.0
+        span = max(now - recent[0][0], 1e-3)
+        return sum(count for _, count in recent) / span
+
+    def _roll(self) -> int:
+        assert self._writer is not None
+        self._retired.append(self._writer)
+        segment = self._segments[-1] + 1
+        self._segments.append(segment)
+        self._sizes[segment] = 0
+        self._writer = self._path(segment).open("ab")
+        return segment
+
+    def _scan(self, segment: int, start: int) -> tuple[int, int]:
+        """Validate frames from `start`; truncates a torn tail. Returns `(valid_size, records)`."""
+        path = self._path(segment)
+        records = 0
+        start = min(start, path.stat().st_size)
+        with path.open("r+b") as handle:
+            handle.seek(start)
+            offset = start
+            while True:
+                header = handle.read(_FRAME.size)
+                if len(header) < _FRAME.size:
+                    break
+                length, crc = _FRAME.unpack(header)
+                record = handle.read(length)
+                if len(record) < length or zlib.crc32(record) != crc:
+                    break
+                offset += _FRAME.size + length
+                records += 1
+            if offset != path.stat().st_size:
+                print(f"[event_broker] spool {path.name}: truncating torn tail at byte {offset}")
+                handle.truncate(offset)
+        return offset, records
+
+    def _path(self, segment: int) -> Path:
+        return self._dir / f"segment-{segment:012d}.log"
+
+    def _load_cursor(self) -> SpoolPosition:
+        path = self._dir / _CURSOR_FILE
+        if not path.exists():
+            return SpoolPosition(0, 0)
+        segment, offset = path.read_text().split()
+        return SpoolPosition(int(segment), int(offset))
+
+    def _store_cursor(self, position: SpoolPosition) -> None:
+        tmp = self._dir / f"{_CURSOR_FILE}.tmp"
+        tmp.write_text(f"{position.segment} {position.offset}")
+        os.replace(tmp, self._dir / _CURSOR_FILE)
+
+
+def open_worker_spool(base: str | Path, **options: int) -> DiskSpool:
+    """Open the first free `worker-<n>` spool under `base`.
+
+    Every uvicorn worker gets its own directory, held by an exclusive `flock`. A restarted
+    or surviving worker takes over a directory whose owner died, including its backlog.
+    """
+    for index in range(64):
+        spool = DiskSpool(Path(base) / f"worker-{index}", **options)
+        try:
+            spool.open()
+        except SpoolLocked:
+            continue
+        return spool
+    raise SpoolLocked(f"no free spool directory under {base}")
+
+
+async def sync_periodically(spool: DiskSpool, interval: float) -> None:
+    """Bounds how long an appended record can sit unsynced; fsyncs in a worker thread so the
+    disk never blocks the loop."""
+    while True:
+        try:
+            await asyncio.wait_for(spool.backlog.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        spool.backlog.clear()
+        if spool.unsynced:
+            await asyncio.to_thread(spool.sync)
+
+
+__all__ = [
+    "DiskSpool",
+    "SpoolFull",
+    "SpoolLocked",
+    "SpoolPosition",
+    "SpoolStats",
+    "open_worker_spool",
+    "sync_periodically",
+]
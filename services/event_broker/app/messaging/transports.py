@@ -0,0 +1,216 @@
+import asyncio
+import json
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Protocol
+
+import aio_pika
+from aio_pika.exceptions import DeliveryError
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.messaging.lanes import topic_matches
+
+RABBITMQ = "rabbitmq"
+REDIS_STREAMS = "redis"
+TRANSPORTS = (RABBITMQ, REDIS_STREAMS)
+
+
+@dataclass(slots=True)
+class OutgoingMessage:
+    routing_key: str
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    content_type: str = "application/json"
+    content_encoding: str | None = None
+    priority: int | None = None
+    exchange: str | None = None
+
+
+class Transport(Protocol):
+    """Where `BatchPublisher` sends a flushed batch.
+
+    `send` returns one entry per message: `None` once the backend has accepted it, or the
+    error. Errors that are instances of `rejections` are final (reported as NACKED);
+    anything else is retried by the publisher.
+    """
+
+    name: str
+    rejections: tuple[type[BaseException], ...]
+
+    async def start(self) -> None: ...
+
+    async def send(self, messages: Sequence[OutgoingMessage]) -> list[BaseException | None]: ...
+
+
+class RabbitMqTransport:
+    """Publishes each message to a topic exchange (or a declared extra exchange) and awaits
+    its publisher confirm; a batch is published concurrently, bounded by `max_in_flight`."""
+
+    name = RABBITMQ
+    rejections: tuple[type[BaseException], ...] = (DeliveryError,)
+
+    def __init__(
+        self,
+        channel: aio_pika.abc.AbstractChannel,
+        exchange_name: str,
+        *,
+        extra_exchanges: Mapping[str, aio_pika.ExchangeType] | None = None,
+        max_in_flight: int = 1000,
+    ):
+        self._channel = channel
+        self._exchange_name = exchange_name
+        self._extra_exchanges = dict(extra_exchanges or {})
+        self._exchange: aio_pika.abc.AbstractExchange | None = None
+        self._exchanges: dict[str, aio_pika.abc.AbstractExchange] = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def start(self) -> None:
+        self._exchange = await self._channel.declare_exchange(
+            self._exchange_name, aio_pika.ExchangeType.TOPIC
+        )
+        for name, kind in self._extra_exchanges.items():
+            self._exchanges[name] = await self._channel.declare_exchange(name, kind)
+
+    async def send(self, messages: Sequence[OutgoingMessage]) -> list[BaseException | None]:
+        return await asyncio.gather(*(self._publish(message) for message in messages), return_exceptions=True)
+
+    async def _publish(self, message: OutgoingMessage) -> None:
+        assert self._exchange is not None
+        exchange = self._exchanges[message.exchange] if message.exchange else self._exchange
+        async with self._in_flight:
+            await exchange.publish(
+                aio_pika.Message(
+                    body=message.body,
+                    content_type=message.content_type,
+                    content_encoding=message.content_encoding,
+                    headers=message.headers or None,
+                    priority=message.priority,
+                ),
+                routing_key=message.routing_key,
+            )
+
+
+class RedisStreamsTransport:
+    """Appends messages to Redis streams with one pipelined round trip per batch.
+
+    The stream key comes from `stream_key`, formatted with `routing_key` and `domain` (the
+    first routing key segment), e.g. `events:{domain}` puts every `instance.*` event in
+    `events:instance`, in publish order. Each XADD trims the stream to about `maxlen`
+    entries. The consumer `groups` are created (at the stream tail, with MKSTREAM) before
+    the first append to a stream, so a group never misses an entry written after the bridge
+    started. AMQP priority and exchange have no stream equivalent and are ignored.
+    """
+
+    name = REDIS_STREAMS
+    rejections: tuple[type[BaseException], ...] = (ResponseError,)
+
+    def __init__(
+        self,
+        client: Redis,
+        *,
+        stream_key: str = "events:{domain}",
+        maxlen: int | None = 100_000,
+        groups: Sequence[str] = (),
+    ):
+        self._client = client
+        self._stream_key = stream_key
+        self._maxlen = maxlen
+        self._groups = tuple(groups)
+        self._ready: set[str] = set()
+        self.connected = False
+
+    async def start(self) -> None:
+        await self._client.ping()
+        self.connected = True
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stream_for(self, routing_key: str) -> str:
+        return self._stream_key.format(routing_key=routing_key, domain=routing_key.split(".", 1)[0])
+
+    async def send(self, messages: Sequence[OutgoingMessage]) -> list[BaseException | None]:
+        streams = [self.stream_for(message.routing_key) for message in messages]
+        try:
+            await self._ensure_groups({stream for stream in streams if stream not in self._ready})
+            pipe = self._client.pipeline(transaction=False)
+            for stream, message in zip(streams, messages, strict=True):
+                pipe.xadd(stream, _fields(message), maxlen=self._maxlen, approximate=True)
+            replies = await pipe.execute(raise_on_error=False)
+        except Exception as exc:  # noqa: BLE001 - the whole round trip failed; retried per message
+            self.connected = False
+            return [exc] * len(messages)
+        self.connected = True
+        return [reply if isinstance(reply, BaseException) else None for reply in replies]
+
+    async def _ensure_groups(self, streams: set[str]) -> None:
+        if not streams:
+            return
+        if self._groups:
+            pipe = self._client.pipeline(transaction=False)
+            for stream in streams:
+                for group in self._groups:
+                    pipe.xgroup_create(stream, group, id="$", mkstream=True)
+            for reply in await pipe.execute(raise_on_error=False):
+                if isinstance(reply, ResponseError) and "BUSYGROUP" not in str(reply):
+                    raise reply
+        self._ready.update(streams)
+
+
+class TransportRouter:
+    """Picks the transports for a routing key from `{transport: [pattern, ...]}`.
+
+    A key goes to every transport with a matching AMQP-style pattern, and to RabbitMQ when
+    none matches, so `{"redis": ["instance.*"], "rabbitmq": ["#"]}` copies `instance.*`
+    events to Redis Streams while RabbitMQ keeps receiving everything. Lookups are cached
+    per routing key.
+    """
+
+    def __init__(self, routes: Mapping[str, Sequence[str]] | None = None):
+        unknown = set(routes or {}) - set(TRANSPORTS)
+        if unknown:
+            raise ValueError(f"unknown transports {sorted(unknown)}; expected some of {TRANSPORTS}")
+        self._routes = {name: tuple(patterns) for name, patterns in (routes or {}).items() if patterns}
+        self._cache: dict[str, tuple[str, ...]] = {}
+
+    @property
+    def names(self) -> set[str]:
+        """Every transport some key can be routed to."""
+        return {RABBITMQ, *self._routes}
+
+    def transports(self, routing_key: str) -> tuple[str, ...]:
+        matched = self._cache.get(routing_key)
+        if matched is None:
+            matched = tuple(
+                name
+                for name, patterns in self._routes.items()
+                if any(topic_matches(pattern, routing_key) for pattern in patterns)
+            ) or (RABBITMQ,)
+            self._cache[routing_key] = matched
+        return matched
+
+
+def _fields(message: OutgoingMessage) -> dict[str, bytes | str]:
+    fields: dict[str, bytes | str] = {
+        "routing_key": message.routing_key,
+        "content_type": message.content_type,
+        "body": message.body,
+    }
+    if message.content_encoding:
+        fields["content_encoding"] = message.content_encoding
+    if message.headers:
+        fields["headers"] = json.dumps(message.headers)
+    return fields
+
+
+__all__ = [
+    "RABBITMQ",
+    "REDIS_STREAMS",
+    "TRANSPORTS",
+    "OutgoingMessage",
+    "RabbitMqTransport",
+    "RedisStreamsTransport",
+    "Transport",
+    "TransportRouter",
+]
@@ -0,0 +1,323 @@
+import asyncio
+import enum
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.messaging.codecs import scan_routing_key
+from app.messaging.lanes import Lane, LaneRouter, LatencyHistogram
+from app.messaging.spool import DiskSpool, SpoolFull, open_worker_spool, sync_periodically
+
+
+class OverflowPolicy(str, enum.Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    SPILL = "spill"
+
+
+@dataclass(slots=True)
+class QueuedEvent:
+    payload: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass(slots=True)
+class LaneStats:
+    name: str
+    weight: int
+    depth: int
+    enqueued: int
+    published: int
+    dropped: int
+    spill_pending: int
+    latency_p50_ms: float | None
+    latency_p99_ms: float | None
+    latency_max_ms: float | None
+    latency_histogram_ms: dict[str, int]
+    latency_sum_ms: float
+
+
+@dataclass(slots=True)
+class WorkQueueStats:
+    depth: int
+    capacity: int
+    overflow_policy: str
+    workers: int
+    enqueued: int
+    published: int
+    failed: int
+    dropped: int
+    spilled: int
+    spill_pending: int
+    latency_p50_ms: float | None
+    latency_p99_ms: float | None
+    latency_max_ms: float | None
+    lanes: list[LaneStats] = field(default_factory=list)
+
+
+class _LaneQueue:
+    """Per-lane FIFO with its own capacity, counters and latency window."""
+
+    def __init__(self, lane: Lane, maxsize: int, latency_window: int):
+        self.lane = lane
+        self.items: deque[QueuedEvent] = deque()
+        self.slots = asyncio.Semaphore(maxsize)
+        self.current = 0
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+        self.histogram = LatencyHistogram()
+        self.enqueued = 0
+        self.published = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def full(self) -> bool:
+        return self.slots.locked()
+
+
+Handler = Callable[[str], Awaitable["asyncio.Future[Any] | None"]]
+
+
+class WorkQueue:
+    """Bounded buffer between the LISTEN callback and a pool of publisher workers.
+
+    `handler` receives the raw payload. It may return a future (e.g. a pending publisher
+    confirm); latency is then measured up to that future's completion.
+
+    With a `router`, payloads are sorted into priority lanes by routing key. Every lane has
+    its own `maxsize` buffer and overflow handling, and idle workers pick the next lane by
+    smooth weighted round-robin, so a flooded lane cannot starve the others. Order is kept
+    within a lane, not across lanes.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        *,
+        maxsize: int = 10_000,
+        workers: int = 4,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+        spill_path: str | None = None,
+        spill_max_bytes: int = 512 * 1024 * 1024,
+        spill_fsync_interval: float = 0.05,
+        latency_window: int = 2048,
+        router: LaneRouter | None = None,
+    ):
+        if overflow is OverflowPolicy.SPILL and not spill_path:
+            raise ValueError("spill overflow policy requires a spill_path")
+        self._handler = handler
+        self._router = router or LaneRouter()
+        self._maxsize = maxsize
+        self._lanes = [_LaneQueue(lane, maxsize, latency_window) for lane in self._router.lanes]
+        self._available = asyncio.Semaphore(0)
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._spill_backlog = 0
+        self._workers = workers
+        self._overflow = overflow
+        self._spill_path = spill_path
+        self._spill_max_bytes = spill_max_bytes
+        self._spill: DiskSpool | None = None
+        self._spill_fsync_interval = spill_fsync_interval
+        self._spill_ready = asyncio.Event()
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._tasks: list[asyncio.Task[None]] = []
+        self.enqueued = 0
+        self.published = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(len(lane.items) for lane in self._lanes)
+
+    async def start(self) -> None:
+        for index in range(self._workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"bridge-worker-{index}"))
+        if self._spill_path:
+            self._spill = open_worker_spool(self._spill_path, max_bytes=self._spill_max_bytes)
+            if self._spill.pending:
+                # Recovered records have no lane bookkeeping; every lane queues behind them.
+                self._spill_backlog = self._spill.pending
+                self._spill_ready.set()
+            self._tasks.append(asyncio.create_task(self._refill(), name="bridge-spill-refill"))
+            self._tasks.append(
+                asyncio.create_task(
+                    sync_periodically(self._spill, self._spill_fsync_interval), name="bridge-spill-sync"
+                )
+            )
+
+    async def stop(self, drain: bool = True) -> None:
+        if drain:
+            await self._idle.wait()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._spill:
+            await asyncio.to_thread(self._spill.close)
+
+    async def put(self, payload: str) -> None:
+        """Enqueue a payload, applying the overflow policy when its lane is full."""
+        self.enqueued += 1
+        lane = self._lane_for(payload)
+        lane.enqueued += 1
+        if self._overflow is OverflowPolicy.BLOCK:
+            await lane.slots.acquire()
+            self._push(lane, payload)
+            return
+        if self._spill and (self._spill_backlog or lane.spilled or lane.full()):
+            # Once anything in a lane is spilled, newer events follow it to keep FIFO order.
+            self._spill_payload(lane, payload)
+            return
+        if lane.full():
+            lane.items.popleft()
+            lane.items.append(QueuedEvent(payload))
+            lane.dropped += 1
+            self.dropped += 1
+            return
+        await lane.slots.acquire()
+        self._push(lane, payload)
+
+    def _lane_for(self, payload: str) -> _LaneQueue:
+        if len(self._lanes) == 1:
+            return self._lanes[0]
+        return self._lanes[self._router.index(scan_routing_key(payload))]
+
+    def _push(self, lane: _LaneQueue, payload: str) -> None:
+        lane.items.append(QueuedEvent(payload))
+        self._unfinished += 1
+        self._idle.clear()
+        self._available.release()
+
+    def _next_lane(self) -> _LaneQueue:
+        """Smooth weighted round-robin over lanes that have work."""
+        best: _LaneQueue | None = None
+        total = 0
+        for lane in self._lanes:
+            if not lane.items:
+                continue
+            lane.current += lane.lane.weight
+            total += lane.lane.weight
+            if best is None or lane.current > best.current:
+                best = lane
+        assert best is not None, "worker woke up without queued work"
+        best.current -= total
+        return best
+
+    def stats(self) -> WorkQueueStats:
+        ordered = sorted(self._latencies)
+        return WorkQueueStats(
+            depth=self.depth,
+            capacity=self._maxsize * len(self._lanes),
+            overflow_policy=self._overflow.value,
+            workers=self._workers,
+            enqueued=self.enqueued,
+            published=self.published,
+            failed=self.failed,
+            dropped=self.dropped,
+            spilled=self.spilled,
+            spill_pending=self._spill_pending,
+            latency_p50_ms=_percentile_ms(ordered, 0.50),
+            latency_p99_ms=_percentile_ms(ordered, 0.99),
+            latency_max_ms=ordered[-1] * 1000 if ordered else None,
+            lanes=[self._lane_stats(lane) for lane in self._lanes],
+        )
+
+    def _lane_stats(self, lane: _LaneQueue) -> LaneStats:
+        ordered = sorted(lane.latencies)
+        return LaneStats(
+            name=lane.lane.name,
+            weight=lane.lane.weight,
+            depth=len(lane.items),
+            enqueued=lane.enqueued,
+            published=lane.published,
+            dropped=lane.dropped,
+            spill_pending=lane.spilled,
+            latency_p50_ms=_percentile_ms(ordered, 0.50),
+            latency_p99_ms=_percentile_ms(ordered, 0.99),
+            latency_max_ms=ordered[-1] * 1000 if ordered else None,
+            latency_histogram_ms=lane.histogram.cumulative(),
+            latency_sum_ms=round(lane.histogram.sum_ms, 3),
+        )
+
+    async def _worker(self) -> None:
+        while True:
+            await self._available.acquire()
+            lane = self._next_lane()
+            item = lane.items.popleft()
+            lane.slots.release()
+            try:
+                pending = await self._handler(item.payload)
+            except Exception as exc:  # noqa: BLE001 - one bad event must not kill the worker
+                print(f"[event_broker] handler failed: {exc!r}")
+                self.failed += 1
+            else:
+                if isinstance(pending, asyncio.Future):
+                    pending.add_done_callback(
+                        lambda _, started=item.enqueued_at, lane=lane: self._record(lane, started)
+                    )
+                else:
+                    self._record(lane, item.enqueued_at)
+            finally:
+                self._unfinished -= 1
+                if not self._unfinished:
+                    self._idle.set()
+
+    def _record(self, lane: _LaneQueue, enqueued_at: float) -> None:
+        latency = time.monotonic() - enqueued_at
+        self.published += 1
+        self._latencies.append(latency)
+        lane.published += 1
+        lane.latencies.append(latency)
+        lane.histogram.observe(latency)
+
+    @property
+    def _spill_pending(self) -> int:
+        return self._spill.pending if self._spill else 0
+
+    def _spill_payload(self, lane: _LaneQueue, payload: str) -> None:
+        assert self._spill is not None
+        try:
+            self._spill.append(payload.encode("utf-8"))
+        except SpoolFull as exc:
+            print(f"[event_broker] dropping event, {exc}")
+            lane.dropped += 1
+            self.dropped += 1
+            return
+        lane.spilled += 1
+        self.spilled += 1
+        self._spill_ready.set()
+
+    async def _refill(self) -> None:
+        """Feeds spilled payloads back into their lanes, oldest first, as room frees up."""
+        assert self._spill is not None
+        while True:
+            await self._spill_ready.wait()
+            records = self._spill.read(256)
+            for record, _position in records:
+                payload = record.decode("utf-8")
+                lane = self._lane_for(payload)
+                await lane.slots.acquire()
+                if self._spill_backlog:
+                    self._spill_backlog -= 1
+                else:
+                    lane.spilled -= 1
+                self._push(lane, payload)
+            if records:
+                self._spill.commit(records[-1][1], len(records))
+            if not self._spill.pending:
+                self._spill_ready.clear()
+
+
+def _percentile_ms(ordered: list[float], quantile: float) -> float | None:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(quantile * len(ordered)))
+    return ordered[index] * 1000
+
+
+__all__ = ["LaneStats", "OverflowPolicy", "QueuedEvent", "WorkQueue", "WorkQueueStats"]
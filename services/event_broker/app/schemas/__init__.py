@@ -1,5 +1,26 @@
-from .health import HealthResponse
-
-__all__ = ["HealthResponse"]
-
+from .bridge import (
+    BatchStatsOut,
+    BridgeStats,
+    CoalescerStatsOut,
+    LaneStatsOut,
+    PartitionStatsOut,
+    SequenceStatsOut,
+    SnapshotStatsOut,
+    SpoolStatsOut,
+    WorkQueueStatsOut,
+)
+from .health import DeepHealthResponse, HealthResponse
 
+__all__ = [
+    "DeepHealthResponse",
+    "HealthResponse",
+    "BatchStatsOut",
+    "BridgeStats",
+    "CoalescerStatsOut",
+    "LaneStatsOut",
+    "PartitionStatsOut",
+    "SequenceStatsOut",
+    "SnapshotStatsOut",
+    "SpoolStatsOut",
+    "WorkQueueStatsOut",
+]
@@ -0,0 +1,125 @@
+from pydantic import BaseModel
+
+
+class LaneStatsOut(BaseModel):
+    name: str
+    weight: int
+    depth: int
+    enqueued: int
+    published: int
+    dropped: int
+    spill_pending: int
+    latency_p50_ms: float | None = None
+    latency_p99_ms: float | None = None
+    latency_max_ms: float | None = None
+    latency_histogram_ms: dict[str, int]
+    latency_sum_ms: float
+
+    class Config:
+        from_attributes = True
+
+
+class WorkQueueStatsOut(BaseModel):
+    depth: int
+    capacity: int
+    overflow_policy: str
+    workers: int
+    enqueued: int
+    published: int
+    failed: int
+    dropped: int
+    spilled: int
+    spill_pending: int
+    latency_p50_ms: float | None = None
+    latency_p99_ms: float | None = None
+    latency_max_ms: float | None = None
+    lanes: list[LaneStatsOut] = []
+
+    class Config:
+        from_attributes = True
+
+
+class CoalescerStatsOut(BaseModel):
+    windows_ms: dict[str, float]
+    pending: int
+    emitted: int
+    collapsed: int
+    collapsed_by_key: dict[str, int]
+
+    class Config:
+        from_attributes = True
+
+
+class PartitionStatsOut(BaseModel):
+    partitions: int
+    owned: list[int]
+    members: int
+    skipped: int
+
+    class Config:
+        from_attributes = True
+
+
+class SequenceStatsOut(BaseModel):
+    connected: bool
+    last_published_seq: int | None = None
+    head_seq: int | None = None
+    lag_events: int
+    lag_seconds: float
+    reconnects: int
+    replayed: int
+    replay_truncated: int
+    gaps: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class SpoolStatsOut(BaseModel):
+    segments: int
+    bytes: int
+    max_bytes: int
+    pending: int
+    appended: int
+    drained: int
+    rejected: int
+    recovered: int
+    drain_rate_per_s: float
+
+    class Config:
+        from_attributes = True
+
+
+class BatchStatsOut(BaseModel):
+    mode: str
+    batches: int
+    rows: int
+    loaded: int
+    missing: int
+
+    class Config:
+        from_attributes = True
+
+
+class SnapshotStatsOut(BaseModel):
+    path: str
+    live: int
+    tombstones: int
+    applied: int
+    skipped: int
+    pending: int
+    purged: int
+    high_position: int | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class BridgeStats(BaseModel):
+    work_queue: WorkQueueStatsOut
+    coalescer: CoalescerStatsOut
+    partitions: PartitionStatsOut | None = None
+    sequence: SequenceStatsOut
+    spool: SpoolStatsOut | None = None
+    batches: BatchStatsOut | None = None
+    snapshot: SnapshotStatsOut | None = None
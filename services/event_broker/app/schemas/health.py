@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 
 
 class HealthResponse(BaseModel):
@@ -6,3 +6,19 @@ class HealthResponse(BaseModel):
     detail: str
 
 
+class DeepHealthResponse(BaseModel):
+    healthy: bool
+    connections: dict[str, bool]
+    notification_queue_usage: float | None = None
+    seconds_since_last_notification: float | None = None
+    sequence_lag_events: int
+    spool_pending: int
+    work_queue_depth: int
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def status(self) -> str:
+        return "ok" if self.healthy else "degraded"
+
+    class Config:
+        from_attributes = True
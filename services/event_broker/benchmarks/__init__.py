@@ -0,0 +1 @@
+"""Offline benchmarks for the event broker (run from services/event_broker)."""
@@ -0,0 +1,288 @@
+"""End-to-end load test of the bridge: NOTIFY in, confirmed publish out, without Postgres or RabbitMQ.
+
+Synthetic trigger payloads are delivered through a stand-in for the asyncpg LISTEN
+connection, so they enter the bridge through `_handle_notification` exactly like real
+notifications, and leave through the real work queue, codec and `BatchPublisher` into a
+stub channel that pays `--confirm-latency-ms` per confirm. Every scenario (offered rate x
+payload size) reports throughput, p50/p99 notify-to-confirm latency, peak RSS growth, peak
+work-queue depth and the peak number of notifications still waiting to be enqueued.
+
+Results can be written as JSON (`--output`) and compared against an earlier run
+(`--compare`); with `--max-regression` the command exits non-zero when throughput drops or
+p99 latency grows by more than that percentage in any scenario.
+
+Usage (from services/event_broker):
+
+    python -m benchmarks.bridge_load --events 20000 --rates 2000,10000,0 --sizes 512,4096
+    python -m benchmarks.bridge_load --output load.json --set work_queue_workers=8
+    python -m benchmarks.bridge_load --compare load.json --max-regression 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.codecs import JSON_CONTENT_TYPE, decode_body, scan_seq
+from app.messaging.transports import RabbitMqTransport
+from benchmarks.payloads import sized_payloads
+from benchmarks.stubs import StubChannel, StubListenConnection
+
+RESULTS_VERSION = 1
+# An offered rate counts as sustained while the bridge keeps up with at least this share.
+SATURATION_RATIO = 0.95
+
+
+@dataclass(slots=True)
+class ScenarioResult:
+    rate: int  # offered events per second, 0 = as fast as the listener can deliver
+    payload_bytes: int
+    events: int
+    published: int
+    failed: int
+    elapsed_s: float
+    throughput: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+    peak_rss_delta_mb: float
+    peak_queue_depth: int
+    peak_pending_notifications: int
+    saturated: bool
+
+    @property
+    def key(self) -> str:
+        return f"{self.rate}/{self.payload_bytes}"
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # not Linux; the peak is the best there is
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[int(fraction * (len(ordered) - 1))] * 1000 if ordered else 0.0
+
+
+def _message_seq(message: Any) -> int | None:
+    if message.content_type == JSON_CONTENT_TYPE and not message.content_encoding:
+        return scan_seq(message.body.decode())
+    body = decode_body(message.body, message.content_type, message.content_encoding)
+    return body.get("seq") if isinstance(body, dict) else None
+
+
+async def run_scenario(
+    settings: Settings, payloads: list[str], *, rate: int, burst: int, confirm_latency: float
+) -> ScenarioResult:
+    notified_at: dict[int, float] = {}
+    latencies: list[float] = []
+
+    def confirmed(_routing_key: str, message: Any) -> None:
+        started = notified_at.pop(_message_seq(message), None)  # type: ignore[arg-type]
+        if started is not None:
+            latencies.append(time.perf_counter() - started)
+
+    channel = StubChannel(confirm_latency, on_publish=confirmed)
+    listener = StubListenConnection()
+    bridge = EventBridge(settings)
+    bridge._channel = channel  # type: ignore[assignment]
+    if settings.publish_mode == "batched":
+        bridge._publisher = bridge._batch_publisher(
+            RabbitMqTransport(channel, settings.outgoing_exchange)  # type: ignore[arg-type]
+        )
+        await bridge._publisher.start()
+    await bridge._attach(listener)  # type: ignore[arg-type]
+    await bridge._work_queue.start()
+
+    peaks = {"rss": 0, "depth": 0, "pending": 0}
+    baseline_rss = _rss_bytes()
+
+    async def sample() -> None:
+        while True:
+            peaks["rss"] = max(peaks["rss"], _rss_bytes() - baseline_rss)
+            peaks["depth"] = max(peaks["depth"], bridge._work_queue.depth)
+            peaks["pending"] = max(peaks["pending"], listener.pending)
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample())
+    seqs = [scan_seq(payload) for payload in payloads]
+    started = time.perf_counter()
+    for offset in range(0, len(payloads), burst):
+        for seq, payload in zip(seqs[offset : offset + burst], payloads[offset : offset + burst]):
+            notified_at[seq] = time.perf_counter()  # type: ignore[index]
+            listener.notify(settings.listen_channel, payload)
+        # Bursts stay on the offered schedule however long the previous one took.
+        delay = started + (offset + burst) / rate - time.perf_counter() if rate else 0.0
+        await asyncio.sleep(max(0.0, delay))
+    await listener.drain()
+    await bridge._work_queue.stop(drain=True)
+    if bridge._publisher:
+        await bridge._publisher.close()
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    peaks["rss"] = max(peaks["rss"], _rss_bytes() - baseline_rss)
+
+    stats = bridge._work_queue.stats()
+    latencies.sort()
+    throughput = len(latencies) / elapsed if elapsed else 0.0
+    offered = rate or throughput
+    return ScenarioResult(
+        rate=rate,
+        payload_bytes=round(sum(len(p.encode()) for p in payloads) / len(payloads)),
+        events=len(payloads),
+        published=len(latencies),
+        failed=stats.failed + stats.dropped,
+        elapsed_s=round(elapsed, 3),
+        throughput=round(throughput, 1),
+        latency_p50_ms=round(_percentile(latencies, 0.50), 2),
+        latency_p99_ms=round(_percentile(latencies, 0.99), 2),
+        latency_max_ms=round(latencies[-1] * 1000 if latencies else 0.0, 2),
+        peak_rss_delta_mb=round(peaks["rss"] / 2**20, 1),
+        peak_queue_depth=peaks["depth"],
+        peak_pending_notifications=peaks["pending"],
+        saturated=bool(rate) and throughput < SATURATION_RATIO * offered,
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _override(pair: str) -> tuple[str, Any]:
+    name, _, raw = pair.partition("=")
+    try:
+        return name, json.loads(raw)
+    except json.JSONDecodeError:
+        return name, raw
+
+
+def _print_table(results: list[ScenarioResult]) -> None:
+    print(
+        f"{'rate':>7} {'bytes':>6} {'events/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+        f"{'rss MB':>7} {'depth':>6} {'pending':>7} {'failed':>6}"
+    )
+    for result in results:
+        print(
+            f"{result.rate or 'max':>7} {result.payload_bytes:>6} {result.throughput:>9.0f} "
+            f"{result.latency_p50_ms:>8.2f} {result.latency_p99_ms:>8.2f} "
+            f"{result.latency_max_ms:>8.2f} {result.peak_rss_delta_mb:>7.1f} "
+            f"{result.peak_queue_depth:>6} {result.peak_pending_notifications:>7} "
+            f"{result.failed:>6}{'  saturated' if result.saturated else ''}"
+        )
+
+
+def compare(
+    results: list[ScenarioResult], baseline: dict[str, Any], max_regression: float | None
+) -> bool:
+    """Prints throughput and p99 changes against a saved run; False if any exceeds the limit."""
+    previous = {f"{row['rate']}/{row['payload_bytes']}": row for row in baseline["scenarios"]}
+    print(
+        f"\nagainst {baseline['meta'].get('git_revision') or 'baseline'} ({baseline['meta']['created_at']})"
+    )
+    print(f"{'scenario':>12} {'events/s':>10} {'p99 ms':>10}")
+    ok = True
+    for result in results:
+        row = previous.get(result.key)
+        if row is None:
+            print(f"{result.key:>12} {'new':>10} {'new':>10}")
+            continue
+        throughput = (result.throughput / row["throughput"] - 1) * 100 if row["throughput"] else 0.0
+        p99 = (
+            (result.latency_p99_ms / row["latency_p99_ms"] - 1) * 100
+            if row["latency_p99_ms"]
+            else 0.0
+        )
+        regressed = max_regression is not None and (
+            throughput < -max_regression or p99 > max_regression
+        )
+        ok = ok and not regressed
+        print(
+            f"{result.key:>12} {throughput:>+9.1f}% {p99:>+9.1f}%{'  regressed' if regressed else ''}"
+        )
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--events", type=int, default=20_000, help="notifications per scenario")
+    parser.add_argument("--rates", default="2000,10000,0", help="offered events/s, 0 = unthrottled")
+    parser.add_argument(
+        "--burst", type=int, default=100, help="notifications delivered back to back"
+    )
+    parser.add_argument("--sizes", default="512,4096", help="approximate payload bytes")
+    parser.add_argument("--confirm-latency-ms", type=float, default=2.0)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Settings override (JSON value)",
+    )
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="results JSON of an earlier run")
+    parser.add_argument("--max-regression", type=float, help="percent; exit 1 when exceeded")
+    args = parser.parse_args()
+
+    overrides = {"publish_mode": "batched", "spool_enabled": False} | dict(map(_override, args.set))
+    settings = Settings(**overrides)
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        payloads = sized_payloads(args.events, size)
+        for rate in (int(value) for value in args.rates.split(",")):
+            results.append(
+                await run_scenario(
+                    settings,
+                    payloads,
+                    rate=rate,
+                    burst=args.burst,
+                    confirm_latency=args.confirm_latency_ms / 1000,
+                )
+            )
+    _print_table(results)
+
+    document = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "confirm_latency_ms": args.confirm_latency_ms,
+            "burst": args.burst,
+            "settings": overrides,
+        },
+        "scenarios": [asdict(result) for result in results],
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(document, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            if not compare(results, json.load(baseline), args.max_regression):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,170 @@
+"""Write latency of a cascading delete under row-level vs statement-level NOTIFY triggers.
+
+Creates a scratch schema on a real Postgres, installs `notify_domain_event()` (migration
+`20261018_04_event_sequence`) and `notify_domain_event_batch()` (migration
+`20261018_05_statement_triggers`) from the migration files, seeds one instance whose
+knowledge base holds `--entries` rows, and times `DELETE FROM instances` (statement and
+commit) with each trigger flavour while a second session LISTENs. The schema is dropped
+afterwards.
+
+Usage (from services/event_broker, against a disposable database):
+
+    python -m benchmarks.cascade_write_latency --dsn postgresql://postgres@localhost/bench --entries 10000
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import statistics
+import time
+from pathlib import Path
+from types import ModuleType
+
+import asyncpg
+
+MIGRATIONS = Path(__file__).resolve().parents[2] / "admin_backend" / "alembic" / "versions"
+CHANNEL = "instances_notify"
+SCHEMA = "bench_cascade"
+
+TABLES = f"""
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA};
+CREATE SEQUENCE domain_event_seq AS bigint;
+CREATE TABLE domain_event_log (
+    seq bigint PRIMARY KEY,
+    payload jsonb NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE domain_events (
+    id bigserial PRIMARY KEY,
+    routing_key text NOT NULL,
+    table_name text NOT NULL,
+    op text NOT NULL,
+    schema_version int NOT NULL,
+    payload jsonb NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE instances (
+    id serial PRIMARY KEY,
+    user_id int NOT NULL,
+    title text NOT NULL,
+    user_config jsonb NOT NULL DEFAULT '{{}}',
+    pipeline_config jsonb NOT NULL DEFAULT '{{}}',
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE knowledge_bases (
+    id serial PRIMARY KEY,
+    instance_id int NOT NULL UNIQUE REFERENCES instances (id) ON DELETE CASCADE
+);
+CREATE TABLE knowledge_base_entries (
+    id serial PRIMARY KEY,
+    knowledge_base_id int NOT NULL REFERENCES knowledge_bases (id) ON DELETE CASCADE,
+    content text NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX ON knowledge_base_entries (knowledge_base_id);
+"""
+
+SEED = """
+WITH instance AS (
+    INSERT INTO instances (user_id, title) VALUES (1, 'bench') RETURNING id
+), kb AS (
+    INSERT INTO knowledge_bases (instance_id) SELECT id FROM instance RETURNING id
+)
+INSERT INTO knowledge_base_entries (knowledge_base_id, content)
+SELECT kb.id, repeat(md5(n::text), $2) FROM kb, generate_series(1, $1) AS n
+RETURNING (SELECT id FROM instance)
+"""
+
+
+def _migration(name: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, MIGRATIONS / f"{name}.py")
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _install(conn: asyncpg.Connection, statement_level: bool, triggers) -> None:
+    for name, table, event, routing_key in triggers:
+        await conn.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        if statement_level:
+            transition = "OLD TABLE AS old_rows" if event == "DELETE" else "NEW TABLE AS new_rows"
+            await conn.execute(
+                f"CREATE TRIGGER {name} AFTER {event} ON {table} REFERENCING {transition} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION notify_domain_event_batch('{routing_key}')"
+            )
+        else:
+            await conn.execute(
+                f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION notify_domain_event('{routing_key}')"
+            )
+
+
+async def _cascade(
+    conn: asyncpg.Connection, received: list[int], args: argparse.Namespace
+) -> tuple[float, float, int, int]:
+    async with conn.transaction():
+        await conn.execute("SET LOCAL botberi.event_transport = 'replication'")
+        instance_id = await conn.fetchval(SEED, args.entries, args.content_repeat)
+    journal_before = await conn.fetchval("SELECT count(*) FROM domain_event_log")
+    received.clear()
+
+    transaction = conn.transaction()
+    await transaction.start()
+    started = time.perf_counter()
+    await conn.execute("DELETE FROM instances WHERE id = $1", instance_id)
+    deleted = time.perf_counter()
+    await transaction.commit()
+    committed = time.perf_counter()
+
+    # Let the listener drain what the commit delivered.
+    for _ in range(200):
+        before = len(received)
+        await asyncio.sleep(0.02)
+        if len(received) == before and received:
+            break
+    journal_rows = await conn.fetchval("SELECT count(*) FROM domain_event_log") - journal_before
+    return deleted - started, committed - deleted, len(received), journal_rows
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--content-repeat", type=int, default=32, help="md5 repeats per entry (32 B each)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    row_level = _migration("20261018_04_event_sequence")
+    statement_level = _migration("20261018_05_statement_triggers")
+
+    conn = await asyncpg.connect(args.dsn)
+    listener = await asyncpg.connect(args.dsn)
+    received: list[int] = []
+    await listener.add_listener(CHANNEL, lambda *notification: received.append(len(notification[3])))
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(TABLES)
+        await conn.execute(row_level._notify_function(journal=True))
+        await conn.execute(statement_level._batch_function())
+
+        print(f"{args.entries} entries per cascade, median of {args.repeats} runs")
+        print(f"{'triggers':<10} {'delete ms':>10} {'commit ms':>10} {'notifies':>9} {'journal':>8}")
+        for flavour in (False, True):
+            await _install(conn, flavour, statement_level.TRIGGERS)
+            runs = [await _cascade(conn, received, args) for _ in range(args.repeats)]
+            delete_s = statistics.median(run[0] for run in runs)
+            commit_s = statistics.median(run[1] for run in runs)
+            print(
+                f"{'statement' if flavour else 'row':<10} {delete_s * 1000:>10.1f} {commit_s * 1000:>10.1f} "
+                f"{runs[-1][2]:>9} {runs[-1][3]:>8}"
+            )
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await listener.close()
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Compare event codecs: encode throughput and bytes on the wire.
+
+Runs the bridge's own parse/encode path over realistic instance and KB-entry NOTIFY
+payloads for every codec, with and without zstd.
+
+Usage (from services/event_broker):
+
+    python -m benchmarks.codec_throughput --events 20000
+"""
+
+import argparse
+import json
+import time
+
+from app.messaging.codecs import CODECS, EventCodec, scan_routing_key
+from benchmarks.payloads import notify_payloads
+
+
+def run(codec: EventCodec, payloads: list[str]) -> tuple[float, int]:
+    wire = 0
+    started = time.perf_counter()
+    for payload in payloads:
+        if codec.passthrough:
+            routing_key = scan_routing_key(payload)
+            encoded = codec.transcode(payload.encode())
+        else:
+            envelope = json.loads(payload)
+            routing_key = envelope["routing_key"]
+            encoded = codec.encode(envelope)
+        assert routing_key
+        wire += len(encoded.body)
+    return time.perf_counter() - started, wire
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--compress-min-bytes", type=int, default=4096)
+    args = parser.parse_args()
+
+    payloads = notify_payloads(args.events)
+    source_bytes = sum(len(payload.encode()) for payload in payloads)
+    print(f"{args.events} events, {source_bytes / args.events:.0f} B average NOTIFY payload")
+    print(f"{'codec':<20} {'events/s':>10} {'avg bytes':>10} {'vs source':>10}")
+    for name in CODECS:
+        for compression in ("none", "zstd"):
+            try:
+                codec = EventCodec(
+                    name, compression=compression, compress_min_bytes=args.compress_min_bytes
+                )
+            except RuntimeError as exc:
+                print(f"{name + '+' + compression:<20} skipped: {exc}")
+                continue
+            elapsed, wire = run(codec, payloads)
+            label = name if compression == "none" else f"{name}+zstd"
+            print(
+                f"{label:<20} {args.events / elapsed:>10.0f} {wire / args.events:>10.0f} "
+                f"{wire / source_bytes:>9.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
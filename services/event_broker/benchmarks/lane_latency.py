@@ -0,0 +1,115 @@
+"""Control-plane latency while a bulk import saturates the bridge, with and without lanes.
+
+A knowledge-base import floods the work queue with `knowledge_base.entry.created` events
+while `instance.created`/`instance.deleted` events arrive at a steady rate. Publishing goes
+through the real `BatchPublisher` against a stub channel with a fixed confirm latency, so
+the bridge is broker-bound, as it is in production during an import.
+
+Usage (from services/event_broker):
+
+    python -m benchmarks.lane_latency --bulk 50000 --control-rate 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.publisher import BatchPublisher
+from app.messaging.transports import RabbitMqTransport
+from benchmarks.payloads import instance_event, jsonb_text, kb_entry_event
+from benchmarks.stubs import StubChannel
+
+
+async def run(args: argparse.Namespace, lanes: bool) -> tuple[list[float], list[float]]:
+    """Returns `(control, bulk)` enqueue-to-confirm latencies in seconds."""
+    settings = Settings(
+        publish_mode="batched",
+        spool_enabled=False,
+        work_queue_size=args.bulk,
+        work_queue_workers=args.workers,
+        priority_lanes={"control": ["instance.created", "instance.deleted"]} if lanes else {},
+        priority_lane_weights={"control": args.control_weight} if lanes else {},
+    )
+    bridge = EventBridge(settings=settings)
+    channel = StubChannel(args.confirm_latency_ms / 1000)
+    bridge._channel = channel  # type: ignore[assignment]
+    bridge._publisher = BatchPublisher(
+        RabbitMqTransport(channel, settings.outgoing_exchange),  # type: ignore[arg-type]
+        batch_size=settings.publish_batch_size,
+        linger=settings.publish_batch_linger_ms / 1000,
+        max_in_flight=args.max_in_flight,
+    )
+    await bridge._publisher.start()
+
+    rng = random.Random(7)
+    bulk = [jsonb_text(kb_entry_event(i, rng)) for i in range(args.bulk)]
+    control = []
+    for i in range(args.control):
+        event = instance_event(i, rng)
+        event["routing_key"] = "instance.deleted" if i % 2 else "instance.created"
+        control.append(jsonb_text(event))
+
+    enqueued_at: dict[str, float] = {}
+    latencies: dict[bool, list[float]] = {True: [], False: []}
+    dispatch = bridge._dispatch
+
+    async def measured(payload: str):
+        published = await dispatch(payload)
+        started, is_control = enqueued_at.pop(payload), payload in control_set
+        published.add_done_callback(lambda _: latencies[is_control].append(time.monotonic() - started))
+        return published
+
+    control_set = set(control)
+    bridge._work_queue._handler = measured
+    await bridge._work_queue.start()
+
+    async def flood() -> None:
+        for payload in bulk:
+            enqueued_at[payload] = time.monotonic()
+            await bridge._work_queue.put(payload)
+
+    async def trickle() -> None:
+        for payload in control:
+            await asyncio.sleep(1 / args.control_rate)
+            enqueued_at[payload] = time.monotonic()
+            await bridge._work_queue.put(payload)
+
+    await asyncio.gather(flood(), trickle())
+    await bridge._work_queue.stop()
+    await bridge._publisher.close()
+    return latencies[True], latencies[False]
+
+
+def _percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[int(0.50 * (len(ordered) - 1))] * 1000
+    p99 = ordered[int(0.99 * (len(ordered) - 1))] * 1000
+    return f"{p50:9.1f} {p99:9.1f} {len(ordered):>8}"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bulk", type=int, default=50_000)
+    parser.add_argument("--control", type=int, default=100)
+    parser.add_argument("--control-rate", type=float, default=50.0, help="control events per second")
+    parser.add_argument("--control-weight", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--confirm-latency-ms", type=float, default=2.0)
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'run':<8} {'lane':<10} {'p50 ms':>9} {'p99 ms':>9} {'events':>8}")
+    for lanes in (False, True):
+        started = time.perf_counter()
+        control, bulk = await run(args, lanes)
+        label = "lanes" if lanes else "single"
+        print(f"{label:<8} {'control':<10} {_percentiles(control)}")
+        print(f"{label:<8} {'bulk':<10} {_percentiles(bulk)}")
+        print(f"{label:<8} {'elapsed':<10} {time.perf_counter() - started:>9.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
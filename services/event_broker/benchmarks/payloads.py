@@ -0,0 +1,105 @@
+"""Realistic trigger envelopes shared by the benchmarks."""
+
+import json
+import random
+from typing import Any
+
+_WORDS = (
+    "agent knowledge pipeline retrieval summary customer onboarding invoice policy refund "
+    "schedule escalation language model prompt context document section answer support"
+).split()
+
+
+def jsonb_text(value: Any) -> str:
+    """Render like Postgres `jsonb::text`: keys ordered by length, then bytewise."""
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: (len(item[0].encode()), item[0].encode()))
+        return "{" + ", ".join(f"{json.dumps(k)}: {jsonb_text(v)}" for k, v in items) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(jsonb_text(v) for v in value) + "]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def instance_event(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "routing_key": "instance.updated",
+        "table": "instances",
+        "op": "UPDATE",
+        "schema_version": 1,
+        "seq": 1_000_000 + i,
+        "emitted_at": "2026-10-18T09:00:00.123456+00:00",
+        "data": {
+            "id": i,
+            "bot_id": rng.randint(1, 50),
+            "user_id": rng.randint(1, 10_000),
+            "title": _text(rng, 4),
+            "status": rng.choice(["pending", "provisioning", "running"]),
+            "user_config": {
+                "tone": rng.choice(["formal", "friendly"]),
+                "language": rng.choice(["en", "de", "ru"]),
+                "greeting": _text(rng, 20),
+                "channels": [{"type": "telegram", "token_ref": f"vault:{i}"}],
+            },
+            "pipeline_config": {
+                "model": "gpt-4o-mini",
+                "temperature": 0.2,
+                "retrieval": {"top_k": 8, "chunk_size": 512, "rerank": True},
+                "system_prompt": _text(rng, 120),
+            },
+            "created_at": "2026-10-18T08:59:00.000000+00:00",
+            "updated_at": "2026-10-18T09:00:00.123456+00:00",
+        },
+    }
+
+
+def kb_entry_event(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "routing_key": "knowledge_base.entry.created",
+        "table": "knowledge_base_entries",
+        "op": "INSERT",
+        "schema_version": 1,
+        "seq": 2_000_000 + i,
+        "emitted_at": "2026-10-18T09:00:00.123456+00:00",
+        "data": {
+            "id": i,
+            "knowledge_base_id": rng.randint(1, 500),
+            "data_type": "text",
+            "lang_hint": "en",
+            "status": "queued",
+            "content": {"text": _text(rng, rng.randint(200, 1200)), "source": f"upload-{i}.md"},
+            "created_at": "2026-10-18T09:00:00.123456+00:00",
+            "updated_at": "2026-10-18T09:00:00.123456+00:00",
+        },
+    }
+
+
+def notify_payloads(events: int, seed: int = 7) -> list[str]:
+    """Alternating instance / KB-entry NOTIFY payloads as Postgres would send them."""
+    rng = random.Random(seed)
+    builders = (instance_event, kb_entry_event)
+    return [jsonb_text(builders[i % 2](i, rng)) for i in range(events)]
+
+
+def sized_payloads(events: int, size: int, seed: int = 7) -> list[str]:
+    """`notify_payloads` with each event's free text (the instance system prompt or the
+    entry content) resized so the payload is about `size` bytes; envelopes smaller than
+    the fixed fields (about 700 bytes) keep only those."""
+    rng = random.Random(seed)
+    builders = (instance_event, kb_entry_event)
+    payloads = []
+    for i in range(events):
+        event = builders[i % 2](i, rng)
+        data = event["data"]
+        holder, key = (data["pipeline_config"], "system_prompt") if i % 2 == 0 else (data["content"], "text")
+        holder[key] = ""
+        room = max(0, size - len(jsonb_text(event).encode()))
+        holder[key] = _text(rng, room // 4 + 1)[:room]
+        payloads.append(jsonb_text(event))
+    return payloads
+
+
+__all__ = ["instance_event", "jsonb_text", "kb_entry_event", "notify_payloads", "sized_payloads"]
@@ -0,0 +1,85 @@
+"""Compare per-message publishing with the batched, confirm-pipelined publisher.
+
+Both runs go through the bridge's `_send_encoded`, the path every source publishes on,
+with the spool disabled; only `PUBLISH_MODE` differs.
+
+Usage (from services/event_broker):
+
+    python -m benchmarks.publish_throughput --events 5000 --confirm-latency-ms 1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.publisher import BatchPublisher
+from app.messaging.transports import RabbitMqTransport
+from benchmarks.stubs import StubChannel
+
+ROUTING_KEY = "knowledge_base.entry.created"
+
+
+def _body(i: int) -> bytes:
+    return json.dumps(
+        {
+            "routing_key": ROUTING_KEY,
+            "table": "knowledge_base_entries",
+            "op": "INSERT",
+            "schema_version": 1,
+            "data": {"id": i, "knowledge_base_id": 1, "content": "x" * 256, "status": "queued"},
+        }
+    ).encode()
+
+
+async def run_single(events: int, confirm_latency: float) -> float:
+    bridge = EventBridge(settings=Settings(publish_mode="single", spool_enabled=False))
+    bridge._channel = StubChannel(confirm_latency)  # type: ignore[assignment]
+    started = time.perf_counter()
+    for i in range(events):
+        await bridge._send_encoded(ROUTING_KEY, bridge._codec.transcode(_body(i)))
+    return time.perf_counter() - started
+
+
+async def run_batched(
+    events: int, confirm_latency: float, batch_size: int, linger: float, max_in_flight: int
+) -> float:
+    settings = Settings(publish_mode="batched", spool_enabled=False)
+    bridge = EventBridge(settings=settings)
+    publisher = BatchPublisher(
+        RabbitMqTransport(StubChannel(confirm_latency), settings.outgoing_exchange),  # type: ignore[arg-type]
+        batch_size=batch_size,
+        linger=linger,
+        max_in_flight=max_in_flight,
+    )
+    bridge._publisher = publisher
+    await publisher.start()
+    started = time.perf_counter()
+    for i in range(events):
+        await bridge._send_encoded(ROUTING_KEY, bridge._codec.transcode(_body(i)))
+    await publisher.flush()
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--confirm-latency-ms", type=float, default=1.0)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--linger-ms", type=float, default=20.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    args = parser.parse_args()
+
+    latency = args.confirm_latency_ms / 1000
+    single = await run_single(args.events, latency)
+    batched = await run_batched(
+        args.events, latency, args.batch_size, args.linger_ms / 1000, args.max_in_flight
+    )
+    print(f"single : {args.events / single:10.0f} events/s ({single:.2f}s)")
+    print(f"batched: {args.events / batched:10.0f} events/s ({batched:.2f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import random
+from collections.abc import Callable
+from typing import Any
+
+from aio_pika.exceptions import DeliveryError
+
+OnPublish = Callable[[str, Any], None]
+
+
+class StubExchange:
+    """Stands in for an aio_pika exchange; every publish pays a simulated confirm round trip.
+
+    Confirmed messages are kept in `published`, or handed to `on_publish(routing_key,
+    message)` instead when given (long load tests should not keep every body).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        confirm_latency: float = 0.001,
+        nack_rate: float = 0.0,
+        on_publish: OnPublish | None = None,
+    ):
+        self.name = name
+        self.confirm_latency = confirm_latency
+        self.nack_rate = nack_rate
+        self.on_publish = on_publish
+        self.published: list[tuple[str, bytes]] = []
+
+    async def publish(self, message, routing_key: str, **_):
+        await asyncio.sleep(self.confirm_latency)
+        if self.nack_rate and random.random() < self.nack_rate:
+            raise DeliveryError(None, None)
+        if self.on_publish is not None:
+            self.on_publish(routing_key, message)
+        else:
+            self.published.append((routing_key, message.body))
+
+
+class StubChannel:
+    def __init__(
+        self,
+        confirm_latency: float = 0.001,
+        nack_rate: float = 0.0,
+        on_publish: OnPublish | None = None,
+    ):
+        self.confirm_latency = confirm_latency
+        self.nack_rate = nack_rate
+        self.on_publish = on_publish
+        self.declare_calls = 0
+        self.is_closed = False
+        self.exchanges: dict[str, StubExchange] = {}
+
+    async def declare_exchange(self, name: str, *_, **__) -> StubExchange:
+        self.declare_calls += 1
+        await asyncio.sleep(self.confirm_latency)
+        if name not in self.exchanges:
+            self.exchanges[name] = StubExchange(
+                name, self.confirm_latency, self.nack_rate, self.on_publish
+            )
+        return self.exchanges[name]
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+class StubListenConnection:
+    """Stands in for the asyncpg LISTEN connection.
+
+    `notify` calls the listeners registered for a channel the way asyncpg does: plain
+    callbacks inline, coroutine callbacks as one task each. `pending` is how many of those
+    tasks have not finished, i.e. notifications the bridge has not taken in yet.
+    """
+
+    def __init__(self, pid: int = 4242):
+        self.pid = pid
+        self._listeners: dict[str, list[Callable[..., Any]]] = {}
+        self._tasks: set[asyncio.Future[Any]] = set()
+        self._closed = False
+        self.notified = 0
+
+    async def add_listener(self, channel: str, callback: Callable[..., Any]) -> None:
+        self._listeners.setdefault(channel, []).append(callback)
+
+    async def remove_listener(self, channel: str, callback: Callable[..., Any]) -> None:
+        self._listeners.get(channel, []).remove(callback)
+
+    def add_termination_listener(self, _callback: Callable[..., Any]) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    async def close(self) -> None:
+        self._closed = True
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def notify(self, channel: str, payload: str) -> None:
+        self.notified += 1
+        for callback in self._listeners.get(channel, ()):
+            result = callback(self, self.pid, channel, payload)
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def drain(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+
+__all__ = ["StubChannel", "StubExchange", "StubListenConnection"]
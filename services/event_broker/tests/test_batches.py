@@ -0,0 +1,158 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import Settings
+from app.messaging.batches import BatchExpander, fan_out, is_batch
+from app.messaging.bridge import EventBridge
+from app.messaging.hydrator import Hydrator
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.transports import RabbitMqTransport
+
+
+class FakePool:
+    """Serves `domain_event_log` rows by seq and table rows by id."""
+
+    def __init__(self, journal: dict[int, list[dict]] | None = None, tables: dict | None = None):
+        self.journal = journal or {}
+        self.tables = tables or {}
+        self.journal_reads: list[int] = []
+        self.row_queries: list[tuple[str, list[int]]] = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetchval(self, sql: str, seq: int):
+        assert "domain_event_log" in sql
+        self.journal_reads.append(seq)
+        rows = self.journal.get(seq)
+        return json.dumps(rows) if rows is not None else None
+
+    async def fetch(self, sql: str, ids: list[int]) -> list[dict]:
+        table = sql.split('FROM "')[1].split('"')[0]
+        self.row_queries.append((table, sorted(ids)))
+        rows = self.tables.get(table, {})
+        return [{"id": i, "data": json.dumps(rows[i])} for i in ids if i in rows]
+
+
+class RecordingExchange:
+    def __init__(self):
+        self.published: list[tuple[str, dict]] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        self.published.append((routing_key, json.loads(message.body)))
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.exchange = RecordingExchange()
+
+    async def declare_exchange(self, *_, **__) -> RecordingExchange:
+        return self.exchange
+
+
+def batch(op: str, rows: list[dict] | None, seq: int = 40, **extra) -> dict:
+    envelope = {
+        "routing_key": f"knowledge_base.entry.{'deleted' if op == 'DELETE' else 'created'}",
+        "table": "knowledge_base_entries",
+        "op": op,
+        "schema_version": 1,
+        "seq": seq,
+        "emitted_at": "2026-10-18T10:00:00+00:00",
+        "batch": len(rows) if rows is not None else 3,
+        "claim_check": False,
+        **extra,
+    }
+    if rows is not None:
+        envelope["rows"] = rows
+    return envelope
+
+
+async def make_bridge(pool: FakePool, **overrides) -> tuple[EventBridge, RecordingChannel]:
+    channel = RecordingChannel()
+    settings = Settings(publish_mode="batched", spool_enabled=False, **overrides)
+    bridge = EventBridge(settings)
+    bridge._channel = channel  # type: ignore[assignment]
+    bridge._publisher = BatchPublisher(RabbitMqTransport(channel, "events.topic"), linger=0.001)  # type: ignore[arg-type]
+    await bridge._publisher.start()
+    bridge._batches = BatchExpander(pool, mode=settings.statement_batch_mode)  # type: ignore[arg-type]
+    bridge._hydrator = Hydrator(pool, bridge._submit_notify, window=0.001)  # type: ignore[arg-type]
+    return bridge, channel
+
+
+def test_fan_out_matches_row_envelopes() -> None:
+    rows = [{"id": 1, "content": "a"}, {"id": 2, "content": "b"}]
+    events = fan_out(batch("DELETE", rows), rows)
+    assert [event["data"] for event in events] == rows
+    assert [event["batch_index"] for event in events] == [0, 1]
+    assert all(event["seq"] == 40 and event["batch_size"] == 2 for event in events)
+    assert not any(is_batch(event) for event in events)
+
+    claims = fan_out(batch("DELETE", rows, claim_check=True), rows)
+    assert claims[0]["id"] == 1 and claims[0]["tombstone"] == rows[0] and "data" not in claims[0]
+
+
+@pytest.mark.asyncio
+async def test_inline_batch_fans_out_and_tracks_seq() -> None:
+    bridge, channel = await make_bridge(FakePool())
+    rows = [{"id": i, "knowledge_base_id": 7} for i in range(3)]
+
+    published = await bridge._dispatch(json.dumps(batch("INSERT", rows)))
+    assert await published is PublishOutcome.CONFIRMED
+
+    assert [body["data"]["id"] for _, body in channel.exchange.published] == [0, 1, 2]
+    assert {key for key, _ in channel.exchange.published} == {"knowledge_base.entry.created"}
+    assert bridge.sequence_stats().last_published_seq == 40
+    assert bridge.batch_stats().rows == 3 and bridge.batch_stats().loaded == 0
+
+
+@pytest.mark.asyncio
+async def test_large_batch_is_read_from_journal() -> None:
+    rows = [{"id": i} for i in range(5)]
+    pool = FakePool(journal={41: rows})
+    bridge, channel = await make_bridge(pool)
+
+    published = await bridge._dispatch(json.dumps(batch("DELETE", None, seq=41)))
+    assert await published is PublishOutcome.CONFIRMED
+    assert pool.journal_reads == [41]
+    assert len(channel.exchange.published) == 5
+    assert bridge.batch_stats().loaded == 1
+
+    assert await bridge._dispatch(json.dumps(batch("DELETE", None, seq=99))) is None
+    assert bridge.batch_stats().missing == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_check_batch_is_hydrated_per_row() -> None:
+    pool = FakePool(tables={"knowledge_base_entries": {1: {"id": 1, "content": "x"}, 2: {"id": 2, "content": "y"}}})
+    bridge, channel = await make_bridge(pool)
+
+    envelope = batch("INSERT", [{"id": 1}, {"id": 2}], claim_check=True)
+    published = await bridge._dispatch(json.dumps(envelope))
+    assert await asyncio.wait_for(published, timeout=1) is PublishOutcome.CONFIRMED
+
+    assert pool.row_queries == [("knowledge_base_entries", [1, 2])]
+    bodies = sorted((body for _, body in channel.exchange.published), key=lambda body: body["data"]["id"])
+    assert [body["data"]["content"] for body in bodies] == ["x", "y"]
+    assert [body["batch_index"] for body in bodies] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_forward_mode_publishes_one_batch_message() -> None:
+    bridge, channel = await make_bridge(FakePool(), statement_batch_mode="forward")
+    rows = [{"id": i} for i in range(4)]
+
+    published = await bridge._dispatch(json.dumps(batch("DELETE", rows)))
+    assert await published is PublishOutcome.CONFIRMED
+
+    [(routing_key, body)] = channel.exchange.published
+    assert routing_key == "knowledge_base.entry.deleted.batch"
+    assert body["rows"] == rows and body["batch_size"] == 4 and body["seq"] == 40
+
+
+def test_unknown_mode_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        BatchExpander(FakePool(), mode="explode")  # type: ignore[arg-type]
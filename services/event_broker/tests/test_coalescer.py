@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.messaging.coalescer import Coalescer, aggregate_key
+from app.messaging.publisher import PublishOutcome
+
+
+class Emitter:
+    def __init__(self):
+        self.emitted: list[tuple[str, int, str]] = []
+
+    async def __call__(self, envelope: dict) -> asyncio.Future[PublishOutcome]:
+        self.emitted.append((envelope["routing_key"], envelope["data"]["id"], envelope["data"]["status"]))
+        future: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+        future.set_result(PublishOutcome.CONFIRMED)
+        return future
+
+
+def _event(routing_key: str, row_id: int, status: str) -> dict:
+    op = routing_key.rsplit(".", 1)[1].upper().replace("CREATED", "INSERT").replace("DELETED", "DELETE")
+    return {"routing_key": routing_key, "table": "instances", "op": op, "data": {"id": row_id, "status": status}}
+
+
+@pytest.mark.asyncio
+async def test_burst_of_updates_collapses_to_latest_state() -> None:
+    emitter = Emitter()
+    coalescer = Coalescer(emitter, {"instance.updated": 0.01})
+
+    futures = [
+        await coalescer.offer(_event("instance.updated", 1, status))
+        for status in ("provisioning", "running", "failed")
+    ]
+    await asyncio.sleep(0.05)
+
+    assert emitter.emitted == [("instance.updated", 1, "failed")]
+    assert [await future for future in futures] == [PublishOutcome.CONFIRMED] * 3
+    stats = coalescer.stats()
+    assert stats.collapsed == 2 and stats.collapsed_by_key == {"instance.updated": 2}
+
+
+@pytest.mark.asyncio
+async def test_create_and_delete_are_never_reordered() -> None:
+    emitter = Emitter()
+    coalescer = Coalescer(emitter, {"instance.updated": 10})
+
+    await coalescer.offer(_event("instance.created", 1, "pending"))
+    await coalescer.offer(_event("instance.updated", 1, "provisioning"))
+    await coalescer.offer(_event("instance.updated", 1, "running"))
+    await coalescer.offer(_event("instance.updated", 2, "running"))
+    await coalescer.offer(_event("instance.deleted", 1, "running"))
+    await coalescer.close()
+
+    assert emitter.emitted == [
+        ("instance.created", 1, "pending"),
+        ("instance.updated", 1, "running"),
+        ("instance.deleted", 1, "running"),
+        ("instance.updated", 2, "running"),
+    ]
+
+
+def test_aggregate_key_handles_claim_checks() -> None:
+    assert aggregate_key({"table": "instances", "id": 3}) == ("instances", 3)
+    assert aggregate_key({"table": "instances", "data": {"id": 4}}) == ("instances", 4)
+    assert aggregate_key({"routing_key": "agent.published"}) is None
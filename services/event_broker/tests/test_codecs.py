@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.codecs import (
+    CODECS,
+    MSGPACK_CONTENT_TYPE,
+    ZSTD_ENCODING,
+    EventCodec,
+    decode_body,
+    scan_routing_key,
+    scan_seq,
+)
+from benchmarks.payloads import instance_event, jsonb_text
+
+
+class CapturingExchange:
+    def __init__(self):
+        self.messages: list[tuple[str, object]] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        self.messages.append((routing_key, message))
+
+
+class CapturingChannel:
+    def __init__(self):
+        self.exchange = CapturingExchange()
+
+    async def declare_exchange(self, *_, **__) -> CapturingExchange:
+        return self.exchange
+
+
+def _envelope() -> dict:
+    envelope = instance_event(5, random.Random(1))
+    # A nested key with the same name must not confuse the pass-through scan.
+    envelope["data"]["user_config"]["routing_key"] = "spoofed.key"
+    return envelope
+
+
+@pytest.mark.parametrize("name", CODECS)
+@pytest.mark.parametrize("compression", ["none", "zstd"])
+def test_codecs_round_trip(name: str, compression: str) -> None:
+    pytest.importorskip("orjson")
+    pytest.importorskip("msgpack")
+    pytest.importorskip("zstandard")
+    codec = EventCodec(name, compression=compression, compress_min_bytes=512)
+    envelope = _envelope()
+
+    for encoded in (codec.encode(envelope), codec.transcode(jsonb_text(envelope).encode())):
+        assert decode_body(encoded.body, encoded.content_type, encoded.content_encoding) == envelope
+        assert encoded.content_encoding == (ZSTD_ENCODING if compression == "zstd" else None)
+        assert (encoded.content_type == MSGPACK_CONTENT_TYPE) == (name == "msgpack")
+
+
+def test_small_bodies_are_not_compressed() -> None:
+    pytest.importorskip("zstandard")
+    codec = EventCodec("json", compression="zstd", compress_min_bytes=4096)
+    assert codec.encode({"routing_key": "instance.deleted", "data": {"id": 1}}).content_encoding is None
+
+
+def test_scan_reads_top_level_fields_only() -> None:
+    payload = jsonb_text(_envelope())
+    assert scan_routing_key(payload) == "instance.updated"
+    assert scan_seq(payload) == 1_000_005
+    assert scan_routing_key('{"routing_key": "a\\"b"}') is None
+
+
+@pytest.mark.asyncio
+async def test_passthrough_publishes_notify_text_unchanged() -> None:
+    bridge = EventBridge(Settings(event_codec="passthrough"))
+    channel = CapturingChannel()
+    bridge._channel = channel  # type: ignore[assignment]
+    payload = jsonb_text(_envelope())
+
+    await bridge._dispatch(payload)
+
+    routing_key, message = channel.exchange.messages[0]
+    assert routing_key == "instance.updated"
+    assert message.body == payload.encode()
+    assert message.content_type == "application/json"
+    assert bridge.sequence_stats().last_published_seq == 1_000_005
@@ -0,0 +1,137 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.coalescer import Coalescer
+from app.messaging.diffs import FullRowRoutes, is_diff, merge_diff
+from app.messaging.hydrator import Hydrator
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.snapshot import SnapshotStore
+from app.messaging.transports import RabbitMqTransport
+
+
+class RecordingExchange:
+    def __init__(self):
+        self.published: list[tuple[str, dict]] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        self.published.append((routing_key, json.loads(message.body)))
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.exchange = RecordingExchange()
+
+    async def declare_exchange(self, *_, **__) -> RecordingExchange:
+        return self.exchange
+
+
+class FakePool:
+    def __init__(self, rows: dict[int, dict]):
+        self.rows = rows
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetch(self, _sql: str, ids: list[int]) -> list[dict]:
+        return [{"id": i, "data": json.dumps(self.rows[i])} for i in ids if i in self.rows]
+
+
+def update(row: dict, seq: int | None = None, version: int = 2, **extra) -> dict:
+    envelope = {"routing_key": "instance.updated", "table": "instances", "op": "UPDATE"}
+    envelope.update(schema_version=version, data=row, **extra)
+    if seq is not None:
+        envelope["seq"] = seq
+    return envelope
+
+
+def test_diffs_merge_onto_the_held_row() -> None:
+    full = update({"id": 1, "status": "pending", "user_config": {"big": True}}, version=1)
+    diff = update({"id": 1, "status": "running", "updated_at": "t1"})
+    assert is_diff(diff) and not is_diff(full)
+    assert not is_diff({**diff, "op": "INSERT"})
+
+    merged = merge_diff(full, diff)
+    assert merged["schema_version"] == 1
+    assert merged["data"] == {"id": 1, "status": "running", "user_config": {"big": True}, "updated_at": "t1"}
+    assert merge_diff(diff, full) is full
+
+    routes = FullRowRoutes(["instance.*"])
+    assert routes.wants(diff) and not routes.wants(full)
+    assert not FullRowRoutes().wants(diff)
+
+
+@pytest.mark.asyncio
+async def test_coalesced_diffs_keep_every_changed_column() -> None:
+    emitted: list[dict] = []
+
+    async def emit(envelope: dict) -> None:
+        emitted.append(envelope)
+
+    coalescer = Coalescer(emit, {"instance.updated": 10})
+    await coalescer.offer(update({"id": 1, "title": "new", "updated_at": "t1"}))
+    await coalescer.offer(update({"id": 1, "status": "running", "updated_at": "t2"}))
+    await coalescer.close()
+
+    [envelope] = emitted
+    assert envelope["schema_version"] == 2
+    assert envelope["data"] == {"id": 1, "title": "new", "status": "running", "updated_at": "t2"}
+
+
+def test_snapshot_merges_diffs_into_the_stored_row(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path / "snapshot.db")
+    created = {"routing_key": "instance.created", "table": "instances", "op": "INSERT", "seq": 1}
+    store.apply({**created, "schema_version": 1, "data": {"id": 1, "status": "pending", "title": "a"}})
+    store.flush()
+
+    store.apply(update({"id": 1, "status": "running"}, seq=2))
+    store.apply(update({"id": 1, "title": "b"}, seq=3))
+    store.apply(update({"id": 1, "status": "full copy"}, seq=3, version=1, routing_key="instance.updated.full"))
+    store.flush()
+
+    [line, _] = list(store.bootstrap())
+    event = json.loads(line)["event"]
+    assert event["schema_version"] == 1 and event["seq"] == 3
+    assert event["data"] == {"id": 1, "status": "running", "title": "b"}
+
+
+@pytest.mark.asyncio
+async def test_opted_in_keys_also_publish_the_full_row() -> None:
+    channel = RecordingChannel()
+    bridge = EventBridge(
+        Settings(
+            publish_mode="batched",
+            spool_enabled=False,
+            event_codec="passthrough",
+            full_row_routes=["instance.updated"],
+        )
+    )
+    bridge._channel = channel  # type: ignore[assignment]
+    bridge._publisher = BatchPublisher(RabbitMqTransport(channel, "events.topic"), linger=0.001)  # type: ignore[arg-type]
+    await bridge._publisher.start()
+    pool = FakePool({7: {"id": 7, "status": "running", "user_config": {"k": "v"}}})
+    bridge._hydrator = Hydrator(pool, bridge._submit_notify, window=0.001)  # type: ignore[arg-type]
+
+    diff = update({"id": 7, "status": "running", "updated_at": "t"}, seq=5)
+    published = await bridge._dispatch(json.dumps(diff))
+    assert await published is PublishOutcome.CONFIRMED
+    outbox = await bridge._submit("instance.updated", json.dumps({**diff, "event_id": 9}).encode())
+    assert await outbox is PublishOutcome.CONFIRMED
+    created = {"routing_key": "instance.created", "table": "instances", "op": "INSERT", "data": {"id": 8}}
+    assert await (await bridge._dispatch(json.dumps(created))) is PublishOutcome.CONFIRMED
+    await asyncio.sleep(0.01)
+
+    by_key: dict[str, list[dict]] = {}
+    for routing_key, body in channel.exchange.published:
+        by_key.setdefault(routing_key, []).append(body)
+    assert [body["data"] for body in by_key["instance.updated"]] == [diff["data"]] * 2
+    assert [(body["seq"], body.get("event_id")) for body in by_key["instance.updated.full"]] == [(5, None), (5, 9)]
+    assert by_key["instance.updated.full"][0]["data"] == pool.rows[7]
+    assert by_key["instance.updated.full"][0]["schema_version"] == 1
+    assert "instance.created.full" not in by_key
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.messaging.hydrator import Hydrator, is_claim_check
+from app.messaging.publisher import PublishOutcome
+
+
+class FakePool:
+    """asyncpg pool stand-in serving rows from in-memory tables."""
+
+    def __init__(self, tables: dict[str, dict[int, dict]]):
+        self.tables = tables
+        self.queries: list[tuple[str, list[int]]] = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetch(self, sql: str, ids: list[int]) -> list[dict]:
+        table = sql.split('FROM "')[1].split('"')[0]
+        self.queries.append((table, sorted(ids)))
+        rows = self.tables.get(table, {})
+        return [{"id": i, "data": json.dumps(rows[i])} for i in ids if i in rows]
+
+
+class Collector:
+    def __init__(self):
+        self.messages: list[tuple[str, dict]] = []
+
+    async def __call__(self, routing_key: str, body: bytes) -> asyncio.Future[PublishOutcome]:
+        future: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+        self.messages.append((routing_key, json.loads(body)))
+        future.set_result(PublishOutcome.CONFIRMED)
+        return future
+
+
+def _claim(table: str, op: str, id_: int, routing_key: str, **extra) -> dict:
+    return {"routing_key": routing_key, "table": table, "op": op, "schema_version": 1, "id": id_, **extra}
+
+
+@pytest.mark.asyncio
+async def test_claims_are_hydrated_with_one_query_per_table() -> None:
+    pool = FakePool({"instances": {1: {"id": 1, "status": "running"}, 2: {"id": 2, "status": "pending"}}})
+    collector = Collector()
+    hydrator = Hydrator(pool, collector, window=10)
+
+    futures = [
+        hydrator.add(_claim("instances", "UPDATE", 1, "instance.updated")),
+        hydrator.add(_claim("instances", "INSERT", 2, "instance.created")),
+        hydrator.add(_claim("instances", "UPDATE", 1, "instance.updated")),
+    ]
+    await hydrator.close()
+
+    assert pool.queries == [("instances", [1, 2])]
+    assert [await future for future in futures] == [PublishOutcome.CONFIRMED] * 3
+    assert collector.messages[1] == (
+        "instance.created",
+        {
+            "routing_key": "instance.created",
+            "table": "instances",
+            "op": "INSERT",
+            "schema_version": 1,
+            "data": {"id": 2, "status": "pending"},
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_deletes_use_tombstone_and_missing_rows_are_skipped() -> None:
+    pool = FakePool({"instances": {}})
+    collector = Collector()
+    hydrator = Hydrator(pool, collector, window=0.001)
+
+    gone = hydrator.add(_claim("instances", "UPDATE", 5, "instance.updated"))
+    deleted = hydrator.add(
+        _claim("instances", "DELETE", 5, "instance.deleted", tombstone={"id": 5, "user_id": 9})
+    )
+
+    assert await gone == PublishOutcome.CONFIRMED
+    assert await deleted == PublishOutcome.CONFIRMED
+    assert hydrator.missing == 1
+    assert collector.messages == [
+        (
+            "instance.deleted",
+            {
+                "routing_key": "instance.deleted",
+                "table": "instances",
+                "op": "DELETE",
+                "schema_version": 1,
+                "data": {"id": 5, "user_id": 9},
+            },
+        )
+    ]
+
+
+def test_full_envelopes_are_not_claims() -> None:
+    assert is_claim_check(_claim("instances", "UPDATE", 1, "instance.updated"))
+    assert not is_claim_check({"routing_key": "instance.updated", "data": {"id": 1}})
+
+
+@pytest.mark.asyncio
+async def test_a_failing_submit_fails_only_its_claim() -> None:
+    pool = FakePool({"instances": {1: {"id": 1}, 2: {"id": 2}, 3: {"id": 3}}})
+    collector = Collector()
+
+    async def submit(routing_key: str, body: bytes) -> asyncio.Future[PublishOutcome]:
+        if json.loads(body)["data"]["id"] == 2:
+            raise ConnectionError("channel closed")
+        return await collector(routing_key, body)
+
+    hydrator = Hydrator(pool, submit, window=10)
+    futures = [hydrator.add(_claim("instances", "UPDATE", i, "instance.updated")) for i in (1, 2, 3)]
+    await hydrator.close()
+
+    outcomes = await asyncio.wait_for(asyncio.gather(*futures), 1)
+    assert outcomes == [PublishOutcome.CONFIRMED, PublishOutcome.FAILED, PublishOutcome.CONFIRMED]
+    assert [body["data"]["id"] for _, body in collector.messages] == [1, 3]
@@ -0,0 +1,149 @@
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+import app.messaging.bridge as bridge_module
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.journal import CATCHUP_SQL, EventJournal, SequenceTracker
+
+
+class FakeJournalPool:
+    """Serves `domain_event_log` rows for the catch-up query."""
+
+    def __init__(self, seqs: range):
+        self.rows = [
+            {"seq": seq, "body": json.dumps({"routing_key": "instance.updated", "seq": seq})}
+            for seq in seqs
+        ]
+        self.queries = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetch(self, sql: str, after: int, limit: int) -> list[dict]:
+        assert sql == CATCHUP_SQL
+        self.queries += 1
+        return [row for row in self.rows if row["seq"] > after][:limit]
+
+
+class FakeListenConnection:
+    def __init__(self):
+        self.listeners: list[str] = []
+        self.closed = False
+
+    def add_termination_listener(self, _callback) -> None:
+        pass
+
+    async def add_listener(self, channel: str, _callback) -> None:
+        self.listeners.append(channel)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.payloads: list[str] = []
+
+    async def put(self, payload: str) -> None:
+        self.payloads.append(payload)
+
+
+@pytest.mark.asyncio
+async def test_replay_is_batched_and_bounded() -> None:
+    pool = FakeJournalPool(range(1, 26))
+    journal = EventJournal(pool)
+    seen: list[str] = []
+
+    async def put(body: str) -> None:
+        seen.append(body)
+
+    replayed, truncated = await journal.replay(10, put, batch_size=4, limit=8)
+    assert (replayed, truncated) == (8, True)
+    assert [json.loads(body)["seq"] for body in seen] == list(range(11, 19))
+
+    seen.clear()
+    replayed, truncated = await journal.replay(18, put, batch_size=4, limit=100)
+    assert (replayed, truncated) == (7, False)
+
+
+@pytest.mark.asyncio
+async def test_bridge_reconnects_with_backoff_and_catches_up(monkeypatch) -> None:
+    attempts = 0
+    connection = FakeListenConnection()
+
+    async def flaky_connect(_dsn: str) -> FakeListenConnection:
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise OSError("connection refused")
+        return connection
+
+    monkeypatch.setattr(bridge_module.asyncpg, "connect", flaky_connect)
+    bridge = EventBridge(Settings(reconnect_backoff_max_ms=10))
+    bridge._journal = EventJournal(FakeJournalPool(range(1, 8)))
+    bridge._work_queue = RecordingQueue()
+    bridge._sequence.last_published = 4
+
+    await bridge._reconnect()
+
+    assert attempts == 3
+    assert connection.listeners == ["instances_notify"]
+    assert [json.loads(payload)["seq"] for payload in bridge._work_queue.payloads] == [5, 6, 7]
+    stats = bridge.sequence_stats()
+    assert stats.connected and stats.reconnects == 1 and stats.replayed == 3
+
+
+def test_lag_in_sequence_numbers_and_seconds() -> None:
+    tracker = SequenceTracker()
+    tracker.start_at(100)
+    tracker.published({"seq": 103})
+    tracker.published({"seq": 101})
+    tracker.sample(head=110, oldest_pending_s=2.5)
+
+    stats = tracker.stats()
+    assert stats.last_published_seq == 103
+    assert (stats.lag_events, stats.lag_seconds) == (7, 2.5)
+
+
+@pytest.mark.asyncio
+async def test_catch_up_replays_an_earlier_seq_that_committed_after_a_later_one(monkeypatch) -> None:
+    connection = FakeListenConnection()
+
+    async def connect(_dsn: str) -> FakeListenConnection:
+        return connection
+
+    monkeypatch.setattr(bridge_module.asyncpg, "connect", connect)
+    bridge = EventBridge(Settings(reconnect_backoff_max_ms=10))
+    bridge._work_queue = RecordingQueue()
+    bridge._sequence.start_at(9)
+    bridge._sequence.published({"seq": 11})  # T2 (seq 11) committed first; T1 holds seq 10
+    bridge._sequence.published({"seq": 13})
+    bridge._sequence.published({"seq": 12})
+    assert bridge.sequence_stats().gaps == 1
+
+    # T1 commits while the bridge is disconnected, then seq 14 is written.
+    bridge._journal = EventJournal(FakeJournalPool(range(10, 15)))
+    await bridge._reconnect()
+
+    assert [json.loads(payload)["seq"] for payload in bridge._work_queue.payloads] == [10, 14]
+    assert bridge.sequence_stats().replayed == 2
+
+
+def test_gaps_expire_after_their_ttl(monkeypatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr("app.messaging.journal.time.monotonic", lambda: now)
+    tracker = SequenceTracker(gap_ttl=60)
+    tracker.start_at(1)
+    tracker.published({"seq": 5})
+    assert tracker.replay_after() == 1 and tracker.needs(3) and not tracker.needs(5)
+
+    now = 1059.0
+    tracker.sample(head=5, oldest_pending_s=None)
+    assert tracker.stats().gaps == 3
+    now = 1060.0
+    tracker.sample(head=5, oldest_pending_s=None)
+    assert tracker.stats().gaps == 0 and tracker.replay_after() == 5
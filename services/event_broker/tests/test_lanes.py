@@ -0,0 +1,180 @@
+import asyncio
+import json
+
+import aio_pika
+import pytest
+
+from app.messaging.lanes import LaneRouter, LatencyHistogram, topic_matches
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.transports import RabbitMqTransport
+from app.messaging.work_queue import OverflowPolicy, WorkQueue
+
+
+def envelope(routing_key: str, row_id: int = 1) -> str:
+    return json.dumps({"id": row_id, "data": {"id": row_id}, "routing_key": routing_key})
+
+
+def control_router() -> LaneRouter:
+    return LaneRouter.from_settings(
+        {"control": ["instance.created", "instance.deleted", "agent.#"]},
+        {"control": 8},
+        {"control": 9},
+        {},
+    )
+
+
+class SlowHandler:
+    """Simulates a saturated publisher: one event at a time, a fixed cost each."""
+
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+
+    async def __call__(self, payload: str) -> None:
+        await asyncio.sleep(0.001)
+        self.seen.append(json.loads(payload)["routing_key"])
+
+
+def test_topic_patterns() -> None:
+    assert topic_matches("instance.*", "instance.created")
+    assert not topic_matches("instance.*", "knowledge_base.entry.created")
+    assert topic_matches("knowledge_base.#", "knowledge_base.entry.created")
+    assert topic_matches("#", "anything.at.all")
+    assert not topic_matches("agent.*", "agent.published.v2")
+
+
+def test_router_first_match_and_default() -> None:
+    router = control_router()
+    assert [lane.name for lane in router.lanes] == ["control", "default"]
+    assert router.lane("instance.deleted").priority == 9
+    assert router.lane("agent.retired").name == "control"
+    assert router.lane("knowledge_base.entry.created").name == "default"
+    assert router.lane(None).name == "default"
+    with pytest.raises(ValueError):
+        LaneRouter.from_settings({}, {"control": 2}, {}, {})
+
+
+def test_histogram_is_cumulative() -> None:
+    histogram = LatencyHistogram()
+    for seconds in (0.0005, 0.003, 0.003, 20):
+        histogram.observe(seconds)
+    buckets = histogram.cumulative()
+    assert buckets["1"] == 1
+    assert buckets["5"] == 3
+    assert buckets["10000"] == 3
+    assert buckets["+Inf"] == histogram.count == 4
+
+
+@pytest.mark.asyncio
+async def test_control_lane_overtakes_bulk_backlog() -> None:
+    handler = SlowHandler()
+    queue = WorkQueue(handler, maxsize=1000, workers=1, router=control_router())
+    for index in range(200):
+        await queue.put(envelope("knowledge_base.entry.created", index))
+    await queue.put(envelope("instance.created"))
+    await queue.put(envelope("instance.deleted"))
+
+    await queue.start()
+    await queue.stop()
+
+    # With weight 8:1 both control events go out within the first few publishes.
+    assert handler.seen.index("instance.deleted") < 5
+    stats = {lane.name: lane for lane in queue.stats().lanes}
+    assert stats["control"].published == 2
+    assert stats["default"].published == 200
+    assert stats["control"].latency_p99_ms < stats["default"].latency_p99_ms
+    assert stats["control"].latency_histogram_ms["+Inf"] == 2
+
+
+@pytest.mark.asyncio
+async def test_weighted_round_robin_shares_workers() -> None:
+    handler = SlowHandler()
+    router = LaneRouter.from_settings({"control": ["instance.*"]}, {"control": 3}, {}, {})
+    queue = WorkQueue(handler, maxsize=100, workers=1, router=router)
+    for index in range(20):
+        await queue.put(envelope("instance.updated", index))
+        await queue.put(envelope("knowledge_base.entry.created", index))
+
+    await queue.start()
+    await queue.stop()
+
+    assert handler.seen[:8].count("instance.updated") == 6
+
+
+@pytest.mark.asyncio
+async def test_full_bulk_lane_does_not_block_control() -> None:
+    handler = SlowHandler()
+    queue = WorkQueue(handler, maxsize=2, workers=1, router=control_router())
+    await queue.put(envelope("knowledge_base.entry.created", 1))
+    await queue.put(envelope("knowledge_base.entry.created", 2))
+    blocked = asyncio.create_task(queue.put(envelope("knowledge_base.entry.created", 3)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    await asyncio.wait_for(queue.put(envelope("instance.created")), timeout=0.1)
+    await queue.start()
+    await blocked
+    await queue.stop()
+    assert handler.seen[0] == "instance.created"
+
+
+@pytest.mark.asyncio
+async def test_spill_is_per_lane(tmp_path) -> None:
+    handler = SlowHandler()
+    queue = WorkQueue(
+        handler,
+        maxsize=2,
+        workers=1,
+        overflow=OverflowPolicy.SPILL,
+        spill_path=str(tmp_path / "overflow"),
+        router=control_router(),
+    )
+    await queue.start()
+    for index in range(6):
+        await queue.put(envelope("knowledge_base.entry.created", index))
+    await queue.put(envelope("instance.created"))
+
+    stats = {lane.name: lane for lane in queue.stats().lanes}
+    assert stats["default"].spill_pending > 0
+    assert stats["control"].spill_pending == 0 and stats["control"].depth == 1
+
+    for _ in range(100):
+        if len(handler.seen) == 7:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    assert sorted(handler.seen) == ["instance.created"] + ["knowledge_base.entry.created"] * 6
+
+
+class RecordingExchange:
+    def __init__(self, name: str):
+        self.name = name
+        self.messages: list[tuple[str, int | None]] = []
+
+    async def publish(self, message, routing_key: str, **_):
+        self.messages.append((routing_key, message.priority))
+
+
+class RecordingChannel:
+    def __init__(self) -> None:
+        self.exchanges: dict[str, RecordingExchange] = {}
+
+    async def declare_exchange(self, name: str, kind, **_):
+        self.exchanges[name] = RecordingExchange(name)
+        return self.exchanges[name]
+
+
+@pytest.mark.asyncio
+async def test_publisher_routes_priority_and_exchange() -> None:
+    channel = RecordingChannel()
+    transport = RabbitMqTransport(
+        channel, "events.topic", extra_exchanges={"agents.direct": aio_pika.ExchangeType.DIRECT}
+    )
+    publisher = BatchPublisher(transport, linger=0.001)
+    await publisher.start()
+    control = publisher.submit("instance.created", b"{}", priority=9, exchange="agents.direct")
+    bulk = publisher.submit("knowledge_base.entry.created", b"{}")
+    await publisher.flush()
+
+    assert control.result() is bulk.result() is PublishOutcome.CONFIRMED
+    assert channel.exchanges["agents.direct"].messages == [("instance.created", 9)]
+    assert channel.exchanges["events.topic"].messages == [("knowledge_base.entry.created", 0)]
@@ -0,0 +1,144 @@
+import json
+import socket
+import urllib.request
+
+import pytest
+from aio_pika.exceptions import DeliveryError
+from httpx import AsyncClient
+from prometheus_client import CollectorRegistry, Counter, generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.api.metrics import serve_worker_metrics
+from app.core.config import Settings
+from app.main import app
+from app.messaging.bridge import EventBridge
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.transports import RabbitMqTransport
+
+
+class FlakyExchange:
+    """Fails the first publish of each routing key, nacks `reject`, confirms the rest."""
+
+    def __init__(self, reject: str = ""):
+        self.reject = reject
+        self.attempts: dict[str, int] = {}
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        self.attempts[routing_key] = self.attempts.get(routing_key, 0) + 1
+        if routing_key == self.reject:
+            raise DeliveryError(None, None)
+        if self.attempts[routing_key] == 1:
+            raise ConnectionError("channel closed")
+
+
+class FakeChannel:
+    def __init__(self, exchange: FlakyExchange):
+        self.exchange = exchange
+        self.is_closed = False
+
+    async def declare_exchange(self, *_, **__) -> FlakyExchange:
+        return self.exchange
+
+
+class FakePool:
+    def __init__(self, usage: float):
+        self.usage = usage
+
+    def is_closing(self) -> bool:
+        return False
+
+    async def fetchval(self, sql: str) -> float:
+        assert "pg_notification_queue_usage" in sql
+        return self.usage
+
+
+def samples(bridge: EventBridge) -> dict[tuple[str, tuple], float]:
+    text = generate_latest(bridge.metrics.registry).decode()
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_bridge_metrics() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'event_broker_connection_up{connection="rabbitmq"} 0.0' in response.text
+    assert "event_broker_pg_notification_queue_usage" in response.text
+
+
+@pytest.mark.asyncio
+async def test_deep_health_is_503_until_connected() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/v1/health/deep")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "degraded"
+    assert body["connections"]["postgres_listen"] is False
+
+
+@pytest.mark.asyncio
+async def test_publish_outcomes_retries_and_latency_are_counted() -> None:
+    exchange = FlakyExchange(reject="instance.deleted")
+    bridge = EventBridge(Settings(publish_mode="batched", spool_enabled=False))
+    bridge._channel = FakeChannel(exchange)  # type: ignore[assignment]
+    bridge._publisher = BatchPublisher(
+        RabbitMqTransport(bridge._channel, "events.topic"),  # type: ignore[arg-type]
+        linger=0.001,
+        on_message=bridge.metrics.outcome,
+        on_retry=bridge.metrics.retry,
+    )
+    await bridge._publisher.start()
+
+    created = await bridge._dispatch(json.dumps({"routing_key": "instance.created", "data": {"id": 1}}))
+    deleted = await bridge._dispatch(json.dumps({"routing_key": "instance.deleted", "data": {"id": 2}}))
+    assert await created is PublishOutcome.CONFIRMED
+    assert await deleted is PublishOutcome.NACKED
+
+    values = samples(bridge)
+    created_key = (("routing_key", "instance.created"),)
+    assert values[("event_broker_events_received_total", created_key)] == 1
+    assert values[("event_broker_events_published_total", created_key)] == 1
+    assert values[("event_broker_publish_retries_total", created_key)] == 1
+    assert values[("event_broker_publish_latency_seconds_count", created_key)] == 1
+    nacked = (("outcome", "nacked"), ("routing_key", "instance.deleted"))
+    assert values[("event_broker_publish_failures_total", nacked)] == 1
+
+
+@pytest.mark.asyncio
+async def test_notification_queue_usage_marks_bridge_degraded() -> None:
+    bridge = EventBridge(Settings(notify_queue_usage_alert=0.5))
+    bridge._pg_pool = FakePool(0.2)  # type: ignore[assignment]
+    await bridge._sample_notify_queue()
+    assert bridge.health().notification_queue_usage == 0.2
+
+    bridge._pg_pool = FakePool(0.75)  # type: ignore[assignment]
+    await bridge._sample_notify_queue()
+    assert samples(bridge)[("event_broker_pg_notification_queue_usage", ())] == 0.75
+    assert bridge.health().healthy is False
+
+
+def test_each_worker_serves_its_registry_on_its_own_port() -> None:
+    servers = []
+    with socket.socket() as taken:
+        taken.bind(("0.0.0.0", 0))
+        taken.listen()
+        first_port = taken.getsockname()[1]
+        try:
+            for worker in ("a", "b"):
+                registry = CollectorRegistry()
+                Counter("worker_marker", "Marks the serving worker.", ["worker"], registry=registry).labels(worker).inc()
+                server, port = serve_worker_metrics(registry, first_port, 8)
+                servers.append(server)
+                assert port != first_port
+                text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+                assert f'worker_marker_total{{worker="{worker}"}} 1.0' in text
+            assert servers[0].server_port != servers[1].server_port
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
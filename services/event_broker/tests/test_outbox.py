@@ -0,0 +1,175 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.outbox import ARCHIVE_SQL, DELETE_SQL, DRAIN_LOCK_SQL, OutboxDrainer
+from app.messaging.publisher import PublishOutcome
+
+
+class FakeOutboxConnection:
+    """Minimal asyncpg stand-in backed by an in-memory `domain_events` list."""
+
+    def __init__(self, rows: list[dict], *, lock_free: bool = True):
+        self.rows = rows
+        self.lock_free = lock_free
+        self.executed: list[tuple[str, list[int]]] = []
+        self.locks: list[tuple[str, int]] = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, _sql: str, limit: int, *partitioning) -> list[dict]:
+        rows = self.rows
+        if partitioning:
+            count, owned = partitioning
+            rows = [row for row in rows if row["id"] % count in owned]
+        return [
+            {
+                "id": row["id"],
+                "routing_key": row["routing_key"],
+                "aggregate": f"instances:{row.get('aggregate_id', row['id'])}",
+                "body": json.dumps(row),
+            }
+            for row in rows[:limit]
+        ]
+
+    async def fetchval(self, sql: str, namespace: int) -> bool:
+        self.locks.append((sql, namespace))
+        return self.lock_free
+
+    async def execute(self, sql: str, ids: list[int]) -> None:
+        self.executed.append((sql, ids))
+        self.rows = [row for row in self.rows if row["id"] not in ids]
+
+
+def _submitter(nack_ids: set[int]):
+    async def submit(routing_key: str, body: bytes) -> asyncio.Future[PublishOutcome]:
+        future: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+        event_id = json.loads(body)["id"]
+        future.set_result(PublishOutcome.NACKED if event_id in nack_ids else PublishOutcome.CONFIRMED)
+        return future
+
+    return submit
+
+
+@pytest.mark.asyncio
+async def test_confirmed_rows_are_deleted_in_bulk() -> None:
+    conn = FakeOutboxConnection([{"id": i, "routing_key": "instance.updated"} for i in range(1, 6)])
+    drainer = OutboxDrainer(conn, _submitter({3}), batch_size=10)
+
+    fetched, confirmed = await drainer.drain_once()
+
+    assert (fetched, confirmed) == (5, 4)
+    assert conn.executed == [(DELETE_SQL, [1, 2, 4, 5])]
+    assert [row["id"] for row in conn.rows] == [3]
+    assert drainer.unconfirmed == 1
+
+
+@pytest.mark.asyncio
+async def test_a_nack_holds_back_later_rows_of_the_same_aggregate() -> None:
+    aggregates = {1: 9, 2: 10, 3: 9, 4: 9, 5: 10}
+    conn = FakeOutboxConnection(
+        [{"id": i, "routing_key": "instance.updated", "aggregate_id": aggregates[i]} for i in range(1, 6)]
+    )
+    drainer = OutboxDrainer(conn, _submitter({3}), batch_size=10)
+
+    fetched, confirmed = await drainer.drain_once()
+
+    assert (fetched, confirmed) == (5, 3)
+    assert conn.executed == [(DELETE_SQL, [1, 2, 5])]
+    assert [row["id"] for row in conn.rows] == [3, 4]
+    assert drainer.unconfirmed == 2
+
+
+@pytest.mark.asyncio
+async def test_archive_mode_moves_rows() -> None:
+    conn = FakeOutboxConnection([{"id": 1, "routing_key": "instance.created"}])
+    drainer = OutboxDrainer(conn, _submitter(set()), archive=True)
+
+    await drainer.drain_once()
+
+    assert conn.executed == [(ARCHIVE_SQL, [1])]
+
+
+@pytest.mark.asyncio
+async def test_wakeup_hint_triggers_drain() -> None:
+    conn = FakeOutboxConnection([])
+    drainer = OutboxDrainer(conn, _submitter(set()), poll_interval=10)
+    task = asyncio.create_task(drainer.run())
+    await asyncio.sleep(0)
+
+    conn.rows.append({"id": 7, "routing_key": "instance.deleted"})
+    drainer.wake(None, 0, "domain_events_outbox", "")
+    for _ in range(50):
+        if drainer.published:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    assert drainer.published == 1
+    assert conn.rows == []
+
+
+@pytest.mark.asyncio
+async def test_partitioned_drainer_only_fetches_owned_aggregates() -> None:
+    conn = FakeOutboxConnection([{"id": i, "routing_key": "instance.updated"} for i in range(1, 9)])
+    drainer = OutboxDrainer(conn, _submitter(set()), partition_count=4, partitions=lambda: {1, 3})
+
+    await drainer.drain_once()
+
+    assert conn.executed == [(DELETE_SQL, [1, 3, 5, 7])]
+    assert [row["id"] for row in conn.rows] == [2, 4, 6, 8]
+
+
+@pytest.mark.asyncio
+async def test_unpartitioned_drainers_take_turns() -> None:
+    busy = FakeOutboxConnection([{"id": 1, "routing_key": "instance.updated"}], lock_free=False)
+    drainer = OutboxDrainer(busy, _submitter(set()), lock_namespace=7303)
+
+    assert await drainer.drain_once() == (0, 0)
+    assert busy.locks == [(DRAIN_LOCK_SQL, 7303)] and busy.executed == []
+
+    partitioned = FakeOutboxConnection([{"id": 1, "routing_key": "instance.updated"}], lock_free=False)
+    drainer = OutboxDrainer(partitioned, _submitter(set()), partitions=lambda: {0, 1}, partition_count=2, lock_namespace=7303)
+    assert await drainer.drain_once() == (1, 1)
+    assert partitioned.locks == []
+
+
+class DelayedExchange:
+    """Confirms earlier publishes more slowly than later ones."""
+
+    def __init__(self):
+        self.published: list[int] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        event_id = json.loads(message.body)["event_id"]
+        await asyncio.sleep(0.01 / event_id)
+        self.published.append(event_id)
+
+
+class DelayedChannel:
+    def __init__(self):
+        self.exchange = DelayedExchange()
+
+    async def declare_exchange(self, *_, **__) -> DelayedExchange:
+        return self.exchange
+
+
+@pytest.mark.asyncio
+async def test_single_publish_mode_sends_a_drained_batch_in_order() -> None:
+    channel = DelayedChannel()
+    bridge = EventBridge(Settings(publish_mode="single"))
+    bridge._channel = channel  # type: ignore[assignment]
+
+    futures = [
+        await bridge._submit("instance.updated", json.dumps({"event_id": i, "data": {"id": 9}}).encode())
+        for i in range(1, 4)
+    ]
+
+    assert [future.result() for future in futures] == [PublishOutcome.CONFIRMED] * 3
+    assert channel.exchange.published == [1, 2, 3]
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.journal import PARTITION_REPLAY_SQL, EventJournal
+from app.messaging.partitions import (
+    JOIN_SQL,
+    MEMBERS_SQL,
+    TRY_LOCK_SQL,
+    UNLOCK_ALL_SQL,
+    UNLOCK_SQL,
+    PartitionCoordinator,
+    partition_for,
+)
+
+
+class FakeLockServer:
+    """In-memory advisory lock table shared by several fake sessions."""
+
+    def __init__(self):
+        self.exclusive: dict[tuple[int, int], "FakeLockConnection"] = {}
+        self.members: set["FakeLockConnection"] = set()
+
+    def terminate(self, conn: "FakeLockConnection") -> None:
+        self.members.discard(conn)
+        self.exclusive = {key: owner for key, owner in self.exclusive.items() if owner is not conn}
+
+
+class FakeLockConnection:
+    def __init__(self, server: FakeLockServer):
+        self.server = server
+
+    async def fetchval(self, sql: str, *args: int):
+        server = self.server
+        if sql == JOIN_SQL:
+            server.members.add(self)
+        elif sql == MEMBERS_SQL:
+            return len(server.members)
+        elif sql == TRY_LOCK_SQL:
+            owner = server.exclusive.setdefault((args[0], args[1]), self)
+            return owner is self
+        elif sql == UNLOCK_SQL:
+            return server.exclusive.pop((args[0], args[1]), None) is self
+        elif sql == UNLOCK_ALL_SQL:
+            server.terminate(self)
+        return None
+
+
+def _coordinator(server: FakeLockServer) -> PartitionCoordinator:
+    return PartitionCoordinator(FakeLockConnection(server), partitions=8, namespace=7301)
+
+
+@pytest.mark.asyncio
+async def test_workers_split_partitions_and_fail_over() -> None:
+    server = FakeLockServer()
+    first, second = _coordinator(server), _coordinator(server)
+
+    await first.join()
+    assert first.owned == frozenset(range(8))
+    await second.join()
+    await first.rebalance()
+    await second.rebalance()
+
+    assert len(first.owned) == len(second.owned) == 4
+    assert first.owned.isdisjoint(second.owned)
+    assert first.owned | second.owned == frozenset(range(8))
+
+    server.terminate(second._conn)
+    await first.rebalance()
+    assert first.owned == frozenset(range(8))
+
+
+@pytest.mark.asyncio
+async def test_only_owned_aggregates_are_published() -> None:
+    server = FakeLockServer()
+    first, second = _coordinator(server), _coordinator(server)
+    await first.join()
+    await second.join()
+    await first.rebalance()
+    await second.rebalance()
+
+    envelopes = [{"table": "instances", "data": {"id": row_id}} for row_id in range(20)]
+    first_ids = [e["data"]["id"] for e in envelopes if first.owns(e)]
+    second_ids = [e["data"]["id"] for e in envelopes if second.owns(e)]
+
+    assert sorted(first_ids + second_ids) == list(range(20))
+    assert first.stats().skipped == len(second_ids)
+
+
+def test_partition_for_uses_row_id() -> None:
+    assert partition_for({"id": 13}, 8) == 5
+    assert partition_for({"data": {"id": 13}}, 8) == 5
+    assert partition_for({"routing_key": "agent.published"}, 8) == 0
+
+
+class FakeHandoverPool:
+    """Serves the partition replay query over logged claim-check envelopes for ids 0..15."""
+
+    def __init__(self):
+        self.rows = [
+            {"seq": seq, "body": json.dumps({"routing_key": "instance.updated", "id": seq, "seq": seq})}
+            for seq in range(16)
+        ]
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def fetch(self, sql: str, after: int, limit: int, _window: float, count: int, owned: list[int]):
+        assert sql == PARTITION_REPLAY_SQL
+        return [row for row in self.rows if row["seq"] > after and row["seq"] % count in owned][:limit]
+
+
+@pytest.mark.asyncio
+async def test_taking_over_a_partition_replays_its_journal_window() -> None:
+    bridge = EventBridge(Settings(partition_count=8, source_mode="notify"))
+    queued: list[int] = []
+
+    async def put(payload: str) -> None:
+        queued.append(json.loads(payload)["id"])
+
+    bridge._work_queue.put = put  # type: ignore[method-assign]
+    bridge._on_partitions_changed(frozenset({1, 3}))  # before connect() built the journal
+    assert queued == []
+
+    bridge._journal = EventJournal(FakeHandoverPool())  # type: ignore[arg-type]
+    bridge._start_handover()
+    await asyncio.gather(*bridge._handover_tasks)
+    assert queued == [1, 3, 9, 11]
+
+    queued.clear()
+    bridge._on_partitions_changed(frozenset({3}))  # losing one replays nothing
+    bridge._on_partitions_changed(frozenset({1, 3, 5}))  # regained 1, newly gained 5
+    await asyncio.gather(*bridge._handover_tasks)
+    assert sorted(queued) == [1, 5, 9, 13]
+    assert bridge.sequence_stats().replayed == 8
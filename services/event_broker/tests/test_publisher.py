@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+from aio_pika.exceptions import DeliveryError
+from tenacity import wait_none
+
+from app.messaging import publisher as publisher_module
+from app.messaging.publisher import BatchPublisher, BatchResult, PublishOutcome
+from app.messaging.transports import OutgoingMessage, RabbitMqTransport
+
+
+class FakeExchange:
+    def __init__(self, nack_keys: set[str] | None = None):
+        self.nack_keys = nack_keys or set()
+        self.published: list[str] = []
+        self.max_concurrent = 0
+        self._concurrent = 0
+
+    async def publish(self, message, routing_key: str, **_):
+        self._concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self._concurrent)
+        await asyncio.sleep(0.001)
+        self._concurrent -= 1
+        if routing_key in self.nack_keys:
+            raise DeliveryError(None, None)
+        self.published.append(routing_key)
+
+
+class ScriptedTransport:
+    """Records every `send`; `fail` maps a routing key to how many sends it still fails."""
+
+    name = "scripted"
+    rejections: tuple[type[BaseException], ...] = (DeliveryError,)
+
+    def __init__(self, fail: dict[str, int] | None = None, delays: dict[str, float] | None = None):
+        self.fail = dict(fail or {})
+        self.delays = delays or {}
+        self.sends: list[list[str]] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def send(self, messages: list[OutgoingMessage]) -> list[BaseException | None]:
+        keys = [message.routing_key for message in messages]
+        self.sends.append(keys)
+        await asyncio.sleep(max(self.delays.get(key, 0.0) for key in keys))
+        replies: list[BaseException | None] = []
+        for key in keys:
+            if self.fail.get(key):
+                self.fail[key] -= 1
+                replies.append(ConnectionError(key))
+            else:
+                replies.append(None)
+        return replies
+
+
+class FakeChannel:
+    def __init__(self, exchange: FakeExchange):
+        self.exchange = exchange
+        self.declare_calls = 0
+
+    async def declare_exchange(self, *_, **__):
+        self.declare_calls += 1
+        return self.exchange
+
+
+@pytest.mark.asyncio
+async def test_batches_by_size_and_declares_exchange_once() -> None:
+    exchange = FakeExchange()
+    channel = FakeChannel(exchange)
+    results: list[BatchResult] = []
+    publisher = BatchPublisher(
+        RabbitMqTransport(channel, "events.topic"), batch_size=10, linger=10, on_batch=results.append
+    )
+    await publisher.start()
+
+    futures = [publisher.submit("instance.updated", b"{}") for _ in range(25)]
+    await publisher.flush()
+
+    assert channel.declare_calls == 1
+    assert [result.size for result in results] == [10, 10, 5]
+    assert all(future.result() is PublishOutcome.CONFIRMED for future in futures)
+    assert exchange.max_concurrent > 1
+
+
+@pytest.mark.asyncio
+async def test_linger_flushes_partial_batch() -> None:
+    exchange = FakeExchange()
+    publisher = BatchPublisher(RabbitMqTransport(FakeChannel(exchange), "events.topic"), linger=0.01)
+    await publisher.start()
+
+    future = publisher.submit("instance.created", b"{}")
+    assert await asyncio.wait_for(future, timeout=1) is PublishOutcome.CONFIRMED
+    assert exchange.published == ["instance.created"]
+
+
+@pytest.mark.asyncio
+async def test_nacks_are_reported_per_batch() -> None:
+    exchange = FakeExchange(nack_keys={"instance.deleted"})
+    results: list[BatchResult] = []
+    publisher = BatchPublisher(
+        RabbitMqTransport(FakeChannel(exchange), "events.topic"),
+        batch_size=3,
+        linger=10,
+        on_batch=results.append,
+    )
+    await publisher.start()
+
+    publisher.submit("instance.created", b"{}")
+    nacked = publisher.submit("instance.deleted", b"{}")
+    publisher.submit("instance.updated", b"{}")
+    await publisher.flush()
+
+    assert nacked.result() is PublishOutcome.NACKED
+    assert results[0].confirmed == 2 and results[0].nacked == 1
+    assert publisher.stats.nacked == 1
+
+
+@pytest.mark.asyncio
+async def test_a_failed_message_is_resent_with_every_later_one(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(publisher_module, "wait_exponential", lambda **_: wait_none())
+    transport = ScriptedTransport(fail={"b": 1})
+    publisher = BatchPublisher(transport, batch_size=3, linger=10)  # type: ignore[arg-type]
+    await publisher.start()
+
+    futures = [publisher.submit(key, b"{}") for key in ("a", "b", "c")]
+    await publisher.flush()
+
+    assert transport.sends == [["a", "b", "c"], ["b", "c"]]
+    assert [future.result() for future in futures] == [PublishOutcome.CONFIRMED] * 3
+    assert publisher.stats.confirmed == 3
+
+
+@pytest.mark.asyncio
+async def test_later_messages_fail_with_the_first_undelivered_one(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(publisher_module, "wait_exponential", lambda **_: wait_none())
+    publisher = BatchPublisher(ScriptedTransport(fail={"b": 3}), batch_size=3, linger=10)  # type: ignore[arg-type]
+    await publisher.start()
+
+    futures = [publisher.submit(key, b"{}") for key in ("a", "b", "c")]
+    await publisher.flush()
+
+    outcomes = [future.result() for future in futures]
+    assert outcomes == [PublishOutcome.CONFIRMED, PublishOutcome.FAILED, PublishOutcome.FAILED]
+
+
+@pytest.mark.asyncio
+async def test_a_later_batch_waits_for_the_earlier_one() -> None:
+    transport = ScriptedTransport(delays={"slow": 0.02})
+    publisher = BatchPublisher(transport, batch_size=1, linger=10)  # type: ignore[arg-type]
+    await publisher.start()
+    settled: list[str] = []
+
+    for key in ("slow", "fast"):
+        publisher.submit(key, b"{}").add_done_callback(lambda _, key=key: settled.append(key))
+    await publisher.flush()
+
+    assert transport.sends == [["slow"], ["fast"]]
+    assert settled == ["slow", "fast"]
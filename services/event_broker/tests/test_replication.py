@@ -0,0 +1,157 @@
+import asyncio
+import json
+import struct
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.messaging.publisher import PublishOutcome
+from app.messaging.replication import (
+    PgOutputDecoder,
+    RecordedChangeFeed,
+    ReplicationSource,
+    WalRecord,
+    format_lsn,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class Collector:
+    def __init__(self, nack_keys: set[str] | None = None):
+        self.nack_keys = nack_keys or set()
+        self.messages: list[tuple[str, dict]] = []
+
+    async def __call__(self, routing_key: str, body: bytes) -> asyncio.Future[PublishOutcome]:
+        future: asyncio.Future[PublishOutcome] = asyncio.get_running_loop().create_future()
+        if routing_key in self.nack_keys:
+            future.set_result(PublishOutcome.NACKED)
+        else:
+            self.messages.append((routing_key, json.loads(body)))
+            future.set_result(PublishOutcome.CONFIRMED)
+        return future
+
+
+def _cstring(value: str) -> bytes:
+    return value.encode() + b"\x00"
+
+
+def _tuple(values: list[Any]) -> bytes:
+    """Tuple data; `...` marks an unchanged TOAST column."""
+    out = struct.pack("!h", len(values))
+    for value in values:
+        if value is None:
+            out += b"n"
+        elif value is ...:
+            out += b"u"
+        else:
+            raw = value.encode()
+            out += b"t" + struct.pack("!i", len(raw)) + raw
+    return out
+
+
+def _pgoutput_records() -> list[WalRecord]:
+    relation = (
+        b"R"
+        + struct.pack("!I", 16384)
+        + _cstring("public")
+        + _cstring("instances")
+        + b"f"
+        + struct.pack("!h", 3)
+        + b"\x01" + _cstring("id") + struct.pack("!Ii", 23, -1)
+        + b"\x00" + _cstring("user_config") + struct.pack("!Ii", 3802, -1)
+        + b"\x00" + _cstring("status") + struct.pack("!Ii", 99999, -1)
+    )
+    begin = b"B" + struct.pack("!Qqi", 0x2000100, 0, 900)
+    insert = b"I" + struct.pack("!I", 16384) + b"N" + _tuple(["42", '{"a": 1}', "pending"])
+    delete = b"D" + struct.pack("!I", 16384) + b"O" + _tuple(["42", "{}", "stopped"])
+    commit = b"C" + struct.pack("!bQQq", 0, 0x2000180, 0x2000200, 0)
+    return [
+        WalRecord("0/2000100", begin),
+        WalRecord("0/2000110", relation),
+        WalRecord("0/2000120", insert),
+        WalRecord("0/2000130", delete),
+        WalRecord("0/2000180", commit),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_wal2json_replay_produces_trigger_envelopes() -> None:
+    feed = RecordedChangeFeed.from_file(FIXTURES / "wal2json_instances.jsonl")
+    collector = Collector()
+    source = ReplicationSource(feed, collector, plugin="wal2json")
+
+    await source.poll_once()
+
+    assert [key for key, _ in collector.messages] == [
+        "instance.created",
+        "knowledge_base.created",
+        "instance.updated",
+    ]
+    created = collector.messages[0][1]
+    assert created["table"] == "instances" and created["op"] == "INSERT"
+    assert created["data"]["user_config"] == {"tone": "formal"}
+    assert created["data"]["updated_at"].startswith("2026-10-18T09:00:00")
+    assert feed.confirmed_lsn == "0/1A00200"
+    assert await feed.peek(10) == []
+
+
+@pytest.mark.asyncio
+async def test_lsn_only_advances_past_confirmed_transactions() -> None:
+    feed = RecordedChangeFeed.from_file(FIXTURES / "wal2json_instances.jsonl")
+    source = ReplicationSource(feed, Collector(nack_keys={"instance.updated"}), plugin="wal2json")
+
+    await source.poll_once()
+
+    assert feed.confirmed_lsn == "0/1A00100"
+    remaining = await feed.peek(10)
+    assert json.loads(remaining[0].data)["action"] == "B"
+
+
+@pytest.mark.asyncio
+async def test_pgoutput_decoding() -> None:
+    feed = RecordedChangeFeed(_pgoutput_records())
+    collector = Collector()
+    source = ReplicationSource(feed, collector, plugin="pgoutput")
+
+    await source.poll_once()
+
+    assert collector.messages == [
+        (
+            "instance.created",
+            {
+                "routing_key": "instance.created",
+                "table": "instances",
+                "op": "INSERT",
+                "schema_version": 1,
+                "data": {"id": 42, "user_config": {"a": 1}, "status": "pending"},
+            },
+        ),
+        (
+            "instance.deleted",
+            {
+                "routing_key": "instance.deleted",
+                "table": "instances",
+                "op": "DELETE",
+                "schema_version": 1,
+                "data": {"id": 42, "user_config": {}, "status": "stopped"},
+            },
+        ),
+    ]
+    assert feed.confirmed_lsn == format_lsn(0x2000200)
+
+
+def test_pgoutput_update_fills_unchanged_toast_columns_from_the_old_tuple() -> None:
+    decoder = PgOutputDecoder()
+    decoder.decode(_pgoutput_records()[1])  # the `instances` relation
+    old = _tuple(["42", '{"big": "toasted"}', "pending"])
+    update = b"U" + struct.pack("!I", 16384) + b"O" + old + b"N" + _tuple(["42", ..., "running"])
+
+    change = decoder.decode(WalRecord("0/2000140", update))
+
+    assert change.op == "UPDATE"
+    assert change.data == {"id": 42, "user_config": {"big": "toasted"}, "status": "running"}
+
+    without_old = b"U" + struct.pack("!I", 16384) + b"N" + _tuple(["42", ..., "running"])
+    assert decoder.decode(WalRecord("0/2000150", without_old)).data == {"id": 42, "status": "running"}
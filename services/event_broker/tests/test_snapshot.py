@@ -0,0 +1,174 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import Settings
+from app.main import app
+from app.main import bridge as app_bridge
+from app.messaging.bridge import EventBridge
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.snapshot import SnapshotStore, aggregate_key, maintain_periodically
+from app.messaging.transports import RabbitMqTransport
+
+
+class RecordingExchange:
+    def __init__(self):
+        self.published: list[str] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        self.published.append(routing_key)
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.exchange = RecordingExchange()
+
+    async def declare_exchange(self, *_, **__) -> RecordingExchange:
+        return self.exchange
+
+
+def event(op: str, row_id: int, seq: int, table: str = "instances", **data) -> dict:
+    suffix = {"INSERT": "created", "UPDATE": "updated", "DELETE": "deleted"}[op]
+    return {
+        "routing_key": f"instance.{suffix}",
+        "table": table,
+        "op": op,
+        "schema_version": 1,
+        "seq": seq,
+        "data": {"id": row_id, **data},
+    }
+
+
+def read(lines) -> tuple[dict[str, dict], dict]:
+    entries = [json.loads(line) for line in lines]
+    return {entry["key"]: entry for entry in entries[:-1]}, entries[-1]["handoff"]
+
+
+def test_latest_event_per_key_wins_and_tombstones_expire(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path / "snapshot.db", tombstone_ttl=0)
+    store.apply(event("INSERT", 1, 10, title="a"))
+    store.apply(event("UPDATE", 1, 12, title="b"))
+    store.apply(event("UPDATE", 1, 11, title="replayed"))
+    store.apply(event("DELETE", 2, 13))
+    store.apply({"routing_key": "agent.updated", "op": "UPDATE"})
+    store.flush()
+
+    entries, handoff = read(store.bootstrap())
+    assert entries["instances:1"]["event"]["data"]["title"] == "b"
+    assert entries["instances:1"]["position"] == 12
+    assert "instances:2" not in entries
+    assert handoff == {"position": 13, "entries": 1, "live": 1, "tombstones": 1}
+    assert store.stats().skipped == 1
+
+    tombstones, _ = read(store.bootstrap(include_tombstones=True))
+    assert tombstones["instances:2"]["deleted"] is True
+    assert store.purge_tombstones() == 1
+    assert store.stats().tombstones == 0
+
+
+def test_aggregate_key_covers_claim_check_and_tombstones() -> None:
+    assert aggregate_key({"table": "knowledge_base_entries", "id": 5}) == "knowledge_base_entries:5"
+    assert aggregate_key({"table": "instances", "tombstone": {"id": 3}}) == "instances:3"
+    assert aggregate_key({"table": "instances", "data": {}}) is None
+
+
+def test_bootstrap_reads_one_view_and_hands_off_by_position(tmp_path: Path) -> None:
+    store = SnapshotStore(tmp_path / "snapshot.db", page_size=2)
+    for row_id in range(5):
+        store.apply(event("INSERT", row_id, 100 + row_id, table="knowledge_bases"))
+    store.flush()
+
+    stream = store.bootstrap(prefix="knowledge_bases:")
+    first = json.loads(next(stream))
+    # Writes that land mid-stream are not visible to this bootstrap...
+    live = [
+        event("UPDATE", 4, 200, table="knowledge_bases", name="new"),
+        event("INSERT", 9, 201, table="knowledge_bases"),
+    ]
+    for change in live:
+        store.apply(change)
+    store.flush()
+    entries, handoff = read([json.dumps(first), *stream])
+    assert len(entries) == 5 and handoff["position"] == 104
+    assert "name" not in entries["knowledge_bases:4"]["event"]["data"]
+
+    # ...and the consumer picks them up from its live queue by comparing positions per key.
+    state = {key: entry["event"] for key, entry in entries.items()}
+    for change in [event("INSERT", 3, 103, table="knowledge_bases"), *live]:
+        key = aggregate_key(change)
+        if key not in entries or change["seq"] > entries[key]["position"]:
+            state[key] = change
+    final, _ = read(store.bootstrap(prefix="knowledge_bases:"))
+    assert state == {key: entry["event"] for key, entry in final.items()}
+
+
+@pytest.mark.asyncio
+async def test_apply_only_queues_and_a_backlog_flushes_in_a_thread(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SnapshotStore(tmp_path / "snapshot.db", flush_batch=3)
+    offloaded: list[str] = []
+
+    async def to_thread(func, *args):
+        offloaded.append(func.__name__)
+        return func(*args)
+
+    monkeypatch.setattr(asyncio, "to_thread", to_thread)
+    maintenance = asyncio.create_task(maintain_periodically(store, flush_interval=3600))
+    try:
+        store.apply(json.dumps(event("INSERT", 1, 1, title="raw")).encode())
+        store.apply(event("INSERT", 2, 2))
+        await asyncio.sleep(0)
+        assert store.stats().pending == 2 and store.stats().live == 0
+
+        store.apply(event("DELETE", 2, 3))  # reaches flush_batch
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert offloaded == ["flush"]
+    finally:
+        maintenance.cancel()
+    stats = store.stats()
+    assert (stats.pending, stats.live, stats.tombstones, stats.high_position) == (0, 1, 1, 3)
+    entries, _ = read(store.bootstrap())
+    assert entries["instances:1"]["event"]["data"]["title"] == "raw"
+
+
+@pytest.mark.asyncio
+async def test_bridge_applies_published_events(tmp_path: Path) -> None:
+    channel = RecordingChannel()
+    bridge = EventBridge(Settings(publish_mode="batched", spool_enabled=False, event_codec="passthrough"))
+    bridge._channel = channel  # type: ignore[assignment]
+    bridge._publisher = BatchPublisher(RabbitMqTransport(channel, "events.topic"), linger=0.001)  # type: ignore[arg-type]
+    await bridge._publisher.start()
+    bridge._snapshot = SnapshotStore(tmp_path / "snapshot.db")
+
+    published = await bridge._dispatch(json.dumps(event("INSERT", 7, 1, title="x")))
+    assert await published is PublishOutcome.CONFIRMED
+    outbox = {"routing_key": "instance.updated", "table": "instances", "op": "UPDATE", "event_id": 40}
+    outbox["data"] = {"id": 8}
+    assert await (await bridge._submit("instance.updated", json.dumps(outbox).encode())) is PublishOutcome.CONFIRMED
+
+    stats = bridge.snapshot_stats()
+    assert stats is not None and stats.pending == 2
+    entries, _ = read(bridge.snapshot.bootstrap())
+    assert entries == {}  # not flushed yet
+    bridge.snapshot.flush()
+    entries, handoff = read(bridge.snapshot.bootstrap())
+    assert set(entries) == {"instances:7", "instances:8"} and handoff["position"] == 40
+
+
+@pytest.mark.asyncio
+async def test_snapshot_endpoint_streams_ndjson(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.get("/api/v1/snapshot")).status_code == 404
+
+        store = SnapshotStore(tmp_path / "snapshot.db")
+        store.apply(event("INSERT", 1, 5))
+        monkeypatch.setattr(app_bridge, "_snapshot", store)
+        response = await client.get("/api/v1/snapshot", params={"prefix": "instances:"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    entries, handoff = read(response.text.splitlines())
+    assert list(entries) == ["instances:1"] and handoff["position"] == 5
@@ -0,0 +1,198 @@
+import asyncio
+import json
+
+import pytest
+from aio_pika.exceptions import DeliveryError
+from tenacity import wait_none
+
+from app.core.config import Settings
+from app.messaging import publisher as publisher_module
+from app.messaging import spool as spool_module
+from app.messaging.bridge import EventBridge
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.transports import RabbitMqTransport
+from app.messaging.spool import DiskSpool, SpoolFull, open_worker_spool
+
+
+class FlakyExchange:
+    """Fails every publish while `down` is set, like a lost connection, and always nacks
+    routing keys listed in `poison`."""
+
+    def __init__(self):
+        self.down = True
+        self.poison: set[str] = set()
+        self.published: list[dict] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        if self.down:
+            raise ConnectionError("broker unreachable")
+        if routing_key in self.poison:
+            raise DeliveryError(None, None)
+        self.published.append(json.loads(message.body))
+
+
+class FlakyChannel:
+    def __init__(self):
+        self.exchange = FlakyExchange()
+
+    async def declare_exchange(self, *_, **__) -> FlakyExchange:
+        return self.exchange
+
+
+def test_segments_roll_and_are_removed_once_drained(tmp_path) -> None:
+    spool = DiskSpool(tmp_path, segment_bytes=64)
+    spool.open()
+    for i in range(10):
+        spool.append(f"event-{i:02d}".encode() * 2)
+    assert spool.stats().segments > 1
+
+    first = spool.read(4)
+    assert [record for record, _ in first] == [f"event-{i:02d}".encode() * 2 for i in range(4)]
+    spool.commit(first[-1][1], len(first))
+    rest = spool.read(100)
+    assert len(rest) == 6
+    spool.commit(rest[-1][1], len(rest))
+
+    stats = spool.stats()
+    assert (stats.pending, stats.segments, stats.bytes, stats.drained) == (0, 1, 0, 10)
+    spool.close()
+
+
+def test_crash_recovery_resumes_at_cursor_and_drops_torn_tail(tmp_path) -> None:
+    spool = DiskSpool(tmp_path)
+    spool.open()
+    for i in range(5):
+        spool.append(str(i).encode())
+    records = spool.read(2)
+    spool.commit(records[-1][1], 2)
+    spool.close()
+    segment = next(tmp_path.glob("segment-*.log"))
+    with segment.open("ab") as handle:
+        handle.write(b"\x00\x00\x00\x09\x00")  # half-written frame from a crash
+
+    recovered = DiskSpool(tmp_path)
+    recovered.open()
+    assert recovered.stats().recovered == 3
+    assert [record for record, _ in recovered.read(10)] == [b"2", b"3", b"4"]
+    recovered.close()
+
+
+def test_disk_usage_is_bounded(tmp_path) -> None:
+    spool = DiskSpool(tmp_path, max_bytes=40)
+    spool.open()
+    spool.append(b"x" * 20)
+    with pytest.raises(SpoolFull):
+        spool.append(b"y" * 20)
+    assert spool.stats().rejected == 1
+    spool.close()
+
+
+def test_append_never_fsyncs_but_flags_a_full_batch(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    synced: list[int] = []
+    monkeypatch.setattr(spool_module.os, "fsync", synced.append)
+    spool = DiskSpool(tmp_path, segment_bytes=32, fsync_batch=3)
+    spool.open()
+    for i in range(3):
+        spool.append(f"event-{i:02d}".encode() * 2)
+
+    assert synced == [] and spool.backlog.is_set() and spool.unsynced == 3
+    spool.sync()
+    assert len(synced) == 3 and spool.unsynced == 0  # two rolled segments and the active one
+    spool.close()
+
+
+def test_each_worker_gets_its_own_spool_directory(tmp_path) -> None:
+    first = open_worker_spool(tmp_path)
+    second = open_worker_spool(tmp_path)
+    assert (first._dir.name, second._dir.name) == ("worker-0", "worker-1")
+
+    first.append(b"backlog")
+    first.close()
+    successor = open_worker_spool(tmp_path)
+    assert successor._dir.name == "worker-0" and successor.pending == 1
+    second.close()
+    successor.close()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(publisher_module, "wait_exponential", lambda **_: wait_none())
+
+
+async def spooling_bridge(tmp_path) -> tuple[EventBridge, FlakyChannel]:
+    channel = FlakyChannel()
+    bridge = EventBridge(
+        Settings(publish_mode="batched", spool_path=str(tmp_path / "spool"), spool_retry_interval_ms=10)
+    )
+    bridge._channel = channel  # type: ignore[assignment]
+    bridge._publisher = BatchPublisher(RabbitMqTransport(channel, "events.topic"), linger=0.001)  # type: ignore[arg-type]
+    await bridge._publisher.start()
+    bridge._open_spool()
+    return bridge, channel
+
+
+async def drained(bridge: EventBridge) -> None:
+    for _ in range(100):
+        if bridge.spool_stats().pending == 0 and not bridge._broker_down:
+            break
+        await asyncio.sleep(0.01)
+    for task in bridge._spool_tasks:
+        task.cancel()
+    await asyncio.gather(*bridge._spool_tasks, return_exceptions=True)
+    bridge._spool.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("no_backoff")
+async def test_bridge_spools_while_broker_is_down_and_drains_in_order(tmp_path) -> None:
+    bridge, channel = await spooling_bridge(tmp_path)
+
+    outcomes = []
+    for i in range(3):
+        payload = json.dumps({"routing_key": "instance.updated", "data": {"id": i}})
+        outcomes.append(await await_outcome(bridge, payload))
+    assert outcomes == [PublishOutcome.SPOOLED] * 3
+    assert bridge.spool_stats().pending == 3
+
+    channel.exchange.down = False
+    await drained(bridge)
+
+    assert [event["data"]["id"] for event in channel.exchange.published] == [0, 1, 2]
+    assert bridge.spool_stats().drained == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("no_backoff")
+async def test_a_nacked_event_is_dropped_instead_of_spooled(tmp_path) -> None:
+    bridge, channel = await spooling_bridge(tmp_path)
+    channel.exchange.down = False
+    channel.exchange.poison.add("instance.deleted")
+
+    rejected = await await_outcome(bridge, json.dumps({"routing_key": "instance.deleted", "data": {"id": 1}}))
+    confirmed = await await_outcome(bridge, json.dumps({"routing_key": "instance.updated", "data": {"id": 2}}))
+
+    assert (rejected, confirmed) == (PublishOutcome.NACKED, PublishOutcome.CONFIRMED)
+    assert bridge.spool_stats().appended == 0 and not bridge._broker_down
+    await drained(bridge)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("no_backoff")
+async def test_a_spooled_event_rejected_on_redelivery_does_not_block_the_spool(tmp_path) -> None:
+    bridge, channel = await spooling_bridge(tmp_path)
+    for i, routing_key in enumerate(["instance.deleted", "instance.updated"]):
+        payload = json.dumps({"routing_key": routing_key, "data": {"id": i}})
+        assert await await_outcome(bridge, payload) is PublishOutcome.SPOOLED
+
+    channel.exchange.poison.add("instance.deleted")
+    channel.exchange.down = False
+    await drained(bridge)
+
+    assert [event["data"]["id"] for event in channel.exchange.published] == [1]
+    assert bridge.spool_stats().drained == 2
+
+
+async def await_outcome(bridge: EventBridge, payload: str) -> PublishOutcome:
+    future = await bridge._dispatch(payload)
+    assert future is not None
+    return await future
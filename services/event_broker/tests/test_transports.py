@@ -0,0 +1,151 @@
+import json
+
+import fakeredis
+import pytest
+
+from app.core.config import Settings
+from app.messaging.bridge import EventBridge
+from app.messaging.publisher import BatchPublisher, PublishOutcome
+from app.messaging.transports import (
+    RABBITMQ,
+    REDIS_STREAMS,
+    OutgoingMessage,
+    RabbitMqTransport,
+    RedisStreamsTransport,
+    TransportRouter,
+)
+
+
+class RecordingExchange:
+    def __init__(self):
+        self.published: list[str] = []
+
+    async def publish(self, message, routing_key: str, **_) -> None:
+        self.published.append(routing_key)
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.exchange = RecordingExchange()
+        self.is_closed = False
+
+    async def declare_exchange(self, *_, **__) -> RecordingExchange:
+        return self.exchange
+
+
+class FlakyTransport:
+    """Fails each message's first send; rejects keys in `reject`."""
+
+    name = "flaky"
+    rejections = (PermissionError,)
+
+    def __init__(self, reject: set[str] | None = None):
+        self.reject = reject or set()
+        self.sends: list[list[str]] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def send(self, messages):
+        self.sends.append([message.routing_key for message in messages])
+        seen = sum(self.sends, [])
+        return [
+            PermissionError("denied")
+            if message.routing_key in self.reject
+            else ConnectionError("reset") if seen.count(message.routing_key) == 1 else None
+            for message in messages
+        ]
+
+
+def redis_transport(**kwargs) -> tuple[RedisStreamsTransport, fakeredis.FakeAsyncRedis]:
+    client = fakeredis.FakeAsyncRedis()
+    return RedisStreamsTransport(client, **kwargs), client
+
+
+def test_router_defaults_to_rabbitmq_and_fans_out() -> None:
+    router = TransportRouter({REDIS_STREAMS: ["instance.*", "knowledge_base.*"], RABBITMQ: ["#"]})
+    assert router.transports("instance.deleted") == (REDIS_STREAMS, RABBITMQ)
+    assert router.transports("knowledge_base.entry.created") == (RABBITMQ,)
+    assert TransportRouter({REDIS_STREAMS: ["instance.*"]}).transports("agent.updated") == (RABBITMQ,)
+    assert router.names == {RABBITMQ, REDIS_STREAMS}
+    with pytest.raises(ValueError):
+        TransportRouter({"kafka": ["#"]})
+
+
+@pytest.mark.asyncio
+async def test_redis_streams_pipeline_trim_and_consumer_groups() -> None:
+    transport, client = redis_transport(maxlen=5, groups=["user_backend.cache"])
+    await transport.start()
+
+    messages = [
+        OutgoingMessage(f"instance.{'created' if i == 0 else 'updated'}", json.dumps({"id": i}).encode())
+        for i in range(8)
+    ]
+    assert await transport.send(messages) == [None] * 8
+    await transport.send([OutgoingMessage("knowledge_base.deleted", b"{}", content_encoding="zstd")])
+
+    assert await client.xlen("events:instance") <= 8
+    [(stream, entries)] = await client.xreadgroup(
+        "user_backend.cache", "worker-1", {"events:instance": ">"}, count=100
+    )
+    assert stream == b"events:instance"
+    assert entries[-1][1][b"routing_key"] == b"instance.updated"
+    assert json.loads(entries[-1][1][b"body"]) == {"id": 7}
+    assert await client.xack("events:instance", "user_backend.cache", *(entry_id for entry_id, _ in entries))
+
+    [(_, [(_, fields)])] = await client.xreadgroup(
+        "user_backend.cache", "worker-1", {"events:knowledge_base": ">"}
+    )
+    assert fields[b"content_encoding"] == b"zstd"
+    assert transport.connected
+
+
+@pytest.mark.asyncio
+async def test_publisher_retries_and_rejects_through_any_transport() -> None:
+    transport = FlakyTransport(reject={"instance.deleted"})
+    retried: list[str] = []
+    publisher = BatchPublisher(transport, linger=10, on_retry=retried.append)
+    await publisher.start()
+
+    created = publisher.submit("instance.created", b"{}")
+    deleted = publisher.submit("instance.deleted", b"{}")
+    await publisher.flush()
+
+    assert created.result() is PublishOutcome.CONFIRMED
+    assert deleted.result() is PublishOutcome.NACKED
+    # The rejection came after an undelivered message, so it is only final once resent.
+    assert transport.sends == [["instance.created", "instance.deleted"]] * 2
+    assert retried == ["instance.created", "instance.deleted"]
+
+
+@pytest.mark.asyncio
+async def test_bridge_routes_keys_per_transport() -> None:
+    channel = RecordingChannel()
+    bridge = EventBridge(
+        Settings(
+            publish_mode="batched",
+            spool_enabled=False,
+            transport_routes={REDIS_STREAMS: ["instance.*"], RABBITMQ: ["#"]},
+        )
+    )
+    bridge._channel = channel  # type: ignore[assignment]
+    bridge._publisher = bridge._batch_publisher(RabbitMqTransport(channel, "events.topic"))  # type: ignore[arg-type]
+    bridge._streams, client = redis_transport()
+    bridge._transport_publishers[REDIS_STREAMS] = bridge._batch_publisher(bridge._streams)
+    for publisher in (bridge._publisher, *bridge._transport_publishers.values()):
+        await publisher.start()
+
+    instance = await bridge._dispatch(json.dumps({"routing_key": "instance.updated", "data": {"id": 1}}))
+    entry = await bridge._dispatch(json.dumps({"routing_key": "knowledge_base.entry.created", "data": {"id": 2}}))
+    assert await instance is PublishOutcome.CONFIRMED
+    assert await entry is PublishOutcome.CONFIRMED
+
+    assert channel.exchange.published == ["instance.updated", "knowledge_base.entry.created"]
+    assert await client.xlen("events:instance") == 1
+    assert not await client.exists("events:knowledge_base")
+    assert bridge.connection_state()["redis"] is True
+
+    # Unbatched RabbitMQ publishing still sends the Redis copy through its batcher.
+    bridge._publisher = None
+    await bridge._send("instance.deleted", bridge._codec.encode({"routing_key": "instance.deleted"}))
+    assert await client.xlen("events:instance") == 2
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+from app.messaging.work_queue import OverflowPolicy, WorkQueue
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+        self.gate = asyncio.Event()
+
+    async def __call__(self, payload: str) -> None:
+        await self.gate.wait()
+        self.seen.append(payload)
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_newest_events() -> None:
+    recorder = Recorder()
+    queue = WorkQueue(recorder, maxsize=2, workers=1, overflow=OverflowPolicy.DROP_OLDEST)
+    for payload in ["a", "b", "c", "d"]:
+        await queue.put(payload)
+
+    assert queue.depth == 2
+    assert queue.stats().dropped == 2
+
+    await queue.start()
+    recorder.gate.set()
+    await queue.stop()
+    assert recorder.seen == ["c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_block_policy_waits_for_room() -> None:
+    recorder = Recorder()
+    queue = WorkQueue(recorder, maxsize=1, workers=1, overflow=OverflowPolicy.BLOCK)
+    await queue.put("a")
+    blocked = asyncio.create_task(queue.put("b"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    await queue.start()
+    recorder.gate.set()
+    await blocked
+    await queue.stop()
+    assert recorder.seen == ["a", "b"]
+    stats = queue.stats()
+    assert stats.published == 2 and stats.latency_p99_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_spill_preserves_order(tmp_path) -> None:
+    recorder = Recorder()
+    queue = WorkQueue(
+        recorder,
+        maxsize=2,
+        workers=1,
+        overflow=OverflowPolicy.SPILL,
+        spill_path=str(tmp_path / "overflow.spill"),
+    )
+    await queue.start()
+    for payload in [str(i) for i in range(6)]:
+        await queue.put(payload)
+    assert queue.stats().spilled >= 3
+
+    recorder.gate.set()
+    for _ in range(100):
+        if len(recorder.seen) == 6:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    assert recorder.seen == [str(i) for i in range(6)]
+    assert queue.stats().spill_pending == 0
+
+
+@pytest.mark.asyncio
+async def test_bridge_stats_endpoint() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/v1/bridge/stats")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["work_queue"]["overflow_policy"] == "block"
+    assert body["coalescer"]["collapsed"] == 0
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_shared_db
+from shared_psql_models.etags import not_modified, versioned
 from shared_psql_models.models import Agent
 from shared_psql_models.schemas import AgentSchema
 
@@ -10,14 +11,29 @@ router = APIRouter(prefix="/agents", tags=["agents"])
 
 
 @router.get("", response_model=list[AgentSchema])
-async def list_agents(db: AsyncSession = Depends(get_shared_db)) -> list[AgentSchema]:
+async def list_agents(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_shared_db),
+) -> list[AgentSchema] | Response:
+    unchanged = await not_modified(request, response, db, versioned(Agent))
+    if unchanged is not None:
+        return unchanged
     result = await db.execute(select(Agent).order_by(Agent.id))
     agents = result.scalars().all()
     return [AgentSchema.model_validate(agent) for agent in agents]
 
 
 @router.get("/{agent_id}", response_model=AgentSchema)
-async def get_agent(agent_id: int, db: AsyncSession = Depends(get_shared_db)) -> AgentSchema:
+async def get_agent(
+    agent_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_shared_db),
+) -> AgentSchema | Response:
+    unchanged = await not_modified(request, response, db, versioned(Agent, Agent.id == agent_id))
+    if unchanged is not None:
+        return unchanged
     result = await db.execute(select(Agent).where(Agent.id == agent_id))
     agent = result.scalar_one_or_none()
     if not agent:
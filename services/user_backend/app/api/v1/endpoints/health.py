@@ -1,6 +1,9 @@
+from dataclasses import asdict
+
 from fastapi import APIRouter
 
-from app.schemas.health import HealthResponse
+from app.schemas.health import HealthResponse, InstanceCacheStats
+from app.services import instance_cache
 
 
 router = APIRouter()
@@ -11,3 +14,6 @@ async def healthcheck() -> HealthResponse:
     return HealthResponse(status="ok", detail="user_backend alive")
 
 
+@router.get("/cache", response_model=InstanceCacheStats, summary="Instance cache hit/miss counters")
+async def cache_stats() -> InstanceCacheStats:
+    return InstanceCacheStats(**asdict(instance_cache.stats()))
@@ -1,26 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import Select, insert, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import joinedload
 
 from app.api.deps import get_current_user, get_shared_db
 from app.models.user import User
 from app.schemas import (
     InstanceCreate,
+    InstanceInclude,
     InstanceOut,
     InstanceUpdate,
+    KnowledgeBaseEntryBulkItem,
+    KnowledgeBaseEntryBulkResult,
     KnowledgeBaseEntryCreate,
     KnowledgeBaseEntryOut,
 )
+from app.services import instance_cache
+from app.services.ownership import forget_instance, resolve_instance
 from shared_psql_models.models import (
     Agent,
     Instance,
     KnowledgeBase,
     KnowledgeBaseEntry,
 )
+from shared_psql_models.etags import conditional_response, not_modified, versioned
+from shared_psql_models.writes import create_instance_with_knowledge_base
 
 router = APIRouter(prefix="/instances", tags=["instances"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Rows per server-side cursor fetch (and per written chunk) of the NDJSON export.
+EXPORT_BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Entries per INSERT statement and transaction of a bulk upload. The statement triggers
+# publish one batched event per statement, so this is also the rows per NOTIFY.
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_ITEMS = 50_000
+_INVALID_JSON = object()
+_OVER_LIMIT = object()
+_ENTRY_SCHEMA = {"$ref": "#/components/schemas/KnowledgeBaseEntryCreate"}
+_BULK_REQUEST_BODY = {
+    "content": {
+        "application/json": {"schema": {"type": "array", "items": _ENTRY_SCHEMA}},
+        NDJSON_MEDIA_TYPE: {"schema": _ENTRY_SCHEMA},
+    }
+}
+
 
 @router.post("", response_model=InstanceOut, status_code=status.HTTP_201_CREATED)
 async def create_instance(
@@ -32,52 +66,56 @@ async def create_instance(
     if not agent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
 
-    instance = Instance(
+    instance = await create_instance_with_knowledge_base(
+        shared_db,
         bot_id=payload.bot_id,
         user_id=current_user.id,
         title=payload.title,
         user_config=payload.user_config,
         pipeline_config=payload.pipeline_config,
     )
-    shared_db.add(instance)
-    await shared_db.flush()
-
-    knowledge_base = KnowledgeBase(instance=instance)
-    shared_db.add(knowledge_base)
     await shared_db.commit()
-    await shared_db.refresh(instance)
-    await shared_db.refresh(knowledge_base)
-
-    instance.knowledge_base = knowledge_base
-    return InstanceOut.model_validate(instance)
+    await instance_cache.evict(current_user.id, instance.id)
+    return instance
 
 
 @router.get("", response_model=list[InstanceOut])
 async def list_instances(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: int | None = Query(
+        None, ge=0, description=f"`{NEXT_CURSOR_HEADER}` of the previous page"
+    ),
+    include: list[InstanceInclude] = Query(
+        [], description="Relations to load; without them `knowledge_base` is null"
+    ),
     current_user: User = Depends(get_current_user),
     shared_db: AsyncSession = Depends(get_shared_db),
-) -> list[InstanceOut]:
-    stmt = (
-        select(Instance)
-        .options(
-            selectinload(Instance.knowledge_base).selectinload(KnowledgeBase.entries),
-        )
-        .where(Instance.user_id == current_user.id)
-        .order_by(Instance.id)
+) -> Response:
+    """Keyset page of the caller's instances in `id` order.
+
+    `X-Next-Cursor` is set while more instances follow; pass it back as `cursor`. With
+    `include=knowledge_base` the knowledge base comes back with empty `entries`, which
+    only load with `include=entries`. Pages are served from the instance cache.
+    """
+    payload = await instance_cache.cached_page(
+        shared_db, current_user.id, limit=limit, cursor=cursor, include=include
     )
-    result = await shared_db.execute(stmt)
-    instances = result.scalars().unique().all()
-    return [InstanceOut.model_validate(instance) for instance in instances]
+    headers = {NEXT_CURSOR_HEADER: payload.next_cursor} if payload.next_cursor else None
+    return conditional_response(request, payload.etag, payload.body, headers)
 
 
 @router.get("/{instance_id}", response_model=InstanceOut)
 async def get_instance(
     instance_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     shared_db: AsyncSession = Depends(get_shared_db),
-) -> InstanceOut:
-    instance = await _get_instance(shared_db, current_user.id, instance_id)
-    return InstanceOut.model_validate(instance)
+) -> Response:
+    payload = await instance_cache.cached_instance(shared_db, current_user.id, instance_id)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Instance not found")
+    return conditional_response(request, payload.etag, payload.body)
 
 
 @router.patch("/{instance_id}", response_model=InstanceOut)
@@ -98,6 +136,7 @@ async def update_instance(
 
     await shared_db.commit()
     await shared_db.refresh(instance)
+    await instance_cache.evict(current_user.id, instance_id)
     return InstanceOut.model_validate(instance)
 
 
@@ -110,6 +149,8 @@ async def delete_instance(
     instance = await _get_instance(shared_db, current_user.id, instance_id, load_relations=False)
     await shared_db.delete(instance)
     await shared_db.commit()
+    await forget_instance(current_user.id, instance_id)
+    await instance_cache.evict(current_user.id, instance_id)
 
 
 @router.post("/{instance_id}/knowledge-base/entries", response_model=KnowledgeBaseEntryOut, status_code=status.HTTP_201_CREATED)
@@ -119,11 +160,11 @@ async def add_knowledge_base_entry(
     current_user: User = Depends(get_current_user),
     shared_db: AsyncSession = Depends(get_shared_db),
 ) -> KnowledgeBaseEntryOut:
-    instance = await _get_instance(shared_db, current_user.id, instance_id)
-    if not instance.knowledge_base:
+    _, knowledge_base_id = await resolve_instance(shared_db, current_user.id, instance_id)
+    if knowledge_base_id is None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Knowledge base missing")
     entry = KnowledgeBaseEntry(
-        knowledge_base_id=instance.knowledge_base.id,
+        knowledge_base_id=knowledge_base_id,
         content=payload.content,
         data_type=payload.data_type,
         lang_hint=payload.lang_hint,
@@ -131,28 +172,112 @@ async def add_knowledge_base_entry(
     shared_db.add(entry)
     await shared_db.commit()
     await shared_db.refresh(entry)
+    await instance_cache.evict(current_user.id, instance_id)
     return KnowledgeBaseEntryOut.model_validate(entry)
 
 
+@router.post(
+    "/{instance_id}/knowledge-base/entries/bulk",
+    response_model=KnowledgeBaseEntryBulkResult,
+    openapi_extra={"requestBody": _BULK_REQUEST_BODY},
+)
+async def bulk_add_knowledge_base_entries(
+    instance_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    shared_db: AsyncSession = Depends(get_shared_db),
+) -> KnowledgeBaseEntryBulkResult:
+    """Creates many entries from a JSON array or an NDJSON body (one entry per line).
+
+    Items are validated as they are read; invalid ones are reported by index and skipped.
+    Valid ones are inserted `BULK_CHUNK_SIZE` at a time with one multi-row
+    `INSERT ... RETURNING` and committed per chunk, so a failed chunk does not undo the
+    chunks before it. A JSON array over `BULK_MAX_ITEMS` is rejected with 413 before
+    anything is inserted; an NDJSON body stops being read at the limit and the first
+    line past it is reported as an error.
+    """
+    _, knowledge_base_id = await resolve_instance(shared_db, current_user.id, instance_id)
+    if knowledge_base_id is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Knowledge base missing")
+
+    items: list[KnowledgeBaseEntryBulkItem] = []
+    chunk: list[tuple[int, KnowledgeBaseEntryCreate]] = []
+    async for index, raw in _bulk_items(request):
+        if raw is _OVER_LIMIT:
+            items.append(
+                KnowledgeBaseEntryBulkItem(
+                    index=index,
+                    error=f"Over the {BULK_MAX_ITEMS} entry limit; later lines were not read",
+                )
+            )
+            break
+        if raw is _INVALID_JSON:
+            items.append(KnowledgeBaseEntryBulkItem(index=index, error="Invalid JSON"))
+            continue
+        try:
+            chunk.append((index, KnowledgeBaseEntryCreate.model_validate(raw)))
+        except ValidationError as exc:
+            items.append(KnowledgeBaseEntryBulkItem(index=index, error=_validation_message(exc)))
+            continue
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            items.extend(await _insert_entries(shared_db, knowledge_base_id, chunk))
+            chunk = []
+    if chunk:
+        items.extend(await _insert_entries(shared_db, knowledge_base_id, chunk))
+
+    items.sort(key=lambda item: item.index)
+    created = sum(1 for item in items if item.id is not None)
+    if created:
+        await instance_cache.evict(current_user.id, instance_id)
+    return KnowledgeBaseEntryBulkResult(created=created, failed=len(items) - created, items=items)
+
+
 @router.get("/{instance_id}/knowledge-base/entries", response_model=list[KnowledgeBaseEntryOut])
 async def list_knowledge_base_entries(
     instance_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     shared_db: AsyncSession = Depends(get_shared_db),
-) -> list[KnowledgeBaseEntryOut]:
-    instance = await _get_instance(shared_db, current_user.id, instance_id)
-    if not instance.knowledge_base:
+) -> list[KnowledgeBaseEntryOut] | Response:
+    _, knowledge_base_id = await resolve_instance(shared_db, current_user.id, instance_id)
+    if knowledge_base_id is None:
         return []
-    stmt = (
-        select(KnowledgeBaseEntry)
-        .where(KnowledgeBaseEntry.knowledge_base_id == instance.knowledge_base.id)
-        .order_by(KnowledgeBaseEntry.id)
+    unchanged = await not_modified(
+        request,
+        response,
+        shared_db,
+        versioned(KnowledgeBaseEntry, KnowledgeBaseEntry.knowledge_base_id == knowledge_base_id),
+        scope=str(current_user.id),
     )
-    result = await shared_db.execute(stmt)
+    if unchanged is not None:
+        return unchanged
+    result = await shared_db.execute(_entries_query(knowledge_base_id))
     entries = result.scalars().all()
     return [KnowledgeBaseEntryOut.model_validate(entry) for entry in entries]
 
 
+@router.get(
+    "/{instance_id}/knowledge-base/entries/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def export_knowledge_base_entries(
+    instance_id: int,
+    current_user: User = Depends(get_current_user),
+    shared_db: AsyncSession = Depends(get_shared_db),
+) -> StreamingResponse:
+    """Every entry as one `KnowledgeBaseEntryOut` JSON object per line, in `id` order.
+
+    Rows come from a server-side cursor `EXPORT_BATCH_SIZE` at a time and are written as
+    they arrive, so memory does not grow with the size of the knowledge base.
+    """
+    _, knowledge_base_id = await resolve_instance(shared_db, current_user.id, instance_id)
+    return StreamingResponse(
+        _export_lines(shared_db, knowledge_base_id), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
 @router.delete("/{instance_id}/knowledge-base/entries/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_knowledge_base_entry(
     instance_id: int,
@@ -160,12 +285,12 @@ async def delete_knowledge_base_entry(
     current_user: User = Depends(get_current_user),
     shared_db: AsyncSession = Depends(get_shared_db),
 ) -> None:
-    instance = await _get_instance(shared_db, current_user.id, instance_id)
-    if not instance.knowledge_base:
+    _, knowledge_base_id = await resolve_instance(shared_db, current_user.id, instance_id)
+    if knowledge_base_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Knowledge base not found")
     stmt = select(KnowledgeBaseEntry).where(
         KnowledgeBaseEntry.id == entry_id,
-        KnowledgeBaseEntry.knowledge_base_id == instance.knowledge_base.id,
+        KnowledgeBaseEntry.knowledge_base_id == knowledge_base_id,
     )
     result = await shared_db.execute(stmt)
     entry = result.scalar_one_or_none()
@@ -173,6 +298,115 @@ async def delete_knowledge_base_entry(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
     await shared_db.delete(entry)
     await shared_db.commit()
+    await instance_cache.evict(current_user.id, instance_id)
+
+
+async def _bulk_items(request: Request) -> AsyncIterator[tuple[int, Any]]:
+    """`(index, decoded item)` pairs of a bulk upload; NDJSON bodies are read line by line.
+
+    Past `BULK_MAX_ITEMS`, an array raises 413 before the first item is yielded and an
+    NDJSON stream yields `_OVER_LIMIT` for the next line and stops.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith((NDJSON_MEDIA_TYPE, "application/jsonl")):
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid JSON"
+            ) from None
+        if not isinstance(payload, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Expected a JSON array of entries",
+            )
+        if len(payload) > BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {BULK_MAX_ITEMS} entries per request",
+            )
+        for index, raw in enumerate(payload):
+            yield index, raw
+        return
+
+    index, pending = 0, b""
+    async for data in request.stream():
+        *lines, pending = (pending + data).split(b"\n")
+        for line in lines:
+            if line.strip():
+                if index >= BULK_MAX_ITEMS:
+                    yield index, _OVER_LIMIT
+                    return
+                yield index, _decode_line(line)
+                index += 1
+    if pending.strip():
+        yield index, _OVER_LIMIT if index >= BULK_MAX_ITEMS else _decode_line(pending)
+
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return _INVALID_JSON
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'entry'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def _insert_entries(
+    shared_db: AsyncSession,
+    knowledge_base_id: int,
+    chunk: list[tuple[int, KnowledgeBaseEntryCreate]],
+) -> list[KnowledgeBaseEntryBulkItem]:
+    rows = [
+        {
+            "knowledge_base_id": knowledge_base_id,
+            "content": entry.content,
+            "data_type": entry.data_type,
+            "lang_hint": entry.lang_hint,
+        }
+        for _, entry in chunk
+    ]
+    stmt = insert(KnowledgeBaseEntry).returning(KnowledgeBaseEntry.id, sort_by_parameter_order=True)
+    try:
+        result = await shared_db.execute(stmt, rows)
+        ids = result.scalars().all()
+        await shared_db.commit()
+    except SQLAlchemyError:
+        await shared_db.rollback()
+        return [KnowledgeBaseEntryBulkItem(index=index, error="Insert failed") for index, _ in chunk]
+    return [KnowledgeBaseEntryBulkItem(index=index, id=id_) for (index, _), id_ in zip(chunk, ids)]
+
+
+async def _export_lines(
+    shared_db: AsyncSession, knowledge_base_id: int | None
+) -> AsyncIterator[bytes]:
+    # Runs after the endpoint returned, when the dependency may already have closed the
+    # session; using it reopens a connection, which is released here.
+    try:
+        if knowledge_base_id is None:
+            return
+        stmt = _entries_query(knowledge_base_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        result = await shared_db.stream_scalars(stmt)
+        async for entries in result.partitions():
+            yield b"".join(
+                KnowledgeBaseEntryOut.model_validate(entry).model_dump_json().encode() + b"\n"
+                for entry in entries
+            )
+    finally:
+        await shared_db.close()
+
+
+def _entries_query(knowledge_base_id: int) -> Select[tuple[KnowledgeBaseEntry]]:
+    return (
+        select(KnowledgeBaseEntry)
+        .where(KnowledgeBaseEntry.knowledge_base_id == knowledge_base_id)
+        .order_by(KnowledgeBaseEntry.id)
+    )
 
 
 async def _get_instance(
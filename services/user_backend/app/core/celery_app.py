@@ -8,6 +8,7 @@ celery_app = Celery(
     settings.app_name,
     broker=settings.rabbitmq_url,
     backend=settings.redis_url,
+    include=["app.workers.tasks"],
 )
 celery_app.conf.task_default_queue = settings.celery_default_queue
 celery_app.conf.task_routes = {"app.workers.tasks.*": {"queue": settings.celery_default_queue}}
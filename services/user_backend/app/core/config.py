@@ -25,6 +25,10 @@ class Settings(BaseSettings):
     verification_email_subject: str = "Complete your Botberi signup"
     password_reset_email_subject: str = "Botberi password reset"
     frontend_profile_url: str = "https://app.local/profile"
+    ownership_cache_ttl_seconds: int = 30
+    instance_cache_ttl_seconds: int = 300
+    instance_cache_lock_seconds: float = 2.0
+    instance_cache_queue: str = "user_backend.instance_cache"
     model_config = SettingsConfigDict(env_file=(".env",), env_file_encoding="utf-8", extra="allow")
 
 
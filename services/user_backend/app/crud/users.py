@@ -2,6 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
+from shared_psql_models.writes import insert_returning, update_returning
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
@@ -26,7 +27,9 @@ async def create_user(
     phone: str | None,
     telegram: str | None,
 ) -> User:
-    user = User(
+    user = await insert_returning(
+        db,
+        User,
         name=name,
         company=company,
         email=email,
@@ -34,9 +37,7 @@ async def create_user(
         phone=phone,
         telegram=telegram,
     )
-    db.add(user)
     await db.commit()
-    await db.refresh(user)
     return user
 
 
@@ -48,14 +49,18 @@ async def update_profile(
     company: str,
     phone: str | None,
     telegram: str | None,
-) -> User:
-    user.name = name
-    user.company = company
-    user.phone = phone
-    user.telegram = telegram
+) -> User | None:
+    updated = await update_returning(
+        db,
+        User,
+        User.id == user.id,
+        name=name,
+        company=company,
+        phone=phone,
+        telegram=telegram,
+    )
     await db.commit()
-    await db.refresh(user)
-    return user
+    return updated
 
 
 async def update_password(db: AsyncSession, user: User, hashed_password: str) -> None:
@@ -1,10 +1,13 @@
 from shared_psql_models.schemas import AgentSchema
 
-from .health import HealthResponse
+from .health import HealthResponse, InstanceCacheStats
 from .instance import (
     InstanceCreate,
+    InstanceInclude,
     InstanceOut,
     InstanceUpdate,
+    KnowledgeBaseEntryBulkItem,
+    KnowledgeBaseEntryBulkResult,
     KnowledgeBaseEntryCreate,
     KnowledgeBaseEntryOut,
     KnowledgeBaseOut,
@@ -21,6 +24,7 @@ from .user import (
 
 __all__ = [
     "HealthResponse",
+    "InstanceCacheStats",
     "RegistrationRequest",
     "RegistrationConfirm",
     "LoginRequest",
@@ -31,8 +35,11 @@ __all__ = [
     "AgentSchema",
     "InstanceCreate",
     "InstanceUpdate",
+    "InstanceInclude",
     "InstanceOut",
     "KnowledgeBaseOut",
+    "KnowledgeBaseEntryBulkItem",
+    "KnowledgeBaseEntryBulkResult",
     "KnowledgeBaseEntryCreate",
     "KnowledgeBaseEntryOut",
 ]
@@ -6,3 +6,13 @@ class HealthResponse(BaseModel):
     detail: str
 
 
+class InstanceCacheStats(BaseModel):
+    """Instance cache counters of the answering worker process since it started."""
+
+    hits: int
+    misses: int
+    fills: int
+    coalesced: int
+    lock_timeouts: int
+    errors: int
+    invalidations: int
@@ -1,3 +1,5 @@
+from enum import Enum
+
 from pydantic import BaseModel, Field
 
 from shared_psql_models.models import KBDataType, KBLangHint
@@ -27,6 +29,27 @@ class KnowledgeBaseEntryCreate(BaseModel):
     lang_hint: KBLangHint | None = None
 
 
+class KnowledgeBaseEntryBulkItem(BaseModel):
+    """Outcome of one item of a bulk upload; `index` is its position in the request."""
+
+    index: int
+    id: int | None = None
+    error: str | None = None
+
+
+class KnowledgeBaseEntryBulkResult(BaseModel):
+    created: int
+    failed: int
+    items: list[KnowledgeBaseEntryBulkItem]
+
+
+class InstanceInclude(str, Enum):
+    """Relations `GET /instances` loads on request; `entries` implies `knowledge_base`."""
+
+    KNOWLEDGE_BASE = "knowledge_base"
+    ENTRIES = "entries"
+
+
 InstanceOut = InstanceSchema
 KnowledgeBaseOut = KnowledgeBaseSchema
 KnowledgeBaseEntryOut = KnowledgeBaseEntrySchema
@@ -34,8 +57,11 @@ KnowledgeBaseEntryOut = KnowledgeBaseEntrySchema
 __all__ = [
     "InstanceCreate",
     "InstanceUpdate",
+    "InstanceInclude",
     "InstanceOut",
     "KnowledgeBaseOut",
+    "KnowledgeBaseEntryBulkItem",
+    "KnowledgeBaseEntryBulkResult",
     "KnowledgeBaseEntryCreate",
     "KnowledgeBaseEntryOut",
 ]
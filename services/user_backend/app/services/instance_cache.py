@@ -0,0 +1,396 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, replace
+from typing import Any
+
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, noload, selectinload
+
+from app.core.config import get_settings
+from app.schemas import InstanceInclude, InstanceOut
+from app.services import cache
+from shared_psql_models.etags import compute_etag, versioned
+from shared_psql_models.models import Instance, KnowledgeBase, KnowledgeBaseEntry
+
+settings = get_settings()
+
+CACHE_PREFIX = "instance_cache"
+# Source of generation numbers; never expires, so a generation is never handed out twice.
+CLOCK_KEY = f"{CACHE_PREFIX}:clock"
+LOCK_POLL_SECONDS = 0.02
+_PAGE = TypeAdapter(list[InstanceOut])
+
+
+@dataclass(slots=True)
+class CachedPayload:
+    """A rendered response: its ETag, JSON body and, for list pages, the next cursor."""
+
+    etag: str
+    body: str
+    next_cursor: str | None = None
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    fills: int = 0
+    coalesced: int = 0  # misses answered by another request's fill
+    lock_timeouts: int = 0
+    errors: int = 0
+    invalidations: int = 0
+
+
+_stats = CacheStats()
+
+
+def stats() -> CacheStats:
+    """Counters of this process since it started."""
+    return replace(_stats)
+
+
+def _generation_key(kind: str, id_: int) -> str:
+    return f"{CACHE_PREFIX}:gen:{kind}:{id_}"
+
+
+def _hot_key(instance_id: int) -> str:
+    return f"{CACHE_PREFIX}:hot:{instance_id}"
+
+
+async def cached_instance(
+    shared_db: AsyncSession, user_id: int, instance_id: int
+) -> CachedPayload | None:
+    """`GET /instances/{id}` for the owner, None when the user owns no such instance."""
+    return await _read_through(
+        cache.get_redis_client(),
+        _generation_key("instance", instance_id),
+        f"{CACHE_PREFIX}:{user_id}:instance:{instance_id}",
+        lambda: render_instance(shared_db, user_id, instance_id),
+        hot_instance=(instance_id, user_id),
+    )
+
+
+async def cached_page(
+    shared_db: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    cursor: int | None,
+    include: Iterable[InstanceInclude],
+) -> CachedPayload:
+    """One `GET /instances` page of the user, see `render_page`."""
+    includes = sorted({item.value for item in include})
+    query = f"limit={limit}&cursor={'' if cursor is None else cursor}&include={','.join(includes)}"
+    payload = await _read_through(
+        cache.get_redis_client(),
+        _generation_key("user", user_id),
+        f"{CACHE_PREFIX}:{user_id}:list:{query}",
+        lambda: render_page(
+            shared_db, user_id, limit=limit, cursor=cursor, include=includes, salt=query
+        ),
+    )
+    assert payload is not None  # a page always renders
+    return payload
+
+
+async def _read_through(
+    client: Redis,
+    generation_key: str,
+    key: str,
+    load: Callable[[], Awaitable[CachedPayload | None]],
+    *,
+    hot_instance: tuple[int, int] | None = None,
+) -> CachedPayload | None:
+    """Serves `key` at the current generation, or fills it with `load()`.
+
+    Payload keys embed the generation that was current before the database was read,
+    and `invalidate` moves to a new one, so a fill that raced an invalidation lands on a
+    key nobody reads any more instead of overwriting fresher data. On a miss only the
+    request holding `<key>:lock` loads; the others poll for its result for up to
+    `instance_cache_lock_seconds` before loading themselves. Redis errors fall back to
+    `load()`.
+    """
+    try:
+        generation = await client.get(generation_key) or "0"
+        key = f"{key}@{generation}"
+        stored = await client.hgetall(key)
+    except RedisError:
+        _stats.errors += 1
+        return await load()
+    if stored:
+        _stats.hits += 1
+        return CachedPayload(**stored)
+
+    _stats.misses += 1
+    lock = f"{key}:lock"
+    try:
+        locked = await client.set(
+            lock, "1", nx=True, px=int(settings.instance_cache_lock_seconds * 1000)
+        )
+        if not locked:
+            waited = await _wait_for_fill(client, key, lock)
+            if waited is not None:
+                _stats.coalesced += 1
+                return waited
+            _stats.lock_timeouts += 1
+            return await load()
+    except RedisError:
+        _stats.errors += 1
+        return await load()
+
+    try:
+        payload = await load()
+    except BaseException:
+        await _release(client, lock)
+        raise
+    if payload is None:
+        await _release(client, lock)
+        return None
+    ttl = settings.instance_cache_ttl_seconds
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=_fields(payload))
+            pipe.expire(key, ttl)
+            if hot_instance is not None:
+                instance_id, user_id = hot_instance
+                pipe.set(_hot_key(instance_id), str(user_id), ex=ttl)
+            pipe.delete(lock)
+            await pipe.execute()
+        _stats.fills += 1
+    except RedisError:
+        _stats.errors += 1
+    return payload
+
+
+def _fields(payload: CachedPayload) -> dict[str, str]:
+    fields = {"etag": payload.etag, "body": payload.body}
+    if payload.next_cursor is not None:
+        fields["next_cursor"] = payload.next_cursor
+    return fields
+
+
+async def _wait_for_fill(client: Redis, key: str, lock: str) -> CachedPayload | None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.instance_cache_lock_seconds
+    while loop.time() < deadline:
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.exists(lock)
+            stored, locked = await pipe.execute()
+        if stored:
+            return CachedPayload(**stored)
+        if not locked:  # the filler found nothing to cache, or failed
+            return None
+    return None
+
+
+async def _release(client: Redis, lock: str) -> None:
+    try:
+        await client.delete(lock)
+    except RedisError:
+        _stats.errors += 1
+
+
+async def render_instance(
+    shared_db: AsyncSession, user_id: int, instance_id: int
+) -> CachedPayload | None:
+    """The instance with its knowledge base and entries, None unless the user owns it."""
+    owned = (Instance.id == instance_id, Instance.user_id == user_id)
+    knowledge_base_ids = select(KnowledgeBase.id).where(
+        KnowledgeBase.instance_id.in_(select(Instance.id).where(*owned))
+    )
+    etag = await compute_etag(
+        shared_db,
+        versioned(Instance, *owned),
+        versioned(KnowledgeBase, KnowledgeBase.id.in_(knowledge_base_ids)),
+        versioned(KnowledgeBaseEntry, KnowledgeBaseEntry.knowledge_base_id.in_(knowledge_base_ids)),
+        salt=f"{user_id}|instance:{instance_id}",
+    )
+    stmt = (
+        select(Instance)
+        .where(*owned)
+        .options(joinedload(Instance.knowledge_base).selectinload(KnowledgeBase.entries))
+    )
+    result = await shared_db.execute(stmt)
+    instance = result.scalar_one_or_none()
+    if instance is None:
+        return None
+    return CachedPayload(etag=etag, body=InstanceOut.model_validate(instance).model_dump_json())
+
+
+async def render_page(
+    shared_db: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    cursor: int | None,
+    include: list[str],
+    salt: str,
+) -> CachedPayload:
+    """Keyset page of the user's instances in `id` order; relations load only when included."""
+    criteria = [Instance.user_id == user_id]
+    if cursor is not None:
+        criteria.append(Instance.id > cursor)
+    page = versioned(Instance, *criteria).order_by(Instance.id).limit(limit + 1)
+    versions = [page]
+    if include:
+        page_ids = select(page.subquery().c.id)
+        versions.append(versioned(KnowledgeBase, KnowledgeBase.instance_id.in_(page_ids)))
+        if InstanceInclude.ENTRIES in include:
+            knowledge_base_ids = select(KnowledgeBase.id).where(KnowledgeBase.instance_id.in_(page_ids))
+            versions.append(
+                versioned(
+                    KnowledgeBaseEntry,
+                    KnowledgeBaseEntry.knowledge_base_id.in_(knowledge_base_ids),
+                )
+            )
+    etag = await compute_etag(shared_db, *versions, salt=f"{user_id}|list:{salt}")
+
+    stmt = select(Instance).where(*criteria).order_by(Instance.id).limit(limit + 1)
+    if InstanceInclude.ENTRIES in include:
+        stmt = stmt.options(
+            selectinload(Instance.knowledge_base).selectinload(KnowledgeBase.entries)
+        )
+    elif InstanceInclude.KNOWLEDGE_BASE in include:
+        stmt = stmt.options(selectinload(Instance.knowledge_base).noload(KnowledgeBase.entries))
+    else:
+        stmt = stmt.options(noload(Instance.knowledge_base))
+    result = await shared_db.execute(stmt)
+    instances = result.scalars().all()
+    next_cursor = None
+    if len(instances) > limit:
+        instances = instances[:limit]
+        next_cursor = str(instances[-1].id)
+    body = _PAGE.dump_json([InstanceOut.model_validate(instance) for instance in instances])
+    return CachedPayload(etag=etag, body=body.decode(), next_cursor=next_cursor)
+
+
+async def invalidate(pairs: Iterable[tuple[int, int]], client: Redis | None = None) -> list[int]:
+    """Moves `(instance_id, user_id)` pairs and their owners' list pages to a new generation.
+
+    Returns the instances that were read within the last TTL, whose payloads are worth
+    rendering again right away (`instances.refresh_cache`). Generation keys outlive
+    payloads (2x TTL), so an expired one cannot resurrect a payload still cached at an
+    older generation.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return []
+    client = client or cache.get_redis_client()
+    generation = await client.incr(CLOCK_KEY)
+    ttl = 2 * settings.instance_cache_ttl_seconds
+    instance_ids = sorted({instance_id for instance_id, _ in pairs})
+    async with client.pipeline(transaction=False) as pipe:
+        for instance_id in instance_ids:
+            pipe.set(_generation_key("instance", instance_id), generation, ex=ttl)
+        for user_id in {user_id for _, user_id in pairs}:
+            pipe.set(_generation_key("user", user_id), generation, ex=ttl)
+        for instance_id in instance_ids:
+            pipe.exists(_hot_key(instance_id))
+        results = await pipe.execute()
+    _stats.invalidations += len(pairs)
+    hot = results[len(results) - len(instance_ids) :]
+    return [instance_id for instance_id, is_hot in zip(instance_ids, hot) if is_hot]
+
+
+async def evict(user_id: int, instance_id: int) -> None:
+    """Invalidates after a write of this service, so the writer reads its own write.
+
+    Redis errors are ignored: the write's event invalidates again.
+    """
+    try:
+        await invalidate([(instance_id, user_id)])
+    except RedisError:
+        _stats.errors += 1
+
+
+async def affected_instances(
+    shared_db: AsyncSession, envelopes: Iterable[Any]
+) -> set[tuple[int, int]]:
+    """`(instance_id, user_id)` of every instance whose cached payloads the events change.
+
+    Understands per-row envelopes (`data`) and forwarded statement batches (`rows`) of
+    `instances`, `knowledge_bases` and `knowledge_base_entries`. Inserts and deletes carry
+    the parent ids (delete tombstones keep them); update diffs only carry `id`, so missing
+    parents are looked up, at most one query per table for the whole batch.
+    """
+    pairs: set[tuple[int, int]] = set()
+    instance_ids: set[int] = set()
+    knowledge_base_ids: set[int] = set()
+    entry_ids: set[int] = set()
+    for envelope in envelopes:
+        if not isinstance(envelope, dict):
+            continue
+        table = envelope.get("table")
+        for row in envelope.get("rows") or [envelope.get("data")]:
+            if not isinstance(row, dict):
+                continue
+            if table == "instances" and row.get("id") is not None:
+                if row.get("user_id") is not None:
+                    pairs.add((row["id"], row["user_id"]))
+                else:
+                    instance_ids.add(row["id"])
+            elif table == "knowledge_bases":
+                if row.get("instance_id") is not None:
+                    instance_ids.add(row["instance_id"])
+                elif row.get("id") is not None:
+                    knowledge_base_ids.add(row["id"])
+            elif table == "knowledge_base_entries":
+                if row.get("knowledge_base_id") is not None:
+                    knowledge_base_ids.add(row["knowledge_base_id"])
+                elif row.get("id") is not None:
+                    entry_ids.add(row["id"])
+
+    if entry_ids:
+        result = await shared_db.execute(
+            select(KnowledgeBaseEntry.knowledge_base_id).where(KnowledgeBaseEntry.id.in_(entry_ids))
+        )
+        knowledge_base_ids.update(result.scalars())
+    if knowledge_base_ids:
+        result = await shared_db.execute(
+            select(KnowledgeBase.instance_id).where(KnowledgeBase.id.in_(knowledge_base_ids))
+        )
+        instance_ids.update(result.scalars())
+    instance_ids -= {instance_id for instance_id, _ in pairs}
+    if instance_ids:
+        result = await shared_db.execute(
+            select(Instance.id, Instance.user_id).where(Instance.id.in_(instance_ids))
+        )
+        pairs.update(result.tuples())
+    return pairs
+
+
+async def refresh_instance(shared_db: AsyncSession, instance_id: int, client: Redis) -> bool:
+    """Renders a hot instance into the cache at its current generation; False if it is not
+    hot (or no longer exists)."""
+    user_id = await client.get(_hot_key(instance_id))
+    if user_id is None:
+        return False
+    payload = await _read_through(
+        client,
+        _generation_key("instance", instance_id),
+        f"{CACHE_PREFIX}:{user_id}:instance:{instance_id}",
+        lambda: render_instance(shared_db, int(user_id), instance_id),
+        hot_instance=(instance_id, int(user_id)),
+    )
+    return payload is not None
+
+
+__all__ = [
+    "CachedPayload",
+    "CacheStats",
+    "affected_instances",
+    "cached_instance",
+    "cached_page",
+    "evict",
+    "invalidate",
+    "refresh_instance",
+    "render_instance",
+    "render_page",
+    "stats",
+]
@@ -0,0 +1,67 @@
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.services import cache
+from shared_psql_models.models import Instance, KnowledgeBase
+
+settings = get_settings()
+
+
+def _ownership_key(user_id: int) -> str:
+    return f"ownership:user:{user_id}"
+
+
+async def resolve_instance(
+    shared_db: AsyncSession, user_id: int, instance_id: int
+) -> tuple[int, int | None]:
+    """`(instance_id, knowledge_base_id)` of an instance the user owns, 404 otherwise.
+
+    Answers come from a per-user Redis hash (field: instance id, value: knowledge base id,
+    empty when there is none) that expires `ownership_cache_ttl_seconds` after it was
+    created; misses run one join on the primary key and the unique
+    `knowledge_bases.instance_id`. Ownership never changes, so only deletes need
+    `forget_instance`; the TTL bounds staleness for deletes made elsewhere. Redis errors
+    fall back to the database.
+    """
+    client = cache.get_redis_client()
+    key = _ownership_key(user_id)
+    try:
+        cached = await client.hget(key, str(instance_id))
+    except RedisError:
+        cached = None
+    if cached is not None:
+        return instance_id, int(cached) if cached else None
+
+    stmt = (
+        select(Instance.id, KnowledgeBase.id)
+        .outerjoin(KnowledgeBase, KnowledgeBase.instance_id == Instance.id)
+        .where(Instance.id == instance_id, Instance.user_id == user_id)
+    )
+    result = await shared_db.execute(stmt)
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Instance not found")
+    knowledge_base_id = row[1]
+
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, str(instance_id), "" if knowledge_base_id is None else str(knowledge_base_id))
+            pipe.expire(key, settings.ownership_cache_ttl_seconds, nx=True)
+            await pipe.execute()
+    except RedisError:
+        pass
+    return instance_id, knowledge_base_id
+
+
+async def forget_instance(user_id: int, instance_id: int) -> None:
+    """Drops a deleted instance from its owner's cache."""
+    try:
+        await cache.get_redis_client().hdel(_ownership_key(user_id), str(instance_id))
+    except RedisError:
+        pass
+
+
+__all__ = ["forget_instance", "resolve_instance"]
@@ -0,0 +1,64 @@
+"""Keeps the instance cache in step with `events.topic`.
+
+Run with `python -m app.workers.instance_events`. Every batch of `instance.*` and
+`knowledge_base.*` events moves the affected instances and their owners' list pages to
+a new cache generation, and queues `instances.refresh_cache` for the instances that
+were read within the cache TTL.
+"""
+
+import asyncio
+
+import aio_pika
+from aio_pika.abc import AbstractChannel
+
+from app.core.config import get_settings
+from app.db.shared_session import get_shared_session_factory
+from app.services import instance_cache
+from app.workers.tasks import refresh_instance_cache
+from shared_psql_models.messaging import Delivery, EventConsumer
+
+settings = get_settings()
+
+# Forwarded statement batches (`<routing_key>.batch`) are bound explicitly; the
+# `.full` copies of update diffs are not needed, the diff already names the row.
+BINDINGS = (
+    "instance.*",
+    "instance.*.batch",
+    "knowledge_base.*",
+    "knowledge_base.*.batch",
+    "knowledge_base.entry.*",
+    "knowledge_base.entry.*.batch",
+)
+
+
+def build_consumer(channel: AbstractChannel) -> EventConsumer:
+    consumer = EventConsumer(
+        channel, settings.instance_cache_queue, bindings=BINDINGS, prefetch=512, concurrency=4
+    )
+
+    @consumer.batch_handler("#", size=200, linger=0.05)
+    async def invalidate_instances(deliveries: list[Delivery]) -> None:
+        async with get_shared_session_factory()() as shared_db:
+            pairs = await instance_cache.affected_instances(
+                shared_db, (delivery.envelope for delivery in deliveries)
+            )
+        for instance_id in await instance_cache.invalidate(pairs):
+            await asyncio.to_thread(refresh_instance_cache.delay, instance_id)
+
+    return consumer
+
+
+async def main() -> None:
+    connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+    channel = await connection.channel()
+    consumer = build_consumer(channel)
+    await consumer.start()
+    try:
+        await asyncio.Future()
+    finally:
+        await consumer.stop()
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
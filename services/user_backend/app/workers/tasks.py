@@ -1,9 +1,32 @@
+import asyncio
+
 from celery import shared_task
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import get_settings
+from app.services import instance_cache
+
+settings = get_settings()
 
 
 @shared_task(name="instances.refresh_cache")
-def refresh_instance_cache(instance_id: str) -> str:
-    """Placeholder task to demonstrate structure."""
-    return instance_id
+def refresh_instance_cache(instance_id: int) -> bool:
+    """Renders a hot instance into the instance cache again after it was invalidated, so
+    its next read is a hit. False when it is no longer hot or no longer exists."""
+    return asyncio.run(_refresh(instance_id))
 
 
+async def _refresh(instance_id: int) -> bool:
+    # Every task runs in a fresh event loop, so it cannot reuse the process-wide clients.
+    if not settings.shared_pg_dsn:
+        raise RuntimeError("SHARED_PG_DSN is not configured")
+    client = Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+    engine = create_async_engine(settings.shared_pg_dsn, poolclass=NullPool)
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as shared_db:
+            return await instance_cache.refresh_instance(shared_db, instance_id, client)
+    finally:
+        await client.aclose()
+        await engine.dispose()
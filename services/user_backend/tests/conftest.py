@@ -1,6 +1,6 @@
 import asyncio
 import json
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Iterator
 
 import fakeredis.aioredis
 import pytest
@@ -14,6 +14,7 @@ from app.main import app
 from app.services import cache as cache_module
 from shared_psql_models import Base as SharedBase
 from shared_psql_models.models import Agent
+from shared_psql_models.testing import record_statements
 
 SQLITE_TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 SHARED_SQLITE_URL = "sqlite+aiosqlite:///:memory:"
@@ -123,3 +124,13 @@ async def seeded_agents(shared_db_session: AsyncSession) -> list[Agent]:
     return agents
 
 
+@pytest.fixture
+def statements() -> Iterator[list[str]]:
+    with record_statements(engine) as recorded:
+        yield recorded
+
+
+@pytest.fixture
+def shared_statements() -> Iterator[list[str]]:
+    with record_statements(shared_engine) as recorded:
+        yield recorded
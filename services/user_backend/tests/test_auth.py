@@ -6,7 +6,7 @@ from app.core.config import get_settings
 
 
 @pytest.mark.asyncio
-async def test_registration_and_login_flow(client, fake_redis):
+async def test_registration_and_login_flow(client, fake_redis, statements):
     payload = {
         "name": "Alice",
         "company": "Botberi",
@@ -21,11 +21,13 @@ async def test_registration_and_login_flow(client, fake_redis):
     cached = await fake_redis.get("registration:pending:alice@example.com")
     code = json.loads(cached)["code"]
 
+    statements.clear()
     resp = await client.post(
         "/api/v1/auth/register/confirm",
         json={"email": payload["email"], "code": code},
     )
     assert resp.status_code == 201
+    assert statements == ["INSERT"]
 
     login_resp = await client.post(
         "/api/v1/auth/login",
@@ -39,7 +41,7 @@ async def test_registration_and_login_flow(client, fake_redis):
 
 
 @pytest.mark.asyncio
-async def test_profile_update(client, fake_redis, registered_user):
+async def test_profile_update(client, fake_redis, registered_user, statements):
     login_resp = await client.post(
         "/api/v1/auth/login",
         json={"email": registered_user["email"], "password": registered_user["password"]},
@@ -52,12 +54,14 @@ async def test_profile_update(client, fake_redis, registered_user):
         "phone": "+1888888888",
         "telegram": "@updated",
     }
+    statements.clear()
     resp = await client.patch(
         "/api/v1/users/me",
         json=updated,
         headers={"Authorization": f"Bearer {token}"},
     )
     assert resp.status_code == 200
+    assert statements == ["SELECT", "UPDATE"]  # the token's user, then UPDATE ... RETURNING
     body = resp.json()
     assert body["name"] == updated["name"]
     assert body["company"] == updated["company"]
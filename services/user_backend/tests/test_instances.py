@@ -1,8 +1,18 @@
+import asyncio
+import json
+
 import pytest
+from sqlalchemy import update
+
+from app.services import instance_cache
+from app.workers import instance_events
+from shared_psql_models.messaging import MemoryBroker
+from shared_psql_models.models import Instance
+from tests.conftest import SharedTestingSession
 
 
 @pytest.mark.asyncio
-async def test_instance_lifecycle(client, registered_user, seeded_agents):
+async def test_instance_lifecycle(client, registered_user, seeded_agents, shared_statements):
     login_resp = await client.post(
         "/api/v1/auth/login",
         json={"email": registered_user["email"], "password": registered_user["password"]},
@@ -16,8 +26,11 @@ async def test_instance_lifecycle(client, registered_user, seeded_agents):
         "user_config": {"param": 1},
         "pipeline_config": {"flow": []},
     }
+    shared_statements.clear()
     create_resp = await client.post("/api/v1/instances", json=create_payload, headers=headers)
     assert create_resp.status_code == 201
+    # The agent is already in the session; Postgres takes a single WITH ... INSERT.
+    assert shared_statements == ["INSERT", "INSERT"]
     instance = create_resp.json()
     instance_id = instance["id"]
     assert instance["knowledge_base"]["id"] is not None
@@ -56,3 +69,365 @@ async def test_instance_lifecycle(client, registered_user, seeded_agents):
     assert delete_resp.status_code == 204
 
 
+
+
+@pytest.mark.asyncio
+async def test_instance_list_pages_by_cursor_and_loads_relations_on_request(
+    client, registered_user, seeded_agents, shared_db_session
+):
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    ids = []
+    for index in range(5):
+        create_resp = await client.post(
+            "/api/v1/instances",
+            json={"bot_id": seeded_agents[0].id, "title": f"Bot {index}"},
+            headers=headers,
+        )
+        ids.append(create_resp.json()["id"])
+    await client.post(
+        f"/api/v1/instances/{ids[0]}/knowledge-base/entries",
+        json={"content": "Docs"},
+        headers=headers,
+    )
+    shared_db_session.expunge_all()  # the app gets a fresh session per request
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = await client.get("/api/v1/instances", params=params, headers=headers)
+        assert page.status_code == 200
+        seen.extend(instance["id"] for instance in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == sorted(ids)
+    assert all(instance["knowledge_base"] is None for instance in page.json())
+
+    bare = await client.get(
+        "/api/v1/instances", params={"include": "knowledge_base"}, headers=headers
+    )
+    assert bare.json()[0]["knowledge_base"]["entries"] == []
+    full = await client.get("/api/v1/instances", params={"include": "entries"}, headers=headers)
+    assert [entry["content"] for entry in full.json()[0]["knowledge_base"]["entries"]] == ["Docs"]
+
+    invalid = await client.get("/api/v1/instances", params={"include": "agent"}, headers=headers)
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_knowledge_base_export_streams_ndjson(
+    client, registered_user, seeded_agents, monkeypatch
+):
+    from app.api.v1.endpoints import instances as instances_endpoint
+
+    monkeypatch.setattr(instances_endpoint, "EXPORT_BATCH_SIZE", 2)
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    create_resp = await client.post(
+        "/api/v1/instances",
+        json={"bot_id": seeded_agents[0].id, "title": "Export"},
+        headers=headers,
+    )
+    instance_id = create_resp.json()["id"]
+    for index in range(5):
+        await client.post(
+            f"/api/v1/instances/{instance_id}/knowledge-base/entries",
+            json={"content": f"Doc {index}"},
+            headers=headers,
+        )
+
+    export = await client.get(
+        f"/api/v1/instances/{instance_id}/knowledge-base/entries/export", headers=headers
+    )
+    assert export.status_code == 200
+    assert export.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in export.text.splitlines()]
+    assert [line["content"] for line in lines] == [f"Doc {index}" for index in range(5)]
+
+    missing = await client.get(
+        "/api/v1/instances/999999/knowledge-base/entries/export", headers=headers
+    )
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_entry_upload_reports_every_item(
+    client, registered_user, seeded_agents, monkeypatch
+):
+    from app.api.v1.endpoints import instances as instances_endpoint
+
+    monkeypatch.setattr(instances_endpoint, "BULK_CHUNK_SIZE", 2)
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    create_resp = await client.post(
+        "/api/v1/instances",
+        json={"bot_id": seeded_agents[0].id, "title": "Bulk"},
+        headers=headers,
+    )
+    url = f"/api/v1/instances/{create_resp.json()['id']}/knowledge-base/entries/bulk"
+
+    lines = [
+        json.dumps({"content": "One", "data_type": "document"}),
+        "{not json",
+        json.dumps({"content": ""}),
+        "",
+        json.dumps({"content": "Two"}),
+        json.dumps({"content": "Three", "lang_hint": "en"}),
+    ]
+    ndjson = await client.post(
+        url,
+        content="\n".join(lines).encode(),
+        headers=headers | {"Content-Type": "application/x-ndjson"},
+    )
+    assert ndjson.status_code == 200
+    result = ndjson.json()
+    assert (result["created"], result["failed"]) == (3, 2)
+    assert [item["index"] for item in result["items"]] == [0, 1, 2, 3, 4]
+    assert result["items"][1]["error"] == "Invalid JSON"
+    assert result["items"][2]["error"].startswith("content:")
+
+    array = await client.post(url, json=[{"content": "Four"}], headers=headers)
+    assert array.json()["created"] == 1
+    not_a_list = await client.post(url, json={"content": "Five"}, headers=headers)
+    assert not_a_list.status_code == 422
+
+    entries = await client.get(url.removesuffix("/bulk"), headers=headers)
+    assert [entry["content"] for entry in entries.json()] == ["One", "Two", "Three", "Four"]
+    created_ids = [item["id"] for item in result["items"] if item["id"] is not None]
+    assert created_ids == [entry["id"] for entry in entries.json()][:3]
+
+
+@pytest.mark.asyncio
+async def test_bulk_entry_upload_enforces_the_item_limit_before_inserting(
+    client, registered_user, seeded_agents, monkeypatch
+):
+    from app.api.v1.endpoints import instances as instances_endpoint
+
+    monkeypatch.setattr(instances_endpoint, "BULK_MAX_ITEMS", 2)
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    create_resp = await client.post(
+        "/api/v1/instances",
+        json={"bot_id": seeded_agents[0].id, "title": "Limit"},
+        headers=headers,
+    )
+    url = f"/api/v1/instances/{create_resp.json()['id']}/knowledge-base/entries/bulk"
+
+    array = await client.post(url, json=[{"content": str(n)} for n in range(3)], headers=headers)
+    assert array.status_code == 413
+    assert (await client.get(url.removesuffix("/bulk"), headers=headers)).json() == []
+
+    lines = [json.dumps({"content": str(n)}) for n in range(4)]
+    ndjson = await client.post(
+        url,
+        content="\n".join(lines).encode(),
+        headers=headers | {"Content-Type": "application/x-ndjson"},
+    )
+    assert ndjson.status_code == 200
+    result = ndjson.json()
+    assert (result["created"], result["failed"]) == (2, 1)
+    assert result["items"][2]["index"] == 2
+    assert result["items"][2]["error"].startswith("Over the 2 entry limit")
+    entries = await client.get(url.removesuffix("/bulk"), headers=headers)
+    assert [entry["content"] for entry in entries.json()] == ["0", "1"]
+
+
+@pytest.mark.asyncio
+async def test_entry_ownership_is_cached_until_the_instance_is_deleted(
+    client, registered_user, seeded_agents, fake_redis
+):
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    create_resp = await client.post(
+        "/api/v1/instances",
+        json={"bot_id": seeded_agents[0].id, "title": "Owned"},
+        headers=headers,
+    )
+    instance = create_resp.json()
+    entries_url = f"/api/v1/instances/{instance['id']}/knowledge-base/entries"
+
+    entry_resp = await client.post(entries_url, json={"content": "Docs"}, headers=headers)
+    assert entry_resp.json()["knowledge_base_id"] == instance["knowledge_base"]["id"]
+    [cache_key] = await fake_redis.keys("ownership:user:*")
+    assert await fake_redis.hgetall(cache_key) == {
+        str(instance["id"]): str(instance["knowledge_base"]["id"])
+    }
+    assert 0 < await fake_redis.ttl(cache_key) <= 30
+
+    missing = await client.get("/api/v1/instances/999999/knowledge-base/entries", headers=headers)
+    assert missing.status_code == 404
+    assert await fake_redis.hlen(cache_key) == 1
+
+    await client.delete(f"/api/v1/instances/{instance['id']}", headers=headers)
+    assert await fake_redis.hlen(cache_key) == 0
+    after_delete = await client.get(entries_url, headers=headers)
+    assert after_delete.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_conditional_gets_answer_304_without_loading_rows(
+    client, registered_user, seeded_agents, shared_statements
+):
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    create_resp = await client.post(
+        "/api/v1/instances",
+        json={"bot_id": seeded_agents[0].id, "title": "Polled"},
+        headers=headers,
+    )
+    instance_url = f"/api/v1/instances/{create_resp.json()['id']}"
+
+    first = await client.get(instance_url, headers=headers)
+    etag = first.headers["ETag"]
+    shared_statements.clear()
+    cached = await client.get(instance_url, headers=headers | {"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.headers["ETag"] == etag
+    assert cached.content == b""
+    assert shared_statements == []  # served from the instance cache
+
+    await client.post(
+        f"{instance_url}/knowledge-base/entries", json={"content": "Docs"}, headers=headers
+    )
+    changed = await client.get(instance_url, headers=headers | {"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    entries = await client.get(f"{instance_url}/knowledge-base/entries", headers=headers)
+    assert entries.headers["ETag"] != changed.headers["ETag"]
+
+    listing = await client.get("/api/v1/instances", headers=headers)
+    with_entries = await client.get(
+        "/api/v1/instances", params={"include": "entries"}, headers=headers
+    )
+    assert listing.headers["ETag"] != with_entries.headers["ETag"]
+    again = await client.get(
+        "/api/v1/instances",
+        params={"include": "entries"},
+        headers=headers | {"If-None-Match": f'W/{with_entries.headers["ETag"]}, "other"'},
+    )
+    assert again.status_code == 304
+
+    agents = await client.get("/api/v1/agents")
+    cached_agents = await client.get("/api/v1/agents", headers={"If-None-Match": agents.headers["ETag"]})
+    assert cached_agents.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_instance_reads_are_cached_until_an_event_invalidates_them(
+    client, registered_user, seeded_agents, shared_db_session, shared_statements, fake_redis, monkeypatch
+):
+    login_resp = await client.post(
+        "/api/v1/auth/login",
+        json={"email": registered_user["email"], "password": registered_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    create_resp = await client.post(
+        "/api/v1/instances",
+        json={"bot_id": seeded_agents[0].id, "title": "Dashboard"},
+        headers=headers,
+    )
+    instance_id = create_resp.json()["id"]
+    instance_url = f"/api/v1/instances/{instance_id}"
+    await client.get(instance_url, headers=headers)
+    await client.get("/api/v1/instances", headers=headers)
+
+    before = instance_cache.stats()
+    shared_statements.clear()
+    assert (await client.get(instance_url, headers=headers)).json()["title"] == "Dashboard"
+    assert (await client.get("/api/v1/instances", headers=headers)).json()[0]["title"] == "Dashboard"
+    assert shared_statements == []
+    assert instance_cache.stats().hits == before.hits + 2
+    assert (await client.get("/api/v1/health/cache")).json()["hits"] >= 2
+
+    # Another service changes the row; the cache answers from memory until its event arrives.
+    await shared_db_session.execute(
+        update(Instance).where(Instance.id == instance_id).values(status="running")
+    )
+    await shared_db_session.commit()
+    assert (await client.get(instance_url, headers=headers)).json()["status"] == "pending"
+
+    queued: list[int] = []
+    monkeypatch.setattr(instance_events, "get_shared_session_factory", lambda: SharedTestingSession)
+    monkeypatch.setattr(instance_events.refresh_instance_cache, "delay", queued.append)
+    broker = MemoryBroker()
+    consumer = instance_events.build_consumer(broker.channel())
+    await consumer.start()
+    diff = {
+        "routing_key": "instance.updated",
+        "table": "instances",
+        "op": "UPDATE",
+        "schema_version": 2,
+        "seq": 1,
+        "data": {"id": instance_id, "status": "running", "updated_at": "t"},
+    }
+    broker.publish("events.topic", "instance.updated", json.dumps(diff).encode())
+    broker.publish("events.topic", "instance.updated.full", json.dumps(diff).encode())
+    await asyncio.sleep(0.1)
+    await consumer.stop()
+    assert broker.depth(instance_events.settings.instance_cache_queue) == 0
+    assert queued == [instance_id]  # read recently, so it is rendered again right away
+
+    assert await instance_cache.refresh_instance(shared_db_session, instance_id, fake_redis)
+    shared_statements.clear()
+    assert (await client.get(instance_url, headers=headers)).json()["status"] == "running"
+    assert shared_statements == []
+    assert (await client.get("/api/v1/instances", headers=headers)).json()[0]["status"] == "running"
+
+    entry_resp = await client.post(
+        f"{instance_url}/knowledge-base/entries", json={"content": "Docs"}, headers=headers
+    )
+    entry = entry_resp.json()
+    user_id = (await client.get("/api/v1/users/me", headers=headers)).json()["id"]
+    pairs = await instance_cache.affected_instances(
+        shared_db_session,
+        [
+            {"table": "knowledge_base_entries", "data": {"id": entry["id"], "status": "ready"}},
+            {"table": "knowledge_bases", "rows": [{"id": entry["knowledge_base_id"]}]},
+            {"table": "agents", "data": {"id": 1}},
+        ],
+    )
+    assert pairs == {(instance_id, user_id)}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once(fake_redis):
+    loads = 0
+
+    async def load() -> instance_cache.CachedPayload:
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return instance_cache.CachedPayload(etag='"v1"', body="[]")
+
+    before = instance_cache.stats()
+    payloads = await asyncio.gather(
+        *(
+            instance_cache._read_through(fake_redis, "instance_cache:gen:user:1", "k", load)
+            for _ in range(5)
+        )
+    )
+    assert loads == 1
+    assert {payload.etag for payload in payloads} == {'"v1"'}
+    assert instance_cache.stats().coalesced == before.coalesced + 4
+
+    # A fill that started before an invalidation lands on the old generation.
+    await instance_cache.invalidate([(7, 1)], client=fake_redis)
+    await instance_cache._read_through(fake_redis, "instance_cache:gen:user:1", "k", load)
+    assert loads == 2